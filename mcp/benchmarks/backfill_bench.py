@@ -0,0 +1,100 @@
+"""
+Embedding backfill throughput: batched pipeline vs. one embed call and one insert per fault (what the
+`generate-fault-embedding` webhook does), against `benchmarks.fake_postgrest`.
+
+The embedder is the local `HashingEmbedder` plus `--embed-latency-ms` per call to stand in for the model
+API round-trip. Each mode embeds up to `--faults-per-mode` faults that have no embedding yet; the report
+extrapolates to `--extrapolate` faults. Then a batched run is interrupted and resumed from its checkpoint.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.backfill_bench --faults 1000000 --faults-per-mode 20000 --embed-latency-ms 150
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from supabase import ClientOptions, create_client
+
+from benchmarks.load_bench import _free_port, _process
+from wellsync_data.embedding_backfill import Checkpoint, EmbeddingBackfill, supabase_io
+from wellsync_data.fault_search import HashingEmbedder
+from wellsync_data.supabase_executor import SupabaseExecutor
+
+
+class DelayedEmbedder(HashingEmbedder):
+    """`HashingEmbedder` that also waits `latency_ms` per call, like a remote embedding API."""
+
+    def __init__(self, latency_ms: float):
+        super().__init__()
+        self.latency = latency_ms / 1000
+
+    async def embed(self, texts: list[str], input_type: str) -> list[list[float]]:
+        await asyncio.sleep(self.latency)
+        return await super().embed(texts, input_type)
+
+
+async def _run(url: str, latency_ms: float, limit: int, batch_size: int, concurrency: int, checkpoint: Checkpoint | None = None) -> dict:
+    client = create_client(url, "benchmark-key", options=ClientOptions(headers={"Accept": "application/json"}))
+    db = SupabaseExecutor(max_workers=concurrency + 1, max_pending=concurrency * 4)
+    fetch_page, write_rows = supabase_io(client, db)
+    backfill = EmbeddingBackfill(
+        fetch_page, write_rows, DelayedEmbedder(latency_ms), checkpoint,
+        page_size=max(batch_size, 1000), batch_size=batch_size, concurrency=concurrency,
+    )
+    try:
+        return await backfill.run(limit=limit)
+    finally:
+        await db.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wells", type=int, default=10_000)
+    parser.add_argument("--faults", type=int, default=1_000_000)
+    parser.add_argument("--faults-per-mode", type=int, default=20_000)
+    parser.add_argument("--embed-latency-ms", type=float, default=150.0)
+    parser.add_argument("--postgrest-latency-ms", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=96)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--extrapolate", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    port = _free_port()
+    with _process(
+        ["-m", "benchmarks.fake_postgrest", "--port", str(port), "--wells", str(args.wells), "--faults", str(args.faults),
+         "--latency-ms", str(args.postgrest_latency_ms)],
+        port,
+    ):
+        url = f"http://127.0.0.1:{port}"
+        # Per-row mode only runs a tenth as many faults: at webhook speed the full count takes too long
+        per_row_limit = max(args.faults_per_mode // 10, 1)
+        modes = [
+            ("per fault (webhook)", per_row_limit, 1, args.concurrency),
+            (f"batched x{args.batch_size}", args.faults_per_mode, args.batch_size, args.concurrency),
+        ]
+        print(f"embed call latency {args.embed_latency_ms:.0f} ms, concurrency {args.concurrency}\n")
+        print(f"{'mode':>22}{'faults':>9}{'seconds':>9}{'faults/s':>10}{f'{args.extrapolate:,} faults':>18}")
+        for label, limit, batch_size, concurrency in modes:
+            report = asyncio.run(_run(url, args.embed_latency_ms, limit, batch_size, concurrency))
+            rate = report["faults_per_second"] or 1.0
+            eta = args.extrapolate / rate
+            eta_text = f"{eta / 3600:.1f} h" if eta > 3600 else f"{eta / 60:.1f} min"
+            print(f"{label:>22}{report['embedded']:>9}{report['seconds']:>9.1f}{rate:>10.0f}{eta_text:>18}")
+
+        # Resume: a first run stops early (as if killed), a second continues from its checkpoint
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = Checkpoint(os.path.join(tmp, "backfill.json"))
+            first = asyncio.run(_run(url, args.embed_latency_ms, 2000, args.batch_size, args.concurrency, checkpoint))
+            saved = checkpoint.load()
+            second = asyncio.run(_run(url, args.embed_latency_ms, 2000, args.batch_size, args.concurrency, checkpoint))
+            print(
+                f"\nresume: first run embedded {first['embedded']} and checkpointed after {saved['after_fault_id']}; "
+                f"second run embedded {second['embedded']} more, after {second['after_fault_id']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Backend queries saved by request coalescing during a burst of identical dashboard calls.
+
+Starts `benchmarks.fake_postgrest`, imports `wellsync` against it (fleet snapshot and result cache
+off, so every read reaches the backend) and has `--agents` concurrent agents each issue the same
+`DASHBOARD` calls at once, `--rounds` times, with coalescing off and then on. Reports Supabase queries (from the server's own
+backend latency metrics) and wall time per mode.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.coalescing_bench --agents 50 --rounds 5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.load_bench import _free_port, _process
+
+# What a dashboard refresh asks; every agent asks the same
+DASHBOARD = [
+    ("get_wells", {"status": "fault"}),
+    ("get_part_inventory", {"part_id": "P001"}),
+    ("get_fault_summary", {"group_by": ["fault_type"]}),
+    ("resource", "wellsync://parts"),
+]
+
+
+def _backend_queries(mcp) -> int:
+    histogram = mcp.metrics.get("mcp_backend_call_duration_seconds")
+    return sum(histogram.count(*labels) for labels in list(histogram._series) if labels[0] == "supabase")
+
+
+def _failed(result) -> bool:
+    if isinstance(result, Exception):
+        return True
+    # Tool results are TextContent, resource reads ReadResourceContents
+    first = result[0]
+    return '"status":"error"' in str(first.text if hasattr(first, "text") else first.content)
+
+
+async def _burst(mcp, agents: int, rounds: int) -> tuple[float, int]:
+    """Wall time and the number of calls that returned an error (e.g. the Supabase queue was full)."""
+    started = time.perf_counter()
+    errors = 0
+    for _ in range(rounds):
+        calls = []
+        for _ in range(agents):
+            for name, arguments in DASHBOARD:
+                calls.append(mcp.read_resource(arguments) if name == "resource" else mcp.call_tool(name, arguments))
+        errors += sum(_failed(result) for result in await asyncio.gather(*calls, return_exceptions=True))
+    return time.perf_counter() - started, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--postgrest-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    port = _free_port()
+    with _process(
+        ["-m", "benchmarks.fake_postgrest", "--port", str(port), "--wells", "10000", "--faults", "100000",
+         "--latency-ms", str(args.postgrest_latency_ms)],
+        port,
+    ):
+        os.environ.update(
+            SUPABASE_URL=f"http://127.0.0.1:{port}", SUPABASE_KEY="benchmark-key", FLEET_SNAPSHOT_ENABLED="false",
+            RESULT_CACHE_ENABLED="false",
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "CRITICAL"),
+        )
+        import wellsync
+
+        async def run() -> None:
+            print(f"{args.agents} agents x {len(DASHBOARD)} calls x {args.rounds} rounds\n")
+            print(f"{'coalescing':>12}{'calls':>8}{'errors':>8}{'queries':>9}{'seconds':>9}")
+            for coalesce in (False, True):
+                wellsync.mcp.coalesce = coalesce
+                before = _backend_queries(wellsync.mcp)
+                seconds, errors = await _burst(wellsync.mcp, args.agents, args.rounds)
+                queries = _backend_queries(wellsync.mcp) - before
+                calls = args.agents * len(DASHBOARD) * args.rounds
+                print(f"{'on' if coalesce else 'off':>12}{calls:>8}{errors:>8}{queries:>9}{seconds:>9.2f}")
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Concurrency benchmark: do parallel sessions serialize behind one slow Supabase query?
+
+Simulates N concurrent tool calls on one event loop. One call hits a slow query, the rest hit fast
+ones. In "blocking" mode the query runs inline (how the sync tools used to call `query.execute()`),
+in "executor" mode it goes through `SupabaseExecutor`. The PostgREST round-trip is stood in for by a
+`time.sleep`, so no database is needed.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.concurrency_bench --sessions 32 --slow-ms 500 --fast-ms 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from wellsync_data.supabase_executor import SupabaseExecutor
+
+
+class _StandInQuery:
+    """Mimics a postgrest request builder whose `execute()` blocks for a fixed time."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def execute(self):
+        time.sleep(self.seconds)
+        return self
+
+
+async def _session(query: _StandInQuery, executor: SupabaseExecutor | None, scheduled: float) -> float:
+    if executor is None:
+        query.execute()
+    else:
+        await executor.execute(query)
+    return time.perf_counter() - scheduled
+
+
+async def _run(mode: str, sessions: int, slow_s: float, fast_s: float, workers: int) -> list[float]:
+    executor = SupabaseExecutor(max_workers=workers, max_pending=sessions) if mode == "executor" else None
+    queries = [_StandInQuery(slow_s)] + [_StandInQuery(fast_s) for _ in range(sessions - 1)]
+    started = time.perf_counter()
+    # Every call is measured from the moment it was scheduled, like a client waiting on its reply
+    latencies = await asyncio.gather(*(_session(q, executor, started) for q in queries))
+    wall = time.perf_counter() - started
+    if executor is not None:
+        await executor.shutdown()
+    fast = sorted(latencies[1:])
+    print(
+        f"{mode:>9}: wall {wall * 1000:8.1f} ms | fast calls p50 {statistics.median(fast) * 1000:8.1f} ms"
+        f" | p99 {fast[int(len(fast) * 0.99) - 1] * 1000:8.1f} ms | slow call {latencies[0] * 1000:8.1f} ms"
+    )
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--fast-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    for mode in ("blocking", "executor"):
+        asyncio.run(_run(mode, args.sessions, args.slow_ms / 1000, args.fast_ms / 1000, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,681 @@
+"""
+A fake PostgREST (Supabase REST) server for load tests, seeded from `supabase/mock_data.sql`.
+
+The seed wells, parts and inventory (and the warehouses of migration 018) are loaded as-is; the fleet is then scaled up synthetically to
+`--wells` wells. Faults are never materialized: each synthetic well's history is generated on demand,
+deterministically, from the seed faults (`--faults` in total), so 10M faults cost no memory and the same
+query always returns the same rows.
+
+Supported, i.e. what `wellsync.py` sends through supabase-py:
+  * `GET`/`HEAD /rest/v1/<table>` with `select`, `order`, `limit`, `offset`, `or=(...)` (nested `and`) and
+    `eq`, `neq`, `gt`, `gte`, `lt`, `lte`, `in`, `is` column filters
+  * `POST /rest/v1/rpc/get_fault_summary`, answered from a summary precomputed at startup
+  * `POST /rest/v1/rpc/get_faults_for_wells`, from the same on-demand fault histories
+  * `fault_embeddings` for the seed faults, embedded with the deterministic `HashingEmbedder`, and
+    `POST /rest/v1/rpc/search_faults` over them (`--search-latency-ms` slows it down to exercise the
+    server's local-index fallback)
+  * `POST /rest/v1/rpc/faults_without_embeddings` and `POST /rest/v1/fault_embeddings` for the embedding
+    backfill; inserted vectors are parsed and counted but not kept
+
+`--latency-ms` adds a fixed delay per request to mimic the network hop to Supabase.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.fake_postgrest --port 54329 --wells 100000 --faults 10000000
+"""
+
+import argparse
+import asyncio
+import bisect
+import heapq
+import itertools
+import json
+import os
+import re
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from wellsync_data.fault_search import HashingEmbedder, fault_document
+from wellsync_data.pagination import postgrest_timestamp
+
+MOCK_DATA_SQL = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "supabase", "mock_data.sql"
+)
+SEEDED_TABLES = ("wells", "parts", "inventory", "faults")
+WAREHOUSES_SQL = os.path.join(os.path.dirname(MOCK_DATA_SQL), "migrations", "018_create_warehouses.sql")
+TIMESTAMP_COLUMNS = {"timestamp", "last_maintenance", "last_updated"}
+FAULT_HISTORY_DAYS = 365
+FAULT_HISTORY_END = datetime(2025, 4, 17, 8, 0, 0)
+SEED_LAST_UPDATED = "2025-04-17T08:00:00"
+FAULT_RPC_COLUMNS = ("fault_id", "well_id", "part_id", "fault_type", "description", "timestamp")
+
+
+# --- Seed data ---
+
+def _split_values(text: str) -> Iterator[list[Any]]:
+    """Yield the tuples of an `INSERT ... VALUES (...), (...);` body as Python values."""
+    i, n = 0, len(text)
+    while i < n:
+        if text[i] == ";":
+            return
+        if text[i] != "(":
+            i += 1
+            continue
+        i += 1
+        row: list[Any] = []
+        token = ""
+        while i < n:
+            ch = text[i]
+            if ch == "'":
+                j = i + 1
+                value = []
+                while j < n:
+                    if text[j] == "'" and j + 1 < n and text[j + 1] == "'":
+                        value.append("'")
+                        j += 2
+                    elif text[j] == "'":
+                        break
+                    else:
+                        value.append(text[j])
+                        j += 1
+                row.append("".join(value))
+                token = None
+                i = j + 1
+                continue
+            if ch == "(" and token is not None and token.strip():
+                # A function call such as gen_random_uuid()
+                depth = 1
+                i += 1
+                while depth:
+                    depth += {"(": 1, ")": -1}.get(text[i], 0)
+                    i += 1
+                token += "()"
+                continue
+            if ch in ",)":
+                if token is not None:
+                    row.append(_literal(token.strip()))
+                token = ""
+                i += 1
+                if ch == ")":
+                    yield row
+                    break
+                continue
+            if token is not None:
+                token += ch
+            i += 1
+
+
+def _literal(token: str) -> Any:
+    if token.upper() == "NULL":
+        return None
+    if token == "gen_random_uuid()":
+        return str(uuid.uuid4())
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def _normalize_timestamp(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return postgrest_timestamp(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+
+
+def _parse_inserts(path: str, names: Iterable[str]) -> dict[str, list[dict]]:
+    """Rows of the `INSERT INTO <name> (...) VALUES ...` statements for `names` in a SQL file."""
+    with open(path, encoding="utf-8") as f:
+        # Comment lines sit between VALUES tuples and may contain parentheses themselves
+        sql = "".join(line for line in f if not line.lstrip().startswith("--"))
+    tables: dict[str, list[dict]] = {name: [] for name in names}
+    for match in re.finditer(r"INSERT INTO (\w+) \(([^)]*)\) VALUES", sql):
+        table = match.group(1)
+        if table not in tables:
+            continue
+        columns = [c.strip() for c in match.group(2).split(",")]
+        for values in _split_values(sql[match.end():]):
+            row = dict(zip(columns, values))
+            for column in TIMESTAMP_COLUMNS & row.keys():
+                row[column] = _normalize_timestamp(row[column])
+            tables[table].append(row)
+    return tables
+
+
+def load_seed(path: str = MOCK_DATA_SQL) -> dict[str, list[dict]]:
+    """Rows of the wells, parts, inventory and faults INSERTs in mock_data.sql."""
+    tables = _parse_inserts(path, SEEDED_TABLES)
+    # Stable ids, so runs against the same seed are comparable
+    for i, row in enumerate(tables["inventory"]):
+        row["id"] = str(uuid.UUID(int=(0xA << 124) | i))
+    for i, row in enumerate(tables["faults"]):
+        row["fault_id"] = str(uuid.UUID(int=(0xF << 124) | i))
+    for table in ("wells", "parts", "faults"):
+        for row in tables[table]:
+            row.setdefault("last_updated", SEED_LAST_UPDATED)
+    return tables
+
+
+def load_warehouses(path: str = WAREHOUSES_SQL) -> list[dict]:
+    """The warehouses seeded by migration 018."""
+    rows = _parse_inserts(path, ("warehouses",))["warehouses"]
+    for row in rows:
+        row.setdefault("last_updated", SEED_LAST_UPDATED)
+    return rows
+
+
+def synthetic_well_name(index: int) -> str:
+    """Name of the `index`-th well (0-based); the 30 seed wells keep their `Well-NN` names."""
+    return f"Well-{index + 1:02d}" if index < 30 else f"Well-{index + 1:06d}"
+
+
+def synthetic_well_id(index: int) -> str:
+    return str(uuid.UUID(int=(0xB << 124) | index))
+
+
+# --- Dataset ---
+
+class FakeDataset:
+    def __init__(self, wells: int = 100_000, faults: int = 10_000_000, seed_path: str = MOCK_DATA_SQL):
+        seed = load_seed(seed_path)
+        self.parts = seed["parts"]
+        self.inventory = seed["inventory"]
+        self.warehouses = load_warehouses()
+        self.seed_faults = seed["faults"]
+        self.wells = list(seed["wells"])
+        seed_well_count = len(self.wells)
+        for index in range(seed_well_count, wells):
+            template = seed["wells"][index % seed_well_count]
+            self.wells.append({
+                **template,
+                "id": synthetic_well_id(index),
+                "name": synthetic_well_name(index),
+                "latitude": round(template["latitude"] + (index % 97) * 0.001, 4),
+                "longitude": round(template["longitude"] - (index % 89) * 0.001, 4),
+                "status": "Fault" if index % 10 == 3 else "Operational",
+                "last_updated": SEED_LAST_UPDATED,
+            })
+        self.well_index = {row["id"]: i for i, row in enumerate(self.wells)}
+        self.seed_faults_by_well: dict[str, list[dict]] = defaultdict(list)
+        for row in self.seed_faults:
+            self.seed_faults_by_well[row["well_id"]].append(row)
+        for rows in self.seed_faults_by_well.values():
+            rows.sort(key=lambda r: (r["timestamp"], r["fault_id"]), reverse=True)
+        synthetic_wells = max(len(self.wells) - seed_well_count, 1)
+        self.faults_per_well = max((faults - len(self.seed_faults)) // synthetic_wells, 0)
+        self.fault_interval = timedelta(days=FAULT_HISTORY_DAYS) / max(self.faults_per_well, 1)
+        # Every synthetic well shares the same timestamp grid, newest first
+        self.fault_timestamps = [
+            (FAULT_HISTORY_END - j * self.fault_interval).replace(microsecond=0).isoformat()
+            for j in range(self.faults_per_well)
+        ]
+        embedder = HashingEmbedder()
+        self.fault_vectors = np.asarray(
+            [embedder.embed_one(fault_document(row)) for row in self.seed_faults],
+            dtype=np.float32,
+        )
+        self.fault_embeddings = [
+            # PostgREST returns pgvector values as text
+            {"id": i + 1, "fault_id": row["fault_id"], "embedding": json.dumps([round(float(v), 6) for v in vector])}
+            for i, (row, vector) in enumerate(zip(self.seed_faults, self.fault_vectors))
+        ]
+        self.tables = {
+            "wells": self.wells, "parts": self.parts, "inventory": self.inventory, "warehouses": self.warehouses,
+            "fault_embeddings": self.fault_embeddings,
+        }
+        self._sorted_cache: dict[tuple, tuple[list[dict], list[Any]]] = {}
+        self._indexes = {
+            ("wells", "id"): self._index(self.wells, "id"),
+            ("parts", "part_id"): self._index(self.parts, "part_id"),
+            ("inventory", "part_id"): self._index(self.inventory, "part_id"),
+        }
+        self.fault_summary = self._build_fault_summary()
+
+    @staticmethod
+    def _index(rows: list[dict], column: str) -> dict[Any, list[dict]]:
+        index: dict[Any, list[dict]] = defaultdict(list)
+        for row in rows:
+            index[row[column]].append(row)
+        return index
+
+    @property
+    def fault_count(self) -> int:
+        return len(self.seed_faults) + self.faults_per_well * (len(self.wells) - len(self.seed_faults_by_well))
+
+    def faults_for_well(self, well_id: str) -> Iterator[dict]:
+        """The well's faults, newest first."""
+        if well_id in self.seed_faults_by_well:
+            yield from self.seed_faults_by_well[well_id]
+            return
+        index = self.well_index.get(well_id)
+        if index is None:
+            return
+        templates = self.seed_faults
+        prefix = f"c0000000-0000-0000-{index >> 16:04x}-{index & 0xFFFF:04x}"
+        for j, timestamp in enumerate(self.fault_timestamps):
+            template = templates[(index * 7 + j) % len(templates)]
+            yield {
+                "fault_id": f"{prefix}{j:08x}",
+                "well_id": well_id,
+                "part_id": template["part_id"],
+                "fault_type": template["fault_type"],
+                "description": template["description"],
+                "timestamp": timestamp,
+                "last_updated": SEED_LAST_UPDATED,
+            }
+
+    def faults_by_id(self, after: str | None = None) -> Iterator[dict]:
+        """Every fault in fault_id order, after `after`: synthetic ids ("c...") sort before the seed ids ("f...")."""
+        start_index, start_j = 0, 0
+        if after and after.startswith("c0000000"):
+            parts = after.split("-")
+            start_index = int(parts[3], 16) << 16 | int(parts[4][:4], 16)
+            start_j = int(parts[4][4:], 16) + 1
+        if after is None or after.startswith("c0000000"):
+            for index in range(start_index, len(self.wells)):
+                well_id = self.wells[index]["id"]
+                if well_id not in self.seed_faults_by_well:
+                    yield from itertools.islice(self.faults_for_well(well_id), start_j if index == start_index else 0, None)
+        for row in sorted(self.seed_faults, key=lambda r: r["fault_id"]):
+            if after is None or row["fault_id"] > after:
+                yield row
+
+    def _build_fault_summary(self) -> dict[tuple, int]:
+        """Daily counts per (day, camp, formation, fault_type, part_id), without generating every fault."""
+        summary: dict[tuple, int] = defaultdict(int)
+        wells_by_id = {row["id"]: row for row in self.wells}
+        for row in self.seed_faults:
+            well = wells_by_id.get(row["well_id"], {})
+            summary[(row["timestamp"][:10], well.get("camp"), well.get("formation"), row["fault_type"], row["part_id"])] += 1
+        # A synthetic well's j-th fault uses template (index * 7 + j) % T, so wells only differ by that offset
+        classes: dict[tuple, int] = defaultdict(int)
+        for index, well in enumerate(self.wells):
+            if well["id"] not in self.seed_faults_by_well:
+                classes[(well["camp"], well["formation"], (index * 7) % len(self.seed_faults))] += 1
+        for j in range(self.faults_per_well):
+            day = (FAULT_HISTORY_END - j * self.fault_interval).date().isoformat()
+            for (camp, formation, offset), wells in classes.items():
+                template = self.seed_faults[(offset + j) % len(self.seed_faults)]
+                summary[(day, camp, formation, template["fault_type"], template["part_id"])] += wells
+        return summary
+
+    def sorted_rows(self, table: str, rows: list[dict], order: list[tuple[str, bool]]) -> tuple[list[dict], list[Any]]:
+        """Rows sorted by `order`, plus the first sort column's values for bisecting (cached per table)."""
+        key = (table, tuple(order))
+        cached = self._sorted_cache.get(key)
+        if cached is None:
+            ordered = rows
+            for column, desc in reversed(order):
+                ordered = sorted(ordered, key=lambda r: _sort_key(r.get(column)), reverse=desc)
+            cached = self._sorted_cache[key] = (ordered, [_sort_key(r.get(order[0][0])) for r in ordered])
+        return cached
+
+
+def _sort_key(value: Any) -> tuple:
+    # NULLs sort last, as in Postgres ascending order
+    return (value is None, value if value is not None else 0)
+
+
+# --- PostgREST filter grammar ---
+
+OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "is")
+NEWEST_FAULTS_FIRST = [("timestamp", True), ("fault_id", True)]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quoted and ch == "\\":
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def parse_condition(column: str, expression: str):
+    """`("status", "eq.Fault")` -> (column, negate, operator, value)."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, value = expression.partition(".")
+    if operator not in OPERATORS:
+        raise ValueError(f"Unsupported operator '{operator}'")
+    if operator == "in":
+        value = frozenset(_unquote(v) for v in _split_top_level(value.strip("()")))
+    else:
+        value = _unquote(value)
+    return ("cond", column, negate, operator, value)
+
+
+def parse_logic(kind: str, body: str):
+    """`("or", "(a.eq.1,and(b.gt.2,c.lt.3))")` -> a nested ("or", [...]) tree."""
+    items = []
+    for part in _split_top_level(body[1:-1]):
+        if part.startswith(("and(", "or(")):
+            sub_kind, _, rest = part.partition("(")
+            items.append(parse_logic(sub_kind, "(" + rest))
+        else:
+            column, _, expression = part.partition(".")
+            items.append(parse_condition(column, expression))
+    return (kind, items)
+
+
+def _coerce(value: str, sample: Any, column: str) -> Any:
+    if column in TIMESTAMP_COLUMNS:
+        return _normalize_timestamp(value)
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        return int(value)
+    if isinstance(sample, float):
+        return float(value)
+    return value
+
+
+def _lower_bound(node, column: str) -> tuple[str, str] | None:
+    """
+    ("gt" | "gte", value) when `node` implies `column >= value`, e.g. `name.gt.X` or the keyset filter
+    `or(name.gt.X,and(name.eq.X,id.gt.Y))`; None otherwise.
+    """
+    if node[0] == "cond":
+        _, c, negate, operator, value = node
+        if c == column and not negate and operator in ("gt", "gte", "eq"):
+            return ("gt" if operator == "gt" else "gte", value)
+        return None
+    bounds = [_lower_bound(n, column) for n in node[1]]
+    if node[0] == "and":
+        return next((b for b in bounds if b is not None), None)
+    # Every branch of an `or` must be bounded by the same value
+    if bounds and all(b is not None and b[1] == bounds[0][1] for b in bounds):
+        return ("gt" if all(b[0] == "gt" for b in bounds) else "gte", bounds[0][1])
+    return None
+
+
+def matches(row: dict, node) -> bool:
+    if node[0] == "and":
+        return all(matches(row, n) for n in node[1])
+    if node[0] == "or":
+        return any(matches(row, n) for n in node[1])
+    _, column, negate, operator, value = node
+    actual = row.get(column)
+    if operator == "is":
+        result = actual is None if value == "null" else actual == (value == "true")
+    elif actual is None:
+        result = False
+    elif operator == "in":
+        result = (actual if isinstance(actual, str) else str(actual)) in value
+    else:
+        expected = _coerce(value, actual, column)
+        result = {
+            "eq": actual == expected, "neq": actual != expected,
+            "gt": actual > expected, "gte": actual >= expected,
+            "lt": actual < expected, "lte": actual <= expected,
+        }[operator]
+    return result != negate
+
+
+# --- HTTP ---
+
+class FakePostgrest:
+    def __init__(self, dataset: FakeDataset, latency_ms: float = 0.0, search_latency_ms: float = 0.0):
+        self.data = dataset
+        self.latency = latency_ms / 1000
+        self.search_latency = search_latency_ms / 1000
+        self.embedded_fault_ids = {row["fault_id"] for row in dataset.fault_embeddings}
+        self.requests = 0
+
+    def _candidates(self, table: str, conditions: list, order: list[tuple[str, bool]]) -> Iterable[dict]:
+        """Narrow the scan with an index or the per-well fault generator when a filter allows it."""
+        if table == "faults":
+            for _, column, negate, operator, value in conditions:
+                if column == "well_id" and not negate and operator in ("eq", "in"):
+                    well_ids = [value] if operator == "eq" else value
+                    histories = [self.data.faults_for_well(well_id) for well_id in well_ids]
+                    if order in (NEWEST_FAULTS_FIRST, NEWEST_FAULTS_FIRST[:1]):
+                        # Each history is already newest first: merge lazily so LIMIT stops generation early
+                        return heapq.merge(*histories, key=lambda r: (r["timestamp"], r["fault_id"]), reverse=True)
+                    return [row for history in histories for row in history]
+            # Unbounded fault scans would walk millions of generated rows; serve the seed faults instead
+            return self.data.seed_faults
+        for _, column, negate, operator, value in conditions:
+            index = self.data._indexes.get((table, column))
+            if index is not None and not negate and operator in ("eq", "in"):
+                keys = [value] if operator == "eq" else value
+                return [row for key in keys for row in index.get(key, ())]
+        return self.data.tables[table]
+
+    def select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        columns, order, limit, offset = "*", [], None, 0
+        conditions, logic = [], []
+        for name, value in params:
+            if name == "select":
+                columns = value
+            elif name == "order":
+                for part in value.split(","):
+                    column, _, direction = part.partition(".")
+                    order.append((column, direction.startswith("desc")))
+            elif name == "limit":
+                limit = int(value)
+            elif name == "offset":
+                offset = int(value)
+            elif name in ("or", "and"):
+                logic.append(parse_logic(name, value))
+            else:
+                conditions.append(parse_condition(name, value))
+        if table not in self.data.tables and table != "faults":
+            raise LookupError(table)
+
+        rows: Iterable[dict] = self._candidates(table, conditions, order)
+        start = 0
+        if order and isinstance(rows, list) and rows is self.data.tables.get(table):
+            rows, keys = self.data.sorted_rows(table, rows, order)
+            column, desc = order[0]
+            # Jump past rows a lower bound on the leading ascending sort column excludes (keyset paging)
+            for node in conditions + logic:
+                bound = _lower_bound(node, column)
+                if bound is not None and not desc and rows:
+                    operator, value = bound
+                    key = _sort_key(_coerce(value, rows[0].get(column), column))
+                    start = max(start, (bisect.bisect_right if operator == "gt" else bisect.bisect_left)(keys, key))
+        elif order and isinstance(rows, list):
+            rows = list(rows)
+            for column, desc in reversed(order):
+                rows.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+
+        nodes = conditions + logic
+        wanted = None if limit is None else offset + limit
+        scan = (rows[i] for i in range(start, len(rows))) if isinstance(rows, list) else rows
+        result = []
+        for row in scan:
+            if all(matches(row, n) for n in nodes):
+                result.append(row)
+                if wanted is not None and len(result) >= wanted:
+                    break
+        result = result[offset:]
+        if columns != "*":
+            fields = [c.strip() for c in columns.split(",")]
+            result = [{f: row.get(f) for f in fields} for row in result]
+        return result
+
+    def get_fault_summary(self, args: dict) -> list[dict]:
+        group_by = set(args.get("group_by") or [])
+        bucket = args.get("time_bucket")
+        since, until = args.get("since"), args.get("until")
+        filters = {k: args.get(f"filter_{k}") for k in ("camp", "formation", "fault_type", "part_id")}
+        totals: dict[tuple, int] = defaultdict(int)
+        for (day, camp, formation, fault_type, part_id), count in self.data.fault_summary.items():
+            values = {"camp": camp, "formation": formation, "fault_type": fault_type, "part_id": part_id}
+            if (since and day < since) or (until and day >= until):
+                continue
+            if any(v is not None and values[k] != v for k, v in filters.items()):
+                continue
+            totals[(_bucket_start(day, bucket), *(values[k] if k in group_by else None for k in values))] += count
+        rows = [
+            {"bucket_start": k[0], "camp": k[1], "formation": k[2], "fault_type": k[3], "part_id": k[4], "fault_count": v}
+            for k, v in totals.items()
+        ]
+        rows.sort(key=lambda r: (-r["fault_count"], *(str(r[k]) for k in ("bucket_start", "camp", "formation", "fault_type", "part_id"))))
+        return rows[: int(args.get("max_rows") or 50)]
+
+    def get_faults_for_wells(self, args: dict) -> list[dict]:
+        """The newest `limit_per_well` matching faults of each well, like the windowed RPC."""
+        since, until = _normalize_timestamp(args.get("since")), _normalize_timestamp(args.get("until"))
+        limit = int(args.get("limit_per_well") or 50)
+        rows = []
+        for well_id in args.get("well_ids") or []:
+            matching = (
+                row for row in self.data.faults_for_well(well_id)
+                if (not since or row["timestamp"] >= since) and (not until or row["timestamp"] < until)
+                and args.get("filter_fault_type") in (None, row["fault_type"])
+                and args.get("filter_part_id") in (None, row["part_id"])
+            )
+            rows.extend({k: row[k] for k in FAULT_RPC_COLUMNS} for row in itertools.islice(matching, limit))
+        return rows
+
+    def search_faults(self, args: dict) -> list[dict]:
+        """Cosine similarity against the seed fault embeddings, like the pgvector RPC."""
+        query = np.asarray(args["query_embedding"], dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or not len(self.data.fault_vectors):
+            return []
+        scores = self.data.fault_vectors @ (query / norm)
+        order = [i for i in np.argsort(-scores) if scores[i] > float(args["similarity_threshold"])]
+        return [
+            {**{k: self.data.seed_faults[i][k] for k in ("fault_id", "well_id", "part_id", "timestamp", "fault_type")},
+             "similarity": float(scores[i])}
+            for i in order[: int(args["match_count"])]
+        ]
+
+    def faults_without_embeddings(self, args: dict) -> list[dict]:
+        missing = (row for row in self.data.faults_by_id(args.get("after_fault_id")) if row["fault_id"] not in self.embedded_fault_ids)
+        return [
+            {"fault_id": row["fault_id"], "fault_type": row["fault_type"], "description": row["description"]}
+            for row in itertools.islice(missing, int(args.get("max_rows") or 1000))
+        ]
+
+    async def insert(self, request: Request) -> Response:
+        if request.path_params["table"] != "fault_embeddings":
+            return JSONResponse({"code": "42501", "message": "Only fault_embeddings accepts inserts"}, status_code=403)
+        rows = await request.json()
+        rows = rows if isinstance(rows, list) else [rows]
+        for row in rows:
+            if isinstance(row["embedding"], str):
+                json.loads(row["embedding"]) # Parse the vector text like Postgres would
+            self.embedded_fault_ids.add(row["fault_id"])
+        if "return=minimal" in request.headers.get("prefer", ""):
+            return Response(status_code=201)
+        return JSONResponse(rows, status_code=201)
+
+    async def table(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.method == "POST":
+            return await self.insert(request)
+        try:
+            rows = self.select(request.path_params["table"], list(request.query_params.multi_items()))
+        except LookupError as e:
+            return JSONResponse({"code": "42P01", "message": f'relation "{e}" does not exist'}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"code": "PGRST100", "message": str(e)}, status_code=400)
+        # `Prefer: count=...` asks for the total after the slash
+        total = len(rows) if "count=" in request.headers.get("prefer", "") else "*"
+        headers = {"Content-Range": f"0-{max(len(rows) - 1, 0)}/{total}"}
+        if request.method == "HEAD":
+            return Response(status_code=200, headers=headers, media_type="application/json")
+        return JSONResponse(rows, headers=headers)
+
+    async def rpc(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        function = request.path_params["function"]
+        if function == "get_fault_summary":
+            return JSONResponse(self.get_fault_summary(await request.json()))
+        if function == "get_faults_for_wells":
+            return JSONResponse(self.get_faults_for_wells(await request.json()))
+        if function == "faults_without_embeddings":
+            return JSONResponse(self.faults_without_embeddings(await request.json()))
+        if function == "search_faults":
+            if self.search_latency:
+                await asyncio.sleep(self.search_latency)
+            return JSONResponse(self.search_faults(await request.json()))
+        return JSONResponse({"code": "PGRST202", "message": f"Could not find the function {function}"}, status_code=404)
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/rest/v1/rpc/{function}", self.rpc, methods=["POST"]),
+            Route("/rest/v1/{table}", self.table, methods=["GET", "HEAD", "POST"]),
+        ])
+
+
+def _bucket_start(day: str, bucket: str | None) -> str | None:
+    if not bucket:
+        return None
+    d = date.fromisoformat(day)
+    if bucket == "week":
+        d -= timedelta(days=d.weekday())
+    elif bucket == "month":
+        d = d.replace(day=1)
+    return d.isoformat()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54329)
+    parser.add_argument("--wells", type=int, default=100_000)
+    parser.add_argument("--faults", type=int, default=10_000_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--search-latency-ms", type=float, default=0.0, help="Extra delay for the search_faults RPC")
+    args = parser.parse_args()
+
+    dataset = FakeDataset(wells=args.wells, faults=args.faults)
+    print(
+        json.dumps({"wells": len(dataset.wells), "parts": len(dataset.parts), "inventory": len(dataset.inventory),
+                    "faults": dataset.fault_count}),
+        flush=True,
+    )
+    uvicorn.run(FakePostgrest(dataset, args.latency_ms, args.search_latency_ms).app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
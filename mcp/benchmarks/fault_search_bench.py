@@ -0,0 +1,59 @@
+"""
+Cost of the pieces behind `search_similar_faults`: a query embedding from the cache vs. computed, and a
+top-k query against the in-process `VectorIndex` at `--faults` stored embeddings.
+
+Vectors are random (the index cost does not depend on their content) and the embedder is the local
+`HashingEmbedder`, so a real embed call (a network round-trip to the model) costs far more than shown.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.fault_search_bench --faults 50000
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from wellsync_data.fault_search import EMBEDDING_DIMENSIONS, EmbeddingCache, HashingEmbedder, VectorIndex, normalize_query
+
+
+def _time(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faults", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.faults, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    index = VectorIndex(loader=None, max_rows=args.faults)
+    started = time.perf_counter()
+    index.load([f"fault-{i}" for i in range(args.faults)], embeddings)
+    print(f"{args.faults} embeddings, {index._data.matrix.nbytes / 2**20:.0f} MiB, loaded in {time.perf_counter() - started:.2f}s")
+
+    embedder = HashingEmbedder()
+    cache = EmbeddingCache()
+    text = "Centrifugal pump bearing failure after sand ingress"
+    asyncio.run(cache.embed_query(embedder, text))
+    key = (embedder.model, "search_query", normalize_query(text))
+    query = rng.standard_normal(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    cases = [
+        ("query embedding, computed", lambda: embedder.embed_one(text)),
+        ("query embedding, cached", lambda: cache.get(key)),
+        (f"index top-{args.limit}", lambda: index.search(query, args.limit, -1.0)),
+    ]
+    for label, fn in cases:
+        print(f"{label:>28}: {_time(fn, args.repeat) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
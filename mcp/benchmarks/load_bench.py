@@ -0,0 +1,311 @@
+"""
+End-to-end load test for the wellsync MCP server, with no Supabase or Next.js needed.
+
+Starts three processes from the `mcp/` directory:
+  * `benchmarks.fake_postgrest`, seeded from `supabase/mock_data.sql` and scaled to `--wells`/`--faults`
+  * `benchmarks.stub_nextjs`, answering `/api/orders` and `/api/dispatches` after `--nextjs-latency-ms`
+  * `wellsync.py` itself, pointed at both
+
+then opens `--sessions` concurrent, authenticated SSE sessions and replays a weighted mix of tool calls
+(see `TOOL_MIX`) for `--duration` seconds after a `--warmup` period. It reports calls, errors, calls/s
+and p50/p99 latency per tool. `--save` writes the results as JSON; `--baseline` compares against a
+saved run and exits non-zero when any tool's p99 regressed by more than `--max-regression`.
+
+Pass `--target http://host:port` to drive an already running server instead of starting one.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.load_bench --sessions 50 --duration 30
+    python -m benchmarks.load_bench --sessions 50 --duration 30 --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from benchmarks.fake_postgrest import load_seed, synthetic_well_name
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Workload ---
+
+class Workload:
+    """Builds realistic arguments from the same seed the fake PostgREST serves."""
+
+    def __init__(self, wells: int):
+        seed = load_seed()
+        self.wells = wells
+        self.part_ids = [row["part_id"] for row in seed["parts"]]
+        self.warehouses = sorted({row["warehouse_id"] for row in seed["inventory"]})
+        self.fault_descriptions = sorted({row["description"] for row in seed["faults"]})
+
+    def well(self) -> str:
+        return synthetic_well_name(random.randrange(self.wells))
+
+    def part(self) -> str:
+        return random.choice(self.part_ids)
+
+
+# (name, weight, arguments); writes are a small share of traffic, as in production
+TOOL_MIX: list[tuple[str, int, Callable[[Workload], dict[str, Any]]]] = [
+    ("get_wells", 25, lambda w: {"status": random.choice(["fault", "operational", "all"]), "limit": 50}),
+    ("get_faults_by_well", 25, lambda w: {"well_identifier": w.well(), "limit": 20}),
+    ("get_part_inventory", 15, lambda w: {"part_id": w.part()}),
+    ("get_fault_summary", 10, lambda w: {"group_by": [random.choice(["formation", "camp", "fault_type"])], "time_bucket": "month"}),
+    ("get_faults_for_wells", 5, lambda w: {"well_identifiers": [w.well() for _ in range(10)], "limit_per_well": 5}),
+    ("get_inventory_for_parts", 5, lambda w: {"part_ids": random.sample(w.part_ids, 5)}),
+    ("search_similar_faults", 5, lambda w: {"query": random.choice(w.fault_descriptions), "limit": 5}),
+    ("order_part", 5, lambda w: {"part_id": w.part(), "quantity": 1, "destination_well_id": w.well()}),
+    ("dispatch_part", 5, lambda w: {
+        "part_id": w.part(), "quantity": 1, "source_warehouse_id": random.choice(w.warehouses), "destination_well_id": w.well()
+    }),
+    ("find_best_source", 5, lambda w: {"part_id": w.part(), "destination_well_id": w.well(), "quantity": 1}),
+    ("resource:wellsync://parts", 5, lambda w: {}),
+]
+
+
+def auth_header(secret: str) -> str:
+    """The base64 JSON header `AuthorizationMiddleware` expects."""
+    tokens = {"auth_token": None, "connector_access_tokens": {}, "server_secret": secret}
+    return base64.b64encode(json.dumps(tokens).encode()).decode()
+
+
+def _is_error(result: Any) -> bool:
+    if getattr(result, "isError", False):
+        return True
+    contents = getattr(result, "content", None) or getattr(result, "contents", None) or []
+    return any(getattr(c, "text", "").startswith(('{"status":"error"', '{"status": "error"')) for c in contents)
+
+
+async def _session(
+    url: str,
+    secret: str,
+    workload: Workload,
+    measure_from: float,
+    deadline: float,
+    samples: dict[str, list[float]],
+    errors: dict[str, int],
+    think_s: float,
+) -> None:
+    names = [name for name, _, _ in TOOL_MIX]
+    weights = [weight for _, weight, _ in TOOL_MIX]
+    builders = {name: build for name, _, build in TOOL_MIX}
+    async with sse_client(f"{url}/sse", headers={"Authorization": auth_header(secret)}, timeout=30) as streams:
+        async with ClientSession(*streams) as session:
+            await session.initialize()
+            while time.perf_counter() < deadline:
+                name = random.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    if name.startswith("resource:"):
+                        result = await session.read_resource(name.removeprefix("resource:"))
+                    else:
+                        result = await session.call_tool(name, builders[name](workload))
+                    failed = _is_error(result)
+                except Exception:
+                    failed = True
+                finished = time.perf_counter()
+                if started >= measure_from:
+                    samples[name].append(finished - started)
+                    if failed:
+                        errors[name] += 1
+                if think_s:
+                    await asyncio.sleep(random.uniform(0, 2 * think_s))
+
+
+async def drive(url: str, secret: str, sessions: int, duration: float, warmup: float, wells: int, think_ms: float) -> dict:
+    workload = Workload(wells)
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+    results = await asyncio.gather(
+        *(_session(url, secret, workload, measure_from, deadline, samples, errors, think_ms / 1000) for _ in range(sessions)),
+        return_exceptions=True,
+    )
+    failed_sessions = [r for r in results if isinstance(r, BaseException)]
+    for failure in failed_sessions[:3]:
+        print(f"session failed: {failure!r}", file=sys.stderr)
+    elapsed = time.perf_counter() - measure_from
+    return summarize(samples, errors, elapsed, sessions, len(failed_sessions))
+
+
+# --- Reporting ---
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float, sessions: int, failed_sessions: int) -> dict:
+    tools = {}
+    everything: list[float] = []
+    for name, latencies in sorted(samples.items()):
+        latencies.sort()
+        everything.extend(latencies)
+        tools[name] = {
+            "calls": len(latencies),
+            "errors": errors.get(name, 0),
+            "calls_per_second": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    everything.sort()
+    return {
+        "sessions": sessions,
+        "failed_sessions": failed_sessions,
+        "seconds": round(elapsed, 2),
+        "total": {
+            "calls": len(everything),
+            "errors": sum(errors.values()),
+            "calls_per_second": round(len(everything) / elapsed, 2),
+            "p50_ms": round(percentile(everything, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(everything, 0.99) * 1000, 2),
+        },
+        "tools": tools,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{report['sessions']} sessions ({report['failed_sessions']} failed), {report['seconds']}s measured\n")
+    print(f"{'tool':<28}{'calls':>8}{'errors':>8}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in report["tools"].items():
+        print(
+            f"{name:<28}{row['calls']:>8}{row['errors']:>8}{row['calls_per_second']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    total = report["total"]
+    print(
+        f"{'TOTAL':<28}{total['calls']:>8}{total['errors']:>8}{total['calls_per_second']:>10.1f}"
+        f"{total['p50_ms']:>10.1f}{total['p99_ms']:>10.1f}"
+    )
+
+
+def regressions(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Tools whose p99 grew by more than `max_regression` (a fraction) over the baseline."""
+    found = []
+    for name, row in report["tools"].items():
+        before = baseline.get("tools", {}).get(name)
+        if before and before["p99_ms"] > 0 and row["p99_ms"] > before["p99_ms"] * (1 + max_regression):
+            found.append(f"{name}: p99 {before['p99_ms']:.1f} ms -> {row['p99_ms']:.1f} ms")
+    return found
+
+
+# --- Processes ---
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{' '.join(proc.args)} exited early with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Port {port} did not open within {timeout}s")
+
+
+@contextmanager
+def _process(args: list[str], port: int, env: dict[str, str] | None = None, timeout: float = 120.0):
+    proc = subprocess.Popen([sys.executable, *args], cwd=MCP_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port, proc, timeout)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of traffic excluded from the results")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a session's calls")
+    parser.add_argument("--wells", type=int, default=100_000)
+    parser.add_argument("--faults", type=int, default=10_000_000)
+    parser.add_argument("--postgrest-latency-ms", type=float, default=2.0)
+    parser.add_argument("--nextjs-latency-ms", type=float, default=50.0)
+    parser.add_argument("--nextjs-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--target", help="URL of an already running server; nothing is started")
+    parser.add_argument("--secret", default="wellsync-bench-secret")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p99 growth vs the baseline")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        url = args.target
+        if url is None:
+            postgrest_port, nextjs_port, mcp_port = _free_port(), _free_port(), _free_port()
+            stack.enter_context(_process(
+                ["-m", "benchmarks.fake_postgrest", "--port", str(postgrest_port), "--wells", str(args.wells),
+                 "--faults", str(args.faults), "--latency-ms", str(args.postgrest_latency_ms)],
+                postgrest_port,
+            ))
+            stack.enter_context(_process(
+                ["-m", "benchmarks.stub_nextjs", "--port", str(nextjs_port), "--latency-ms", str(args.nextjs_latency_ms),
+                 "--jitter-ms", str(args.nextjs_jitter_ms)],
+                nextjs_port,
+            ))
+            env = dict(os.environ)
+            env.update(
+                SUPABASE_URL=f"http://127.0.0.1:{postgrest_port}",
+                SUPABASE_KEY="benchmark-key",
+                NEXTJS_APP_URL=f"http://127.0.0.1:{nextjs_port}",
+                MCP_PORT=str(mcp_port),
+                AUTH_SECRET=args.secret,
+                FAULT_EMBEDDER="local", # Matches the fake's HashingEmbedder vectors
+                CHANGE_FEED="poll", # The fake PostgREST has no Realtime endpoint
+                LOG_LEVEL=env.get("LOG_LEVEL", "WARNING"),
+                FASTMCP_LOG_LEVEL=env.get("FASTMCP_LOG_LEVEL", "WARNING"),
+            )
+            stack.enter_context(_process(["wellsync.py"], mcp_port, env=env))
+            url = f"http://127.0.0.1:{mcp_port}"
+
+        report = asyncio.run(drive(url, args.secret, args.sessions, args.duration, args.warmup, args.wells, args.think_ms))
+
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.max_regression)
+        if found:
+            print("\np99 regressions over the baseline:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print(f"\nNo p99 regression over {args.max_regression:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
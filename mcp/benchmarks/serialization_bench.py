@@ -0,0 +1,51 @@
+"""
+Response size and encode time of a large well listing, per result format and JSON encoder.
+
+Builds `--wells` rows from the `mock_data.sql` seed (see `benchmarks.fake_postgrest`) and encodes the
+`get_wells` response envelope as records with the stdlib `json` module (the previous behaviour), as
+records with `serialization.dumps` and as `format="columnar"` with `serialization.dumps`.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.serialization_bench --wells 5000
+"""
+
+import argparse
+import json
+import time
+
+import pydantic_core
+
+from benchmarks.fake_postgrest import FakeDataset
+from custom_mcp_tools.serialization import dumps, orjson, to_columnar
+
+
+def _time(fn, repeat: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - started) / repeat, len(out.encode())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wells", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = FakeDataset(wells=args.wells, faults=0).wells
+    records = {"status": "success", "data": rows, "count": len(rows)}
+    columnar = {**records, "data": to_columnar(rows)}
+    cases = [
+        ("records, json (before)", lambda: json.dumps(pydantic_core.to_jsonable_python(records))),
+        (f"records, {'orjson' if orjson else 'json'}", lambda: dumps(records)),
+        (f"columnar, {'orjson' if orjson else 'json'}", lambda: dumps(columnar)),
+    ]
+    print(f"{len(rows)} wells")
+    for label, fn in cases:
+        seconds, size = _time(fn, args.repeat)
+        print(f"{label:>24}: {size / 1024:8.1f} KiB | encode {seconds * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
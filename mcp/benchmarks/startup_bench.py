@@ -0,0 +1,88 @@
+"""
+Import-time and cold-start benchmark for the wellsync MCP server.
+
+Measures, in fresh interpreter processes:
+  * import: how long `import wellsync` takes
+  * cold start: time from spawning `python wellsync.py` until the SSE port accepts TCP connections
+
+By default SUPABASE_URL points at a non-routable address, so any code that waits on Supabase before
+the port opens shows up as a multi-second cold start.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.startup_bench --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env(supabase_url: str, port: int) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        SUPABASE_URL=supabase_url,
+        SUPABASE_KEY=env.get("SUPABASE_KEY", "benchmark-key"),
+        MCP_PORT=str(port),
+        PYTHONPATH=MCP_DIR,
+    )
+    return env
+
+
+def measure_import(env: dict[str, str]) -> float:
+    code = "import time; t = time.perf_counter(); import wellsync; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=MCP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_cold_start(env: dict[str, str], port: int, timeout: float) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "wellsync.py"], cwd=MCP_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited early with code {proc.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"Port {port} did not open within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:>10}: median {statistics.median(samples) * 1000:8.1f} ms | "
+        f"min {min(samples) * 1000:8.1f} ms | max {max(samples) * 1000:8.1f} ms ({len(samples)} runs)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=3013)
+    parser.add_argument("--supabase-url", default="http://10.255.255.1:54321")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    env = _env(args.supabase_url, args.port)
+    _report("import", [measure_import(env) for _ in range(args.runs)])
+    _report("cold start", [measure_cold_start(env, args.port, args.timeout) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Stub of the Next.js `/api/orders` and `/api/dispatches` endpoints for load tests.
+
+Each request waits `--latency-ms` (plus up to `--jitter-ms` of uniform jitter) and answers like the real
+routes: 200 with a confirmation message, or, for a `--error-rate` fraction of dispatches, the 400
+"Insufficient stock" error the dispatch route returns.
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.stub_nextjs --port 3099 --latency-ms 50 --jitter-ms 20
+"""
+
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class StubNextjs:
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.orders = 0
+        self.dispatches = 0
+
+    async def _delay(self) -> None:
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def orders_endpoint(self, request: Request) -> JSONResponse:
+        payload = await request.json()
+        await self._delay()
+        self.orders += 1
+        return JSONResponse({"message": f"Order placed for {payload.get('quantity')} x {payload.get('part_id')}."})
+
+    async def dispatches_endpoint(self, request: Request) -> JSONResponse:
+        payload = await request.json()
+        await self._delay()
+        if random.random() < self.error_rate:
+            return JSONResponse(
+                {"error": f"Insufficient stock for part {payload.get('part_id')} in warehouse {payload.get('source_warehouse_id')}."},
+                status_code=400,
+            )
+        self.dispatches += 1
+        return JSONResponse({"message": f"Dispatched {payload.get('quantity')} x {payload.get('part_id')}."})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/api/orders", self.orders_endpoint, methods=["POST"]),
+            Route("/api/dispatches", self.dispatches_endpoint, methods=["POST"]),
+        ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3099)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubNextjs(args.latency_ms, args.jitter_ms, args.error_rate)
+    uvicorn.run(stub.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Throughput of the stateless `POST /mcp` transport as the number of uvicorn workers grows.
+
+Starts `benchmarks.fake_postgrest` and `benchmarks.stub_nextjs` once, then for each value of `--workers`
+starts `wellsync.py` with `MCP_WORKERS` set to it and keeps `--clients` concurrent HTTP clients replaying
+the `load_bench.TOOL_MIX` mix as `tools/call` / `resources/read` requests for `--duration` seconds. Every
+request is independent, so the kernel spreads connections over the workers with no sticky routing.
+Reports calls/s and p50/p99 per worker count; throughput should grow with the workers up to the number
+of free cores (the fake backends share the same machine).
+
+Run from the `mcp/` directory:
+
+    python -m benchmarks.workers_bench --workers 1 2 4 --clients 64 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from contextlib import ExitStack
+from itertools import count
+
+import httpx
+
+from benchmarks.load_bench import (
+    TOOL_MIX,
+    Workload,
+    _free_port,
+    _process,
+    auth_header,
+    percentile,
+)
+
+
+def _is_error(reply: dict) -> bool:
+    if "error" in reply:
+        return True
+    result = reply["result"]
+    contents = result.get("content") or result.get("contents") or []
+    return result.get("isError", False) or any(c.get("text", "").startswith('{"status":"error"') for c in contents)
+
+
+async def _client(
+    http: httpx.AsyncClient,
+    workload: Workload,
+    ids: count,
+    measure_from: float,
+    deadline: float,
+    latencies: list[float],
+    errors: list[int],
+) -> None:
+    names = [name for name, _, _ in TOOL_MIX]
+    weights = [weight for _, weight, _ in TOOL_MIX]
+    builders = {name: build for name, _, build in TOOL_MIX}
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        if name.startswith("resource:"):
+            message = {"method": "resources/read", "params": {"uri": name.removeprefix("resource:")}}
+        else:
+            message = {"method": "tools/call", "params": {"name": name, "arguments": builders[name](workload)}}
+        started = time.perf_counter()
+        try:
+            response = await http.post("/mcp", json={"jsonrpc": "2.0", "id": next(ids), **message})
+            failed = response.status_code != 200 or _is_error(response.json())
+        except httpx.HTTPError:
+            failed = True
+        finished = time.perf_counter()
+        if started >= measure_from:
+            latencies.append(finished - started)
+            errors[0] += failed
+
+
+async def drive(url: str, secret: str, clients: int, duration: float, warmup: float, wells: int) -> dict:
+    workload = Workload(wells)
+    latencies: list[float] = []
+    errors = [0]
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=url, headers={"Authorization": auth_header(secret)}, limits=limits, timeout=60
+    ) as http:
+        # Every worker answers initialize the same way; this only checks the endpoint is up
+        await http.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {
+            "protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "workers_bench", "version": "1"},
+        }})
+        started = time.perf_counter()
+        measure_from = started + warmup
+        deadline = measure_from + duration
+        ids = count(1)
+        await asyncio.gather(*(_client(http, workload, ids, measure_from, deadline, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - measure_from
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "errors": errors[0],
+        "calls_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of traffic excluded from the results")
+    parser.add_argument("--wells", type=int, default=100_000)
+    parser.add_argument("--faults", type=int, default=10_000_000)
+    parser.add_argument("--postgrest-latency-ms", type=float, default=2.0)
+    parser.add_argument("--nextjs-latency-ms", type=float, default=50.0)
+    parser.add_argument("--secret", default="wellsync-bench-secret")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients\n")
+    print(f"{'workers':>8}{'calls':>8}{'errors':>8}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'speedup':>9}")
+    with ExitStack() as stack:
+        postgrest_port, nextjs_port = _free_port(), _free_port()
+        stack.enter_context(_process(
+            ["-m", "benchmarks.fake_postgrest", "--port", str(postgrest_port), "--wells", str(args.wells),
+             "--faults", str(args.faults), "--latency-ms", str(args.postgrest_latency_ms)],
+            postgrest_port,
+        ))
+        stack.enter_context(_process(
+            ["-m", "benchmarks.stub_nextjs", "--port", str(nextjs_port), "--latency-ms", str(args.nextjs_latency_ms)],
+            nextjs_port,
+        ))
+        baseline = None
+        for workers in args.workers:
+            mcp_port = _free_port()
+            env = dict(os.environ)
+            env.update(
+                SUPABASE_URL=f"http://127.0.0.1:{postgrest_port}",
+                SUPABASE_KEY="benchmark-key",
+                NEXTJS_APP_URL=f"http://127.0.0.1:{nextjs_port}",
+                MCP_PORT=str(mcp_port),
+                MCP_WORKERS=str(workers),
+                AUTH_SECRET=args.secret,
+                FAULT_EMBEDDER="local",
+                CHANGE_FEED="poll", # The fake PostgREST has no Realtime endpoint
+                LOG_LEVEL=env.get("LOG_LEVEL", "WARNING"),
+                FASTMCP_LOG_LEVEL=env.get("FASTMCP_LOG_LEVEL", "WARNING"),
+            )
+            with _process(["wellsync.py"], mcp_port, env=env):
+                row = asyncio.run(drive(
+                    f"http://127.0.0.1:{mcp_port}", args.secret, args.clients, args.duration, args.warmup, args.wells
+                ))
+            baseline = baseline or row["calls_per_second"]
+            speedup = row["calls_per_second"] / baseline if baseline else 0.0
+            print(
+                f"{workers:>8}{row['calls']:>8}{row['errors']:>8}{row['calls_per_second']:>10.1f}"
+                f"{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{speedup:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Admission control for SSE sessions, tool calls and resource reads.
+
+Without limits one runaway agent loop can open sessions and post calls faster than Supabase and the
+Next.js API can answer, and every other session queues behind it. `AdmissionController` bounds:
+
+  * open SSE sessions (`max_sessions`), refused at connect time;
+  * calls running per session (`max_in_flight_per_session`), so one session cannot take every slot;
+  * calls running per tool (`tool_limits`, e.g. fewer `dispatch_part` than `get_wells`);
+  * calls running in total (`max_in_flight`).
+
+A call over a limit waits for a slot, but only while fewer than `max_queued` calls are already waiting
+and for at most `queue_timeout` seconds in total; past that it fails at once with `AdmissionRejected`,
+which the server turns into a "busy" result. Slots are taken session -> tool -> global, so a call never
+holds a scarce global slot while it waits on a narrower limit. A limit of 0 means unlimited.
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a call cannot be admitted: the wait queue is full or the wait timed out."""
+
+    def __init__(self, reason: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Limit:
+    """A semaphore that knows its capacity and how many slots are in use."""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self._slots = asyncio.Semaphore(capacity)
+
+    @property
+    def free(self) -> bool:
+        return not self._slots.locked()
+
+    async def acquire(self, timeout: float | None = None) -> None:
+        if timeout is None:
+            await self._slots.acquire()
+        else:
+            await asyncio.wait_for(self._slots.acquire(), timeout=timeout)
+        self.in_use += 1
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self._slots.release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_sessions: int = 0,
+        max_in_flight: int = 0,
+        max_in_flight_per_session: int = 0,
+        tool_limits: dict[str, int] | None = None,
+        max_queued: int = 100,
+        queue_timeout: float = 5.0,
+    ):
+        self.max_sessions = max_sessions
+        self.max_in_flight_per_session = max_in_flight_per_session
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._global = _Limit("global", max_in_flight) if max_in_flight > 0 else None
+        self._tools = {name: _Limit("tool", limit) for name, limit in (tool_limits or {}).items() if limit > 0}
+        # Per-session limits disappear with their session
+        self._session_limits: weakref.WeakKeyDictionary[Hashable, _Limit] = weakref.WeakKeyDictionary()
+        self.sessions = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.rejections: dict[str, int] = {}
+
+    # --- Sessions ---
+
+    def open_session(self) -> bool:
+        """Counts a new SSE session in; False (refuse it) when `max_sessions` are already open."""
+        if self.max_sessions > 0 and self.sessions >= self.max_sessions:
+            self._reject("sessions")
+            return False
+        self.sessions += 1
+        return True
+
+    def close_session(self) -> None:
+        self.sessions -= 1
+
+    # --- Calls ---
+
+    def _reject(self, reason: str) -> None:
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+
+    def _limits_for(self, name: str | None, session: Hashable | None) -> list[_Limit]:
+        limits = []
+        if session is not None and self.max_in_flight_per_session > 0:
+            limit = self._session_limits.get(session)
+            if limit is None:
+                limit = self._session_limits[session] = _Limit("session", self.max_in_flight_per_session)
+            limits.append(limit)
+        if name in self._tools:
+            limits.append(self._tools[name])
+        if self._global is not None:
+            limits.append(self._global)
+        return limits
+
+    @asynccontextmanager
+    async def admit(self, name: str | None, session: Hashable | None = None) -> AsyncIterator[None]:
+        """
+        Holds a slot under every limit that applies to a call of tool `name` (None for resource reads) from
+        `session` (None when there is no session, e.g. the stateless endpoint) while the block runs.
+        """
+        acquired: list[_Limit] = []
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            for limit in self._limits_for(name, session):
+                if limit.free:
+                    await limit.acquire()
+                    acquired.append(limit)
+                    continue
+                if self.queued >= self.max_queued:
+                    self._reject("queue_full")
+                    raise AdmissionRejected(
+                        "queue_full", f"Server is busy ({self.queued} calls waiting), try again shortly.", self.queue_timeout
+                    )
+                self.queued += 1
+                try:
+                    await limit.acquire(max(deadline - time.monotonic(), 0.0))
+                except asyncio.TimeoutError:
+                    self._reject(limit.name)
+                    raise AdmissionRejected(
+                        limit.name,
+                        f"Server is busy: no {limit.name} slot freed up within {self.queue_timeout:g}s "
+                        f"({limit.capacity} calls allowed at once), try again shortly.",
+                        self.queue_timeout,
+                    ) from None
+                finally:
+                    self.queued -= 1
+                acquired.append(limit)
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            for limit in reversed(acquired):
+                limit.release()
+
+
+def parse_limits(spec: str | None) -> dict[str, int]:
+    """Parse `"dispatch_part=4,bulk_fulfill=2"` into a concurrency limit per tool name."""
+    limits: dict[str, int] = {}
+    for item in (spec or "").split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip()] = max(int(limit), 0)
+    return limits
@@ -1,17 +1,32 @@
 import base64
-from contextlib import asynccontextmanager
+import hmac
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, Awaitable, Callable, Iterable, Sequence
 
 import uvicorn
 from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.server import _convert_to_content
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.models import InitializationOptions
 from mcp.server.sse import SseServerTransport
-from pydantic import BaseModel, Field
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, INVALID_REQUEST, EmbeddedResource, ErrorData, ImageContent, TextContent
+from pydantic import AnyUrl, BaseModel, Field
 from starlette.applications import Starlette
 from starlette.exceptions import HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Mount, Route
-from starlette.types import Receive, Scope, Send
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .admission import AdmissionController, AdmissionRejected
+from .coalescing import SingleFlight, coalesce_key
+from .metrics import MetricsRegistry
+from .result_cache import MISS, CachePolicy, ResultCache
+from .serialization import dumps
+from .stateless_http import StatelessHTTPTransport
+from .subscriptions import SubscriptionHub
 
 
 class AuthHeaderTokens(BaseModel):
@@ -34,36 +49,396 @@ def extract_tokens_from_ctx(ctx: Context) -> AuthHeaderTokens:
     return auth_header_tokens_from_raw_header(header)
 
 
+def _is_error_payload(content: str | bytes) -> bool:
+    """Resources return pre-serialized JSON; an {"status": "error", ...} payload must not be cached."""
+    return isinstance(content, str) and content.startswith('{"status":"error"')
+
+
+def _busy_payload(rejection: AdmissionRejected) -> str:
+    """The result of a call refused by admission control: a regular error result agents can back off on."""
+    return dumps({
+        "status": "error",
+        "error": "busy",
+        "reason": rejection.reason,
+        "message": str(rejection),
+        "retry_after_seconds": rejection.retry_after,
+    })
+
+
 class AuthorizedMCP(FastMCP):
     """
     This is an extended version of the FastMCP class that includes an authorization secret.
     If the secret is provided, the server will require an Authorization header with the secret value as a Bearer token.
+
+    Tool calls, SSE sessions and backend calls reported through `observe_backend` are recorded in `self.metrics`
+    and served in Prometheus text format at `/metrics` (behind the secret unless `public_metrics=True`).
+    Dict and list tool results are serialized with the fast encoder in `serialization.dumps`.
+
+    With `coalesce=True`, concurrent identical calls to tools registered with `tool(coalesce=True)` and
+    concurrent reads of the same resource share one execution (see `coalescing.SingleFlight`). Tools
+    are never coalesced unless they opt in, so write tools keep running once per call.
+
+    With a `result_cache`, results of tools and resources registered with `cache=CachePolicy(...)` are
+    kept for the policy's TTL under its tags; write paths call `invalidate(*tags)` once they succeed.
+
+    With `subscriptions=True`, SSE clients can subscribe to resources and the application pushes
+    `notifications/resources/updated` through `notify_resource_updated` (see `subscriptions.SubscriptionHub`).
+
+    With `admission`, SSE connections beyond its session limit get a 503, and tool calls and resource reads
+    (after the result cache) wait for a slot under its limits or get a "busy" error result
+    (see `admission.AdmissionController`).
     """
 
-    def __init__(self, *args, auth_secret: str | None = None, **kwargs):
+    def __init__(
+        self,
+        *args,
+        auth_secret: str | None = None,
+        public_metrics: bool = False,
+        coalesce: bool = True,
+        result_cache: ResultCache | None = None,
+        subscriptions: bool = True,
+        admission: AdmissionController | None = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.auth_secret = auth_secret
+        self.admission = admission
+        self.coalesce = coalesce
+        self._coalesced_tools: set[str] = set()
+        self.cache = result_cache
+        # Tool names and resource URIs -> CachePolicy
+        self._cache_policies: dict[str, CachePolicy] = {}
+        self.subscriptions = SubscriptionHub() if subscriptions else None
+        if self.subscriptions is not None:
+            self._mcp_server.subscribe_resource()(self._subscribe)
+            self._mcp_server.unsubscribe_resource()(self._unsubscribe)
+        self._startup_hooks: list[Callable[[], Awaitable[None]]] = []
+        self._shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+        # Paths served without the authorization header (e.g. load balancer probes)
+        self.public_paths: set[str] = set()
+        self._setup_metrics()
         self.starlette_app = self._create_starlette_app()
-        self.starlette_app.add_middleware(AuthorizationMiddleware, secret=auth_secret)
+        self.starlette_app.add_middleware(
+            AuthorizationMiddleware, secret=auth_secret, public_paths=self.public_paths
+        )
+        self.custom_route("/metrics", methods=["GET"], public=public_metrics)(self._metrics_endpoint)
+
+    def _setup_metrics(self) -> None:
+        self.metrics = MetricsRegistry()
+        self._tool_latency = self.metrics.histogram(
+            "mcp_tool_call_duration_seconds", "Tool call latency in seconds.", ("tool", "outcome")
+        )
+        self._tool_errors = self.metrics.counter(
+            "mcp_tool_call_errors_total", "Tool calls that raised or returned an error status.", ("tool",)
+        )
+        self._tools_in_flight = self.metrics.gauge("mcp_tool_calls_in_flight", "Tool calls currently running.")
+        self._backend_latency = self.metrics.histogram(
+            "mcp_backend_call_duration_seconds",
+            "Backend call latency in seconds, by backend and table, RPC or API path.",
+            ("backend", "target"),
+        )
+        self._backend_errors = self.metrics.counter(
+            "mcp_backend_call_errors_total", "Backend calls that failed.", ("backend", "target")
+        )
+        self._sse_sessions = self.metrics.gauge("mcp_sse_sessions", "Open SSE sessions.")
+        self._messages_queued = self.metrics.gauge(
+            "mcp_messages_queued", "Posted client messages waiting to be handed to their session."
+        )
+        self._messages_total = self.metrics.counter("mcp_messages_received_total", "Client messages posted.")
+        coalesced = self.metrics.counter(
+            "mcp_coalesced_calls_total", "Calls that joined an identical in-flight call instead of running.", ("tool",)
+        )
+        collapsed = self.metrics.counter(
+            "mcp_coalesced_executions_total", "Executions whose result was shared by more than one call.", ("tool",)
+        )
+        self._flight = SingleFlight(
+            on_hit=lambda key: coalesced.inc(key[0]), on_collapse=lambda key: collapsed.inc(key[0])
+        )
+        self._cache_hits = self.metrics.counter(
+            "mcp_result_cache_hits_total", "Tool calls and resource reads answered from the result cache.", ("name",)
+        )
+        self._cache_misses = self.metrics.counter(
+            "mcp_result_cache_misses_total", "Cacheable tool calls and resource reads that ran.", ("name",)
+        )
+        self.metrics.gauge(
+            "mcp_result_cache_entries", "Entries in the result cache.", callback=lambda: len(self.cache or ())
+        )
+        self.metrics.gauge(
+            "mcp_resource_subscriptions", "Resource subscriptions held by open sessions.",
+            callback=lambda: len(self.subscriptions or ()),
+        )
+        self.metrics.counter(
+            "mcp_resource_notifications_sent_total", "Resource update notifications delivered since start.",
+            callback=lambda: self.subscriptions.notifications_sent if self.subscriptions is not None else 0,
+        )
+        self.metrics.counter(
+            "mcp_result_cache_invalidations_total", "Tag invalidations since start.",
+            callback=lambda: self.cache.invalidations if self.cache is not None else 0,
+        )
+        self._admission_rejections = self.metrics.counter(
+            "mcp_admission_rejections_total",
+            "SSE connections and calls refused by admission control, by the limit that refused them.",
+            ("reason",),
+        )
+        self.metrics.gauge(
+            "mcp_admission_queued", "Calls waiting for an admission slot.",
+            callback=lambda: self.admission.queued if self.admission is not None else 0,
+        )
+        self.metrics.gauge(
+            "mcp_admission_in_flight", "Admitted tool calls and resource reads running.",
+            callback=lambda: self.admission.in_flight if self.admission is not None else 0,
+        )
+
+    def observe_backend(self, backend: str, target: str, seconds: float, ok: bool = True) -> None:
+        """Record one backend call, e.g. `observe_backend("supabase", "wells", 0.012)`."""
+        self._backend_latency.observe(seconds, backend, target)
+        if not ok:
+            self._backend_errors.inc(backend, target)
+
+    async def _metrics_endpoint(self, request):
+        return PlainTextResponse(self.metrics.render(), media_type="text/plain; version=0.0.4")
+
+    def tool(
+        self, name: str | None = None, description: str | None = None, coalesce: bool = False, cache: CachePolicy | None = None
+    ):
+        """
+        FastMCP's tool decorator. `coalesce=True` lets concurrent calls with the same arguments share one
+        execution, and `cache` keeps successful results; only set them on tools without side effects.
+        """
+        register = super().tool(name=name, description=description)
+
+        def decorator(fn):
+            if coalesce:
+                self._coalesced_tools.add(name or fn.__name__)
+            if cache is not None:
+                self._cache_policies[name or fn.__name__] = cache
+            return register(fn)
+
+        return decorator
+
+    def resource(
+        self, uri: str, *, name: str | None = None, description: str | None = None, mime_type: str | None = None,
+        cache: CachePolicy | None = None,
+    ):
+        """FastMCP's resource decorator; `cache` keeps what the resource returns (tags get `{}` as arguments)."""
+        if cache is not None:
+            self._cache_policies[uri] = cache
+        return super().resource(uri, name=name, description=description, mime_type=mime_type)
+
+    def _is_known_resource(self, uri: str) -> bool:
+        manager = self._resource_manager
+        return uri in manager._resources or any(t.matches(uri) is not None for t in manager._templates.values())
+
+    async def _subscribe(self, uri: AnyUrl) -> None:
+        session = self._mcp_server.request_context.session
+        if session is None:
+            raise McpError(ErrorData(
+                code=INVALID_REQUEST,
+                message="Resource subscriptions need an SSE session (GET /sse); the stateless /mcp endpoint cannot send notifications.",
+            ))
+        if not self._is_known_resource(str(uri)):
+            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Unknown resource: {uri}"))
+        await self.subscriptions.subscribe(session, str(uri))
+
+    async def _unsubscribe(self, uri: AnyUrl) -> None:
+        session = self._mcp_server.request_context.session
+        if session is not None:
+            await self.subscriptions.unsubscribe(session, str(uri))
+
+    def _initialization_options(self) -> InitializationOptions:
+        """The low-level server's options, advertising `resources.subscribe` (FastMCP always reports False)."""
+        options = self._mcp_server.create_initialization_options()
+        if self.subscriptions is not None and options.capabilities.resources is not None:
+            options.capabilities.resources.subscribe = True
+        return options
+
+    async def notify_resource_updated(self, key: str, **params: Any) -> int:
+        """Notify the sessions subscribed to `key` (a resource URI, after `canonicalize`); returns how many were reached."""
+        if self.subscriptions is None:
+            return 0
+        return await self.subscriptions.publish(key, **params)
+
+    def _admit(self, name: str | None):
+        """Admission slot for a call of tool `name` (None for resource reads) from the current session."""
+        if self.admission is None:
+            return nullcontext()
+        try:
+            session = self._mcp_server.request_context.session
+        except LookupError:
+            # Called in-process, outside any request
+            session = None
+        return self.admission.admit(name, session)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop cached results built from data a write just changed, e.g. `invalidate("inventory:P001")`."""
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+
+    async def _run_tool(
+        self, name: str, arguments: dict[str, Any]
+    ) -> tuple[Sequence[TextContent | ImageContent | EmbeddedResource], bool, tuple[str, ...] | None]:
+        """(content, ok, cache tags) for one execution of a tool; tags are None when the result must not be cached."""
+        result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+        # Tools report failures as {"status": "error", ...} rather than raising
+        ok = not (isinstance(result, dict) and result.get("status") == "error")
+        policy = self._cache_policies.get(name)
+        tags = policy.tags_for(arguments, result) if policy is not None and ok and policy.stores(result) else None
+        if isinstance(result, (dict, list)):
+            return [TextContent(type="text", text=dumps(result))], ok, tags
+        return _convert_to_content(result), ok, tags
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any]
+    ) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+        """Call a tool by name with arguments, recording its latency and outcome."""
+        # Only registered names become label values, so unknown names cannot grow the series set
+        label = name if self._tool_manager.get_tool(name) else "unknown"
+        outcome = "error"
+        self._tools_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            key = coalesce_key(name, arguments)
+            policy = self._cache_policies.get(name) if self.cache is not None else None
+            if policy is not None:
+                cached = self.cache.get(key)
+                if cached is not MISS:
+                    self._cache_hits.inc(label)
+                    outcome = "ok"
+                    return cached
+                self._cache_misses.inc(label)
+                epoch = self.cache.epoch
+            try:
+                async with self._admit(label):
+                    if self.coalesce and name in self._coalesced_tools:
+                        content, ok, tags = await self._flight.do(key, lambda: self._run_tool(name, arguments))
+                    else:
+                        content, ok, tags = await self._run_tool(name, arguments)
+            except AdmissionRejected as e:
+                outcome = "busy"
+                self._admission_rejections.inc(e.reason)
+                return [TextContent(type="text", text=_busy_payload(e))]
+            if ok:
+                outcome = "ok"
+                if policy is not None and tags is not None:
+                    self.cache.put(key, content, policy.ttl_seconds, tags, epoch)
+            return content
+        finally:
+            self._tools_in_flight.dec()
+            self._tool_latency.observe(time.perf_counter() - started, label, outcome)
+            if outcome == "error":
+                self._tool_errors.inc(label)
+
+    async def read_resource(self, uri: AnyUrl | str) -> Iterable[ReadResourceContents]:
+        """
+        Read a resource by URI, from the result cache when it has a cache policy; concurrent reads of the
+        same URI share one read when coalescing is on.
+        """
+        key = ("resources/read", str(uri))
+        policy = self._cache_policies.get(str(uri)) if self.cache is not None else None
+        if policy is not None:
+            cached = self.cache.get(key)
+            if cached is not MISS:
+                self._cache_hits.inc(str(uri))
+                return cached
+            self._cache_misses.inc(str(uri))
+            epoch = self.cache.epoch
+        try:
+            async with self._admit(None):
+                if self.coalesce:
+                    contents = await self._flight.do(key, lambda: super(AuthorizedMCP, self).read_resource(uri))
+                else:
+                    contents = await super().read_resource(uri)
+        except AdmissionRejected as e:
+            self._admission_rejections.inc(e.reason)
+            return [ReadResourceContents(content=_busy_payload(e), mime_type="application/json")]
+        if policy is not None and policy.stores(contents) and not any(_is_error_payload(c.content) for c in contents):
+            self.cache.put(key, contents, policy.ttl_seconds, policy.tags_for({}, contents), epoch)
+        return contents
+
+    def custom_route(self, path: str, methods: list[str] | None = None, public: bool = False):
+        """
+        Decorator adding an HTTP endpoint to the Starlette app next to `/sse` and `/messages/`.
+        `public=True` exempts the path from the authorization check.
+        """
+
+        def decorator(endpoint):
+            self.starlette_app.router.routes.append(Route(path, endpoint=endpoint, methods=methods))
+            if public:
+                self.public_paths.add(path)
+            return endpoint
+
+        return decorator
+
+    def on_startup(self, fn: Callable[[], Awaitable[None]]):
+        """Register an async callable to run when the server starts. Usable as a decorator."""
+        self._startup_hooks.append(fn)
+        return fn
+
+    def on_shutdown(self, fn: Callable[[], Awaitable[None]]):
+        """Register an async callable to run when the server stops (in reverse registration order)."""
+        self._shutdown_hooks.append(fn)
+        return fn
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette):
+        for hook in self._startup_hooks:
+            await hook()
+        try:
+            yield
+        finally:
+            for hook in reversed(self._shutdown_hooks):
+                await hook()
 
     def _create_starlette_app(self) -> Starlette:
         sse = SseServerTransport("/messages/")
 
         async def handle_sse(request):
-            async with sse.connect_sse(
-                request.scope, request.receive, request._send
-            ) as streams:
-                await self._mcp_server.run(
-                    streams[0],
-                    streams[1],
-                    self._mcp_server.create_initialization_options(),
+            if self.admission is not None and not self.admission.open_session():
+                self._admission_rejections.inc("sessions")
+                return JSONResponse(
+                    {"error": f"Server is busy: {self.admission.max_sessions} sessions are open, try again shortly."},
+                    status_code=503,
+                    headers={"Retry-After": str(max(int(self.admission.queue_timeout), 1))},
                 )
+            self._sse_sessions.inc()
+            try:
+                async with sse.connect_sse(
+                    request.scope, request.receive, request._send
+                ) as streams:
+                    await self._mcp_server.run(
+                        streams[0],
+                        streams[1],
+                        self._initialization_options(),
+                    )
+            finally:
+                self._sse_sessions.dec()
+                if self.admission is not None:
+                    self.admission.close_session()
+
+        stateless = StatelessHTTPTransport(self._mcp_server)
+
+        async def handle_stateless(request):
+            self._messages_total.inc()
+            return await stateless.handle_request(request)
+
+        async def handle_post_message(scope: Scope, receive: Receive, send: Send) -> None:
+            # The transport hands each message to its session over an unbuffered stream, so a
+            # message counts as queued until the session's reader has taken it
+            self._messages_total.inc()
+            self._messages_queued.inc()
+            try:
+                await sse.handle_post_message(scope, receive, send)
+            finally:
+                self._messages_queued.dec()
 
         return Starlette(
             debug=self.settings.debug,
+            lifespan=self._lifespan,
             routes=[
                 Route("/sse", endpoint=handle_sse),
-                Mount("/messages/", app=sse.handle_post_message),
+                Mount("/messages/", app=handle_post_message),
+                # Stateless alternative to /sse + /messages/ that any worker or replica can serve
+                Route("/mcp", endpoint=handle_stateless, methods=["POST", "GET", "DELETE"]),
             ],
         )
 
@@ -78,30 +453,104 @@ class AuthorizedMCP(FastMCP):
         server = uvicorn.Server(config)
         await server.serve()
 
+    def run_workers(self, app_import: str, workers: int) -> None:
+        """
+        Run `workers` uvicorn worker processes sharing the port. `app_import` ("module:attribute") must name this
+        server's `starlette_app`, since each worker imports it afresh. Only `/mcp` (stateless) requests can be
+        served by any worker; an `/sse` session's `/messages/` POSTs must reach the worker that owns it.
+        """
+        uvicorn.run(
+            app_import,
+            host=self.settings.host,
+            port=self.settings.port,
+            workers=workers,
+            log_level=self.settings.log_level.lower(),
+        )
 
-class AuthorizationMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, secret):
-        super().__init__(app)
+
+class SecretVerifier:
+    """
+    Checks that an authorization header carries the expected server secret.
+
+    Decoding and validating the header is the expensive part, and a client sends the same header on every
+    message, so headers that passed are remembered in a small LRU. The secret comparison is constant-time.
+    """
+
+    def __init__(self, secret: str | None, cache_size: int = 256):
         self.secret = secret
+        self.cache_size = cache_size
+        self._verified: OrderedDict[bytes, None] = OrderedDict()
+
+    def _secret_matches(self, server_secret: str | None) -> bool:
+        if self.secret is None or server_secret is None:
+            return self.secret is None and server_secret is None
+        return hmac.compare_digest(server_secret.encode(), self.secret.encode())
+
+    def verify(self, header: bytes | str) -> bool:
+        key = header.encode() if isinstance(header, str) else header
+        if key in self._verified:
+            self._verified.move_to_end(key)
+            return True
+        try:
+            tokens = auth_header_tokens_from_raw_header(key.decode())
+        except (ValueError, UnicodeDecodeError):
+            # Malformed base64 or JSON payloads (pydantic's ValidationError is a ValueError)
+            return False
+        if not self._secret_matches(tokens.server_secret):
+            return False
+        self._verified[key] = None
+        if len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+        return True
+
+
+def _authorization_header(scope: Scope) -> bytes | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value
+    return None
+
+
+class AuthorizationMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, so long-lived `/sse` streams pass straight through)
+    that rejects HTTP requests without a valid authorization header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret: str | None,
+        cache_size: int = 256,
+        public_paths: set[str] | None = None,
+    ):
+        self.app = app
+        self.verifier = SecretVerifier(secret, cache_size)
+        self.public_paths = public_paths if public_paths is not None else set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.public_paths:
+            # Lifespan events carry no headers; public paths need none
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Check for the Authorization header
-        auth_header = request.headers.get("authorization", None)
+        auth_header = _authorization_header(scope)
         if not auth_header:
             res = JSONResponse(
                 {"error": "Authorization header missing"}, status_code=401
             )
-            return res
-        tokens = auth_header_tokens_from_raw_header(auth_header)
-        if tokens.server_secret != self.secret:
+            await res(scope, receive, send)
+            return
+        if not self.verifier.verify(auth_header):
             res = JSONResponse(
                 {"error": "Invalid authorization token"}, status_code=401
             )
-            return res
+            await res(scope, receive, send)
+            return
 
-        # If the header is present, proceed with the request
-        response = await call_next(request)
-        return response
+        # If the header is valid, proceed with the request
+        await self.app(scope, receive, send)
 
 
 # Use this for low-level server implementation.
@@ -109,14 +558,12 @@ class BearerSecretTransport(SseServerTransport):
     def __init__(self, endpoint: str, secret: str):
         super().__init__(endpoint)
         self.secret = secret
+        self.verifier = SecretVerifier(secret)
 
     @asynccontextmanager
     async def connect_sse(self, scope: Scope, receive: Receive, send: Send):
-        auth_header = dict(scope["headers"]).get(b"authorization", b"").decode("utf-8")
-        print(auth_header)
-        tokens = auth_header_tokens_from_raw_header(auth_header)
-        print(tokens)
-        if tokens.server_secret != self.secret:
+        auth_header = _authorization_header(scope)
+        if not auth_header or not self.verifier.verify(auth_header):
             raise HTTPException(status_code=401, detail="Unauthorized")
         async with super().connect_sse(scope, receive, send) as streams:
             yield streams
@@ -0,0 +1,68 @@
+"""
+Single-flight request coalescing: concurrent identical calls share one execution.
+
+When several clients ask the same question at the same moment (a dashboard refresh fanned out over
+agents, an alert storm), only the first call runs; the others wait for it and receive the same result,
+or the same exception. Nothing is cached: once the call finishes, the next identical call runs again.
+
+Only use it for side-effect-free calls whose result does not depend on who is asking.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def coalesce_key(name: str, arguments: dict[str, Any] | None) -> tuple[str, str]:
+    """`(name, arguments)` in a canonical form: key order and None-valued (defaulted) arguments do not matter."""
+    normalized = {k: v for k, v in (arguments or {}).items() if v is not None}
+    return name, json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class SingleFlight:
+    """
+    `await flight.do(key, fn)` runs `fn()` unless a call with the same key is already in flight, in which
+    case it waits for that call's result. `hits` counts calls that joined another; `collapses` counts
+    executions that served more than one caller.
+
+    The shared call runs as its own task, so a caller that is cancelled (e.g. its client disconnected)
+    does not cancel it for the others.
+    """
+
+    def __init__(self, on_hit: Callable[[Hashable], None] | None = None, on_collapse: Callable[[Hashable], None] | None = None):
+        self._in_flight: dict[Hashable, tuple[asyncio.Task, list[int]]] = {}
+        self.on_hit = on_hit
+        self.on_collapse = on_collapse
+        self.hits = 0
+        self.collapses = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        entry = self._in_flight.get(key)
+        if entry is not None:
+            task, joined = entry
+            joined[0] += 1
+            self.hits += 1
+            if self.on_hit is not None:
+                self.on_hit(key)
+            if joined[0] == 1:
+                self.collapses += 1
+                if self.on_collapse is not None:
+                    self.on_collapse(key)
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = (task, [0])
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key, (None,))[0] is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved: every waiter may have been cancelled
+        if not task.cancelled():
+            task.exception()
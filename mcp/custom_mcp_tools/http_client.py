@@ -0,0 +1,124 @@
+"""
+A long-lived, pooled async HTTP client for tools that call out to other services.
+
+Creating an `httpx.AsyncClient` per tool call means a fresh TCP (and TLS) handshake every time
+and no upper bound on how many calls run at once. `PooledHTTPClient` keeps one client alive for
+the lifetime of the server, reuses keep-alive connections (HTTP/2 when `h2` is installed), and caps
+the number of in-flight requests with a semaphore. An optional `observe(path, seconds, ok)` callback
+receives the latency of every request for metrics; `ok` is False for transport errors and 5xx responses.
+
+Typical usage with `AuthorizedMCP`:
+
+```python
+api = PooledHTTPClient(base_url="http://localhost:3000", max_connections=20)
+mcp.on_startup(api.start)
+mcp.on_shutdown(api.aclose)
+
+@mcp.tool()
+async def my_tool():
+    response = await api.post("/api/orders", json={...})
+```
+"""
+
+import asyncio
+import time
+from typing import Callable
+
+import httpx
+from loguru import logger
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PooledHTTPClient:
+    """
+    Wraps a single shared `httpx.AsyncClient`.
+
+    The underlying client is created by `start()` (or lazily on first request) and closed by `aclose()`.
+    `max_in_flight` bounds concurrent requests; callers beyond the bound wait for a free slot.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        *,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_in_flight: int | None = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        http2: bool = True,
+        observe: Callable[[str, float, bool], None] | None = None,
+    ):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+        self._semaphore = asyncio.Semaphore(max_in_flight or max_connections)
+        self._client: httpx.AsyncClient | None = None
+        self._start_lock = asyncio.Lock()
+        self.observe = observe
+
+    @property
+    def is_open(self) -> bool:
+        return self._client is not None and not self._client.is_closed
+
+    async def start(self) -> None:
+        """Create the shared client. Safe to call more than once, including concurrently."""
+        async with self._start_lock:
+            if self.is_open:
+                return
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+
+    async def aclose(self) -> None:
+        """Close the shared client and release pooled connections."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def request(
+        self, method: str, url: str, *, timeout: float | None = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the shared client.
+        `timeout` overrides the default read/write/pool timeout for this call only.
+        """
+        if not self.is_open:
+            await self.start()
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=self.timeout.connect)
+        async with self._semaphore:
+            if self.observe is None:
+                return await self._client.request(method, url, **kwargs)
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = await self._client.request(method, url, **kwargs)
+                ok = response.status_code < 500
+                return response
+            finally:
+                self.observe(str(url), time.perf_counter() - started, ok)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
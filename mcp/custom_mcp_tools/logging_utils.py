@@ -0,0 +1,79 @@
+"""
+Low-overhead structured logging on top of loguru.
+
+* `configure_logging()` replaces loguru's default synchronous stderr handler with an `enqueue=True` sink,
+  so records are written by a background thread and logging never blocks the event loop. `json=True`
+  emits one JSON object per line (fields passed as keyword arguments land in `extra`).
+* `tool_logger(name)` returns a logger bound to a tool name. Info/debug records from a tool are sampled
+  per call according to `sample_rates`; warnings and errors are always kept.
+* `summarize(payload)` describes a result by counts and size instead of formatting it in full. Pair it
+  with `logger.opt(lazy=True)` so even the summary is only computed when the level is enabled.
+
+Prefer `log.info("Served {count} wells", count=len(rows))` over f-strings: loguru skips formatting
+entirely when no sink accepts the level.
+"""
+
+import logging
+import random
+import sys
+from typing import Any
+
+from loguru import logger
+
+ALWAYS_KEPT_LEVEL = logging.WARNING
+
+_sample_rates: dict[str, float] = {}
+_default_sample_rate = 1.0
+
+
+def parse_sample_rates(spec: str | None) -> dict[str, float]:
+    """Parse `"get_wells=0.1,get_part_inventory=0.5"` into a rate per tool name."""
+    rates: dict[str, float] = {}
+    for item in (spec or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _sampling_filter(record) -> bool:
+    return record["extra"].get("sampled", True) or record["level"].no >= ALWAYS_KEPT_LEVEL
+
+
+def configure_logging(
+    level: str = "INFO",
+    json: bool = False,
+    sample_rates: dict[str, float] | None = None,
+    default_sample_rate: float = 1.0,
+    sink: Any = sys.stderr,
+) -> None:
+    """Install a single non-blocking sink and set per-tool sampling rates."""
+    global _default_sample_rate
+    _sample_rates.clear()
+    _sample_rates.update(sample_rates or {})
+    _default_sample_rate = default_sample_rate
+    logger.remove()
+    logger.add(sink, level=level.upper(), enqueue=True, serialize=json, filter=_sampling_filter)
+
+
+def tool_logger(tool: str):
+    """A logger for one tool call; whether its info/debug records are kept is decided once, here."""
+    rate = _sample_rates.get(tool, _default_sample_rate)
+    return logger.bind(tool=tool, sampled=rate >= 1.0 or random.random() < rate)
+
+
+def summarize(payload: Any) -> dict[str, Any]:
+    """Counts and sizes describing a payload, without serializing it."""
+    if isinstance(payload, dict):
+        summary: dict[str, Any] = {"keys": len(payload)}
+        if "status" in payload:
+            summary["status"] = payload["status"]
+        for key, value in payload.items():
+            if isinstance(value, (list, tuple, dict)):
+                summary[f"{key}_count"] = len(value)
+        return summary
+    if isinstance(payload, (list, tuple)):
+        return {"items": len(payload)}
+    if isinstance(payload, (str, bytes)):
+        return {"length": len(payload)}
+    return {"type": type(payload).__name__}
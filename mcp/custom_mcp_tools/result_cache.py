@@ -0,0 +1,108 @@
+"""
+Tool and resource result cache: a bounded LRU with a TTL per entry and tag-based invalidation.
+
+Each entry carries tags naming the data it was built from (e.g. `inventory:P001`, `well:<uuid>`).
+A write that changes that data calls `invalidate(...)` with the same tags, so the next read goes to
+the backend instead of waiting out the TTL. Reads that were already in flight when an invalidation
+happened are not stored, since they may have read the data before the write.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, NamedTuple, Sequence
+
+# Tags for a result: fixed, or computed from the call's arguments and the tool's return value
+TagSpec = Sequence[str] | Callable[[dict[str, Any], Any], Iterable[str]]
+
+
+class CachePolicy(NamedTuple):
+    ttl_seconds: float
+    tags: TagSpec = ()
+    # Results this returns False for are not stored, e.g. answers that report how old their data is right now
+    cacheable: Callable[[Any], bool] | None = None
+
+    def tags_for(self, arguments: dict[str, Any], result: Any) -> tuple[str, ...]:
+        return tuple(self.tags(arguments, result) if callable(self.tags) else self.tags)
+
+    def stores(self, result: Any) -> bool:
+        return self.cacheable is None or self.cacheable(result)
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    tags: tuple[str, ...]
+
+
+MISS = object()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._keys_by_tag: dict[str, set[Hashable]] = {}
+        # Bumped by every invalidation; a fill started before the latest one is dropped
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """The cached value, or `MISS` if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: float, tags: Iterable[str] = (), epoch: int | None = None) -> bool:
+        """
+        Stores `value` unless an invalidation happened after `epoch` (read it before starting the call
+        that produced `value`). Returns whether it was stored.
+        """
+        if ttl_seconds <= 0 or (epoch is not None and epoch != self.epoch):
+            return False
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(value, time.monotonic() + ttl_seconds, tuple(tags))
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def invalidate(self, *tags: str) -> int:
+        """Drops every entry carrying any of `tags`; returns how many were dropped."""
+        self.epoch += 1
+        self.invalidations += 1
+        dropped = 0
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+                dropped += 1
+        return dropped
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
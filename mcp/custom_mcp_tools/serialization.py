@@ -0,0 +1,47 @@
+"""
+Fast JSON encoding and compact columnar result shapes for tools that return many rows.
+
+`dumps()` uses `orjson` when it is installed (several times faster than the stdlib for row-heavy
+payloads) and falls back to `json` otherwise; both produce compact output without spaces.
+`to_columnar()` turns a list of dicts into `{"columns": [...], "rows": [[...], ...]}` so key names are
+sent once per response instead of once per row.
+"""
+
+import json
+from typing import Any, Iterable, Literal, Sequence
+
+import pydantic_core
+from loguru import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.info("orjson is not installed, using the standard json module")
+
+ResultFormat = Literal["records", "columnar"]
+RESULT_FORMATS = ("records", "columnar")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string; values JSON cannot represent go through pydantic's encoder."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=pydantic_core.to_jsonable_python, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), default=pydantic_core.to_jsonable_python)
+
+
+def to_columnar(rows: Iterable[dict], columns: Sequence[str] | None = None) -> dict[str, list]:
+    """`[{"a": 1, "b": 2}, ...]` -> `{"columns": ["a", "b"], "rows": [[1, 2], ...]}`."""
+    rows = list(rows)
+    if columns is None:
+        columns = list(rows[0]) if rows else []
+    return {"columns": list(columns), "rows": [[row.get(c) for c in columns] for row in rows]}
+
+
+def shape_rows(rows: list[dict], format: str | None, columns: Sequence[str] | None = None) -> list[dict] | dict[str, list]:
+    """Rows in the requested result format ("records", the default, or "columnar")."""
+    if format in (None, "records"):
+        return rows
+    if format == "columnar":
+        return to_columnar(rows, columns)
+    raise ValueError(f"Unknown format '{format}'. Allowed formats: {list(RESULT_FORMATS)}")
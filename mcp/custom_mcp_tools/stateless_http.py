@@ -0,0 +1,116 @@
+"""
+Stateless Streamable-HTTP transport: every `POST /mcp` carries complete JSON-RPC messages and gets its
+response in the HTTP reply.
+
+`SseServerTransport` keeps each session's streams in the memory of the process that accepted `GET /sse`,
+so a `/messages/` POST that a load balancer (or another uvicorn worker) routes elsewhere finds no session.
+Here no state survives a request: `initialize` is answered directly and every later request is dispatched
+straight to the low-level server's handlers. Any worker or replica can serve any request, which is what
+lets the server run with several workers behind a plain round-robin balancer.
+
+Follows the JSON-response flavour of the MCP Streamable HTTP transport: no `Mcp-Session-Id` is issued,
+`GET` (server-initiated streams) and `DELETE` (session teardown) answer 405, notifications and client
+responses get 202, and JSON-RPC batches are accepted.
+"""
+
+import json
+import typing
+from typing import Any
+
+from loguru import logger
+from mcp import types
+from mcp.server.lowlevel.server import Server, request_ctx
+from mcp.shared.context import RequestContext
+from mcp.shared.exceptions import McpError
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from .serialization import dumps
+
+# Protocol revisions a stateless client may ask for; both share the request/result shapes used here
+STATELESS_PROTOCOL_VERSIONS = (types.LATEST_PROTOCOL_VERSION, "2025-03-26")
+
+# "tools/call" -> CallToolRequest, ...; validating against the one model is cheaper than the whole union
+CLIENT_REQUEST_TYPES = {
+    typing.get_args(model.model_fields["method"].annotation)[0]: model
+    for model in typing.get_args(types.ClientRequest.model_fields["root"].annotation)
+}
+
+
+def _error(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class StatelessHTTPTransport:
+    def __init__(self, server: Server):
+        self.server = server
+
+    def _initialize_result(self, request: types.InitializeRequest) -> types.InitializeResult:
+        options = self.server.create_initialization_options()
+        requested = request.params.protocolVersion
+        return types.InitializeResult(
+            protocolVersion=requested if requested in STATELESS_PROTOCOL_VERSIONS else types.LATEST_PROTOCOL_VERSION,
+            capabilities=options.capabilities,
+            serverInfo=types.Implementation(name=options.server_name, version=options.server_version),
+            instructions=options.instructions,
+        )
+
+    async def _dispatch(self, message: dict) -> dict | None:
+        """Handle one JSON-RPC message; None for notifications and client responses."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            return _error(message.get("id") if isinstance(message, dict) else None, types.INVALID_REQUEST, "Invalid JSON-RPC message")
+        if "id" not in message or "method" not in message:
+            return None
+        request_id = message["id"]
+        request_type = CLIENT_REQUEST_TYPES.get(message["method"])
+        if request_type is None:
+            return _error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+        try:
+            request = request_type.model_validate({"method": message["method"], "params": message.get("params")})
+        except ValidationError as e:
+            first = e.errors()[0]
+            return _error(request_id, types.INVALID_PARAMS, f"Invalid params: {'.'.join(map(str, first['loc']))}: {first['msg']}")
+
+        if isinstance(request, types.InitializeRequest):
+            result: types.ServerResult | types.ErrorData = types.ServerResult(self._initialize_result(request))
+        else:
+            handler = self.server.request_handlers.get(type(request))
+            if handler is None:
+                return _error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+            meta = request.params.meta if request.params else None
+            # No session: tools that need to message the client (progress, sampling) cannot be used here
+            token = request_ctx.set(RequestContext(request_id, meta, None, None))
+            try:
+                result = await handler(request)
+            except McpError as err:
+                result = err.error
+            except Exception as err:
+                logger.exception("Error handling {}", message["method"])
+                result = types.ErrorData(code=0, message=str(err))
+            finally:
+                request_ctx.reset(token)
+
+        if isinstance(result, types.ErrorData):
+            return {"jsonrpc": "2.0", "id": request_id, "error": result.model_dump(by_alias=True, exclude_none=True)}
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": result.model_dump(by_alias=True, mode="json", exclude_none=True),
+        }
+
+    async def handle_request(self, request: Request) -> Response:
+        if request.method != "POST":
+            return Response(status_code=405, headers={"Allow": "POST"})
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            return JSONResponse(_error(None, types.PARSE_ERROR, "Parse error"), status_code=400)
+
+        if isinstance(body, list):
+            replies = [reply for reply in [await self._dispatch(m) for m in body] if reply is not None]
+        else:
+            replies = await self._dispatch(body)
+        if not replies:
+            return Response(status_code=202)
+        return Response(dumps(replies), media_type="application/json")
@@ -0,0 +1,81 @@
+"""
+MCP resource subscriptions (`resources/subscribe`, `notifications/resources/updated`).
+
+`SubscriptionHub` remembers which sessions subscribed to which resource URI and fans one change out
+to all of them, so a wall of dashboards watching the same resource costs one change event rather than
+one query per client per poll. Notifications may carry extra params (the protocol allows them) such as
+the changed rows, so a client can apply a delta instead of re-reading the resource.
+
+Only sessions with a server-to-client stream (`/sse`) can be notified; the stateless `/mcp` endpoint
+has none.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+from mcp import types
+from mcp.server.session import ServerSession
+
+
+class SubscriptionHub:
+    def __init__(self, send_timeout: float = 5.0):
+        """A notification not written within `send_timeout` seconds (a stuck client) is dropped for that session."""
+        self.send_timeout = send_timeout
+        # key (canonical URI) -> {session: URI as the session subscribed to it}; closed sessions drop out on GC
+        self._subscribers: dict[str, weakref.WeakKeyDictionary[ServerSession, str]] = {}
+        # Optional hook mapping a subscribed URI to the key changes are published under (e.g. name -> UUID)
+        self.canonicalize: Callable[[str], Awaitable[str]] | None = None
+        self.notifications_sent = 0
+        self.notifications_failed = 0
+
+    def __len__(self) -> int:
+        return sum(len(sessions) for sessions in self._subscribers.values())
+
+    async def _key(self, uri: str) -> str:
+        return await self.canonicalize(uri) if self.canonicalize is not None else uri
+
+    async def subscribe(self, session: ServerSession, uri: str) -> None:
+        key = await self._key(uri)
+        self._subscribers.setdefault(key, weakref.WeakKeyDictionary())[session] = uri
+
+    async def unsubscribe(self, session: ServerSession, uri: str) -> None:
+        key = await self._key(uri)
+        sessions = self._subscribers.get(key)
+        if sessions is not None:
+            sessions.pop(session, None)
+            if not sessions:
+                del self._subscribers[key]
+
+    def has_subscribers(self, key: str) -> bool:
+        return bool(self._subscribers.get(key))
+
+    async def publish(self, key: str, **params: Any) -> int:
+        """Sends `notifications/resources/updated` (with `params` as extra fields) to every subscriber of `key`."""
+        sessions = list(self._subscribers.get(key, {}).items())
+        if not sessions:
+            return 0
+        results = await asyncio.gather(*(self._send(session, uri, params) for session, uri in sessions))
+        return sum(results)
+
+    async def _send(self, session: ServerSession, uri: str, params: dict[str, Any]) -> bool:
+        notification = types.ServerNotification(
+            types.ResourceUpdatedNotification(
+                method="notifications/resources/updated",
+                params=types.ResourceUpdatedNotificationParams(uri=uri, **params),
+            )
+        )
+        try:
+            await asyncio.wait_for(session.send_notification(notification), timeout=self.send_timeout)
+        except Exception as e:
+            # Closed or stuck session: stop notifying it
+            self.notifications_failed += 1
+            logger.info("Dropping subscription to {} after a failed notification: {!r}", uri, e)
+            for key, sessions in list(self._subscribers.items()):
+                sessions.pop(session, None)
+                if not sessions:
+                    del self._subscribers[key]
+            return False
+        self.notifications_sent += 1
+        return True
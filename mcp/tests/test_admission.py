@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from custom_mcp_tools.admission import AdmissionController, AdmissionRejected, parse_limits
+
+
+class _Session:
+    """Sessions are held weakly, so tests need an object that supports weak references."""
+
+
+async def _hold(controller: AdmissionController, name: str | None, release: asyncio.Event, session=None) -> None:
+    async with controller.admit(name, session):
+        await release.wait()
+
+
+def test_parse_limits():
+    assert parse_limits("dispatch_part=4, bulk_fulfill = 2,broken,=3,zero=-1") == {
+        "dispatch_part": 4, "bulk_fulfill": 2, "zero": 0
+    }
+    assert parse_limits(None) == {}
+
+
+def test_session_limit():
+    controller = AdmissionController(max_sessions=2)
+    assert controller.open_session() and controller.open_session()
+    assert not controller.open_session()
+    controller.close_session()
+    assert controller.open_session()
+    assert controller.rejections == {"sessions": 1}
+
+
+def test_unlimited_by_default():
+    async def main():
+        controller = AdmissionController()
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(controller, "get_wells", release)) for _ in range(50)]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 50
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.in_flight == 0
+    asyncio.run(main())
+
+
+def test_call_waits_for_a_tool_slot():
+    async def main():
+        controller = AdmissionController(tool_limits={"dispatch_part": 1}, queue_timeout=1.0)
+        release = asyncio.Event()
+        first = asyncio.create_task(_hold(controller, "dispatch_part", release))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_hold(controller, "dispatch_part", asyncio.Event()))
+        await asyncio.sleep(0)
+        assert (controller.in_flight, controller.queued) == (1, 1)
+        # Other tools are not held up by the dispatch limit
+        async with controller.admit("get_wells"):
+            assert controller.in_flight == 2
+        release.set()
+        await first
+        await asyncio.sleep(0.01)
+        assert (controller.in_flight, controller.queued) == (1, 0)
+        second.cancel()
+    asyncio.run(main())
+
+
+def test_wait_times_out_with_the_limit_name():
+    async def main():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "get_wells", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("get_wells"):
+                pass
+        assert rejected.value.reason == "global"
+        assert rejected.value.retry_after == 0.05
+        release.set()
+        await holder
+        assert controller.rejections == {"global": 1}
+        assert controller.queued == 0
+    asyncio.run(main())
+
+
+def test_full_queue_rejects_at_once():
+    async def main():
+        controller = AdmissionController(max_in_flight=1, max_queued=1, queue_timeout=5.0)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(controller, "get_wells", release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("get_wells"):
+                pass
+        assert rejected.value.reason == "queue_full"
+        release.set()
+        await asyncio.gather(*tasks)
+    asyncio.run(main())
+
+
+def test_session_limit_does_not_hold_global_slots():
+    async def main():
+        controller = AdmissionController(max_in_flight=2, max_in_flight_per_session=1, queue_timeout=0.05)
+        busy, other = _Session(), _Session()
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "get_wells", release, busy))
+        await asyncio.sleep(0)
+        # The busy session's second call waits on its session slot without taking the last global slot
+        waiting = asyncio.create_task(_hold(controller, "get_wells", asyncio.Event(), busy))
+        await asyncio.sleep(0)
+        async with controller.admit("get_wells", other):
+            assert controller.in_flight == 2
+        with pytest.raises(AdmissionRejected) as rejected:
+            await waiting
+        assert rejected.value.reason == "session"
+        release.set()
+        await holder
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+import pytest
+
+from wellsync_data.change_feed import RealtimeChangeFeed
+
+pytest.importorskip("realtime")
+
+
+@pytest.mark.parametrize("project_url", ["https://abc.supabase.co", "https://abc.supabase.co/"])
+def test_client_connects_to_the_realtime_endpoint(project_url):
+    feed = RealtimeChangeFeed(project_url, "anon-key", ["wells"], lambda table: None)
+    # The URL supabase-py's own realtime client uses
+    assert feed._client().url == "wss://abc.supabase.co/realtime/v1/websocket?apikey=anon-key"
+
+
+def test_local_stack_uses_plain_websockets():
+    feed = RealtimeChangeFeed("http://127.0.0.1:54321", "anon-key", ["wells"], lambda table: None)
+    assert feed._client().url == "ws://127.0.0.1:54321/realtime/v1/websocket?apikey=anon-key"
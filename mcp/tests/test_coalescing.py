@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from custom_mcp_tools.coalescing import SingleFlight, coalesce_key
+
+
+def test_coalesce_key_ignores_order_and_defaulted_arguments():
+    assert coalesce_key("get_wells", {"camp": "North", "status": "active", "limit": None}) == \
+        coalesce_key("get_wells", {"status": "active", "camp": "North"})
+    assert coalesce_key("get_wells", None) == coalesce_key("get_wells", {})
+    assert coalesce_key("get_wells", {"camp": "North"}) != coalesce_key("get_faults", {"camp": "North"})
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    collapsed = []
+
+    async def main():
+        flight = SingleFlight(on_collapse=collapsed.append)
+        runs = []
+        release = asyncio.Event()
+
+        async def work():
+            runs.append(1)
+            await release.wait()
+            return {"rows": len(runs)}
+
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(flight) == 1
+        release.set()
+        results = await asyncio.gather(*callers)
+        assert results == [{"rows": 1}] * 5
+        assert len(runs) == 1
+        assert (flight.hits, flight.collapses, len(flight)) == (4, 1, 0)
+        # Nothing is cached: the next call runs again
+        assert await flight.do("k", work) == {"rows": 2}
+
+    asyncio.run(main())
+    assert collapsed == ["k"]
+
+
+def test_different_keys_run_separately():
+    async def main():
+        flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        assert await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2))) == [1, 2]
+        assert flight.hits == 0
+
+    asyncio.run(main())
+
+
+def test_every_waiter_gets_the_exception():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert [str(r) for r in results] == ["upstream down"] * 3
+        assert len(flight) == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
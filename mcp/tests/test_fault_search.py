@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from wellsync_data.fault_search import (
+    EmbeddingCache,
+    HashingEmbedder,
+    VectorIndex,
+    fault_document,
+    normalize_query,
+    parse_vector,
+    vector_literal,
+)
+
+# VectorIndex needs numpy; the other helpers do not, but keep the module together
+pytest.importorskip("numpy")
+
+
+class _CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.calls = 0
+
+    async def embed(self, texts, input_type):
+        self.calls += 1
+        return await super().embed(texts, input_type)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dimensions=64)
+    vector = embedder.embed_one("Pump seal leak at the wellhead")
+    assert vector == embedder.embed_one("pump SEAL leak at the wellhead")
+    assert sum(v * v for v in vector) == pytest.approx(1.0)
+    assert embedder.embed_one("") == [0.0] * 64
+
+
+def test_vector_text_round_trip():
+    vector = [0.1, -0.25, 3.0]
+    assert parse_vector(vector_literal(vector)) == pytest.approx(vector)
+    assert parse_vector("[1,2]") == [1, 2]
+    assert parse_vector((1.0, 2.0)) == [1.0, 2.0]
+
+
+def test_fault_document():
+    assert fault_document({"fault_type": "Leak", "description": "Seal worn"}) == "Fault Type: Leak. Seal worn"
+    assert fault_document({}) == "Fault Type: Unknown."
+
+
+def test_embedding_cache_reuses_query_vectors():
+    embedder = _CountingEmbedder()
+    cache = EmbeddingCache(max_entries=2)
+
+    async def main():
+        first = await cache.embed_query(embedder, "Pump  seal leak")
+        again = await cache.embed_query(embedder, "pump seal LEAK ")
+        assert again is first
+        await cache.embed_query(embedder, "motor overheating")
+        await cache.embed_query(embedder, "valve stuck")
+
+    asyncio.run(main())
+    assert normalize_query(" Pump  seal LEAK ") == "pump seal leak"
+    assert embedder.calls == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+    # The oldest question was evicted
+    assert len(cache) == 2
+    assert cache.get(("local-hashing-v1", "search_query", "pump seal leak")) is None
+
+
+def _index(fault_ids, embeddings, **kwargs) -> VectorIndex:
+    async def loader():
+        return fault_ids, embeddings
+    return VectorIndex(loader, **kwargs)
+
+
+def test_search_returns_the_nearest_faults_first():
+    # Embeddings arrive as PostgREST's pgvector text
+    rows = {"f1": [1, 0, 0], "f2": [0.9, 0.1, 0], "f3": [0, 1, 0], "f4": [0, 0, 0]}
+    index = _index(list(rows), [json.dumps(v) for v in rows.values()])
+    asyncio.run(index.refresh())
+    assert index.ready and len(index) == 4
+    results = asyncio.run(index.asearch([2, 0, 0], limit=3, threshold=0.0))
+    assert [fault_id for fault_id, _ in results] == ["f1", "f2"]
+    assert results[0][1] == pytest.approx(1.0)
+    assert index.search([1, 0, 0], limit=3, threshold=0.0, exclude="f1")[0][0] == "f2"
+    assert index.search([0, 0, 0], limit=3, threshold=0.0) == []
+    assert index.vector("f3").tolist() == [0, 1, 0]
+
+
+def test_refresh_skips_tables_over_the_row_limit():
+    index = _index(["f1", "f2"], [[1, 0], [0, 1]], max_rows=1)
+    asyncio.run(index.refresh())
+    assert not index.ready
+    assert index.search([1, 0], limit=1, threshold=0.0) == []
+
+
+def test_failed_refresh_keeps_the_previous_index():
+    index = _index(["f1"], [[1.0, 0.0]])
+    asyncio.run(index.refresh())
+
+    async def failing():
+        raise RuntimeError("timeout")
+    index._loader = failing
+    index.ttl_seconds = 0
+    assert index.is_stale()
+    asyncio.run(index.refresh())
+    assert index.search([1, 0], limit=1, threshold=0.0) == [("f1", pytest.approx(1.0))]
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from wellsync_data.fleet_snapshot import FleetSnapshot, SnapshotTable
+
+
+def _wells_table() -> SnapshotTable:
+    return SnapshotTable("wells", ("id", "name", "camp", "status"), key="id",
+                         indexed=("camp", "status"), sort_by=("name", "id"))
+
+
+def _well(i: int, camp: str = "North", status: str = "active", name: str | None = None) -> dict:
+    return {"id": f"w{i:02d}", "name": name or f"Well-{i:02d}", "camp": camp, "status": status}
+
+
+def test_find_uses_every_index_filter():
+    table = _wells_table()
+    table.replace_all([_well(1), _well(2, status="fault"), _well(3, camp="South", status="fault")])
+    assert [r["id"] for r in table.find(status="fault")] == ["w02", "w03"]
+    assert [r["id"] for r in table.find(camp="North", status="fault")] == ["w02"]
+    assert table.find(camp="West") == []
+    assert table.find(fields=("id",)) == [{"id": "w01"}, {"id": "w02"}, {"id": "w03"}]
+
+
+def test_update_moves_the_row_between_index_buckets():
+    table = _wells_table()
+    table.replace_all([_well(1), _well(2)])
+    assert table.upsert_many([_well(1, status="fault"), _well(2)]) == [_well(1, status="fault")]
+    assert [r["id"] for r in table.find(status="active")] == ["w02"]
+    assert [r["id"] for r in table.find(status="fault")] == ["w01"]
+    assert table.get("w01")["status"] == "fault"
+    assert len(table) == 2
+
+
+def test_page_walks_the_sort_order_with_filters():
+    table = _wells_table()
+    table.replace_all([_well(i, status="fault" if i % 2 else "active") for i in range(1, 8)])
+    rows, has_more = table.page(None, 2, status="fault")
+    assert [r["id"] for r in rows] == ["w01", "w03"] and has_more
+    last = rows[-1]
+    rows, has_more = table.page((last["name"], last["id"]), 2, status="fault")
+    assert [r["id"] for r in rows] == ["w05", "w07"] and not has_more
+
+
+def test_page_after_equal_names_uses_the_key():
+    table = _wells_table()
+    table.replace_all([_well(2, name="Same"), _well(1, name="Same"), _well(3, name="Other")])
+    rows, _ = table.page(None, 10)
+    assert [r["id"] for r in rows] == ["w03", "w01", "w02"]
+    rows, _ = table.page(("Same", "w01"), 10)
+    assert [r["id"] for r in rows] == ["w02"]
+    # An upsert rebuilds the sort order
+    table.upsert_many([_well(4, name="Aaa")])
+    rows, _ = table.page(None, 1)
+    assert rows[0]["id"] == "w04"
+
+
+def test_replace_all_reports_changes_and_deletions():
+    table = _wells_table()
+    table.replace_all([_well(1), _well(2), _well(3)])
+    changed = table.replace_all([_well(1), _well(2, status="fault"), _well(4)])
+    assert changed == [_well(2, status="fault"), _well(4), {**_well(3), "deleted": True}]
+    assert table.get("w03") is None
+    assert table.find(camp="North", status="active") == [_well(1), _well(4)]
+
+
+class _Source:
+    """A fake `fetch`: serves rows per table and records the `since` each call asked for."""
+
+    def __init__(self, rows: dict[str, list[dict]], failing: tuple[str, ...] = ()):
+        self.rows = rows
+        self.failing = failing
+        self.calls: list[tuple[str, str | None]] = []
+
+    async def __call__(self, table: SnapshotTable, since: str | None) -> list[dict]:
+        self.calls.append((table.name, since))
+        if table.name in self.failing:
+            raise RuntimeError(f"relation {table.name} does not exist")
+        rows = self.rows.get(table.name, [])
+        return [r for r in rows if since is None or r["last_updated"] >= since]
+
+
+def _stamped(row: dict, last_updated: str) -> dict:
+    return {**row, "last_updated": last_updated}
+
+
+def test_refresh_loads_then_polls_from_the_watermark():
+    source = _Source({
+        "wells": [_stamped(_well(1), "2025-04-21T10:00:00"), _stamped(_well(2), "2025-04-21T10:05:00")],
+    }, failing=("warehouses",))
+    snapshot = FleetSnapshot(source, overlap_seconds=30)
+    changes = []
+    snapshot.add_listener(lambda table, rows: changes.append((table, [r["id"] for r in rows])))
+
+    asyncio.run(snapshot.refresh())
+    assert len(snapshot.wells) == 2
+    assert snapshot.is_fresh
+    assert changes == [("wells", ["w01", "w02"])]
+    # A missing optional table does not fail the refresh, but reads of it never count as synced
+    assert snapshot.has_synced("wells", "inventory:P001")
+    assert not snapshot.has_synced("warehouses")
+
+    source.rows["wells"].append(_stamped(_well(3), "2025-04-21T10:06:00"))
+    source.calls.clear()
+    asyncio.run(snapshot.refresh())
+    assert ("wells", "2025-04-21T10:04:30") in source.calls
+    assert changes[-1] == ("wells", ["w03"])
+    assert len(snapshot.wells) == 3
+
+
+def test_has_synced_waits_for_a_sync_after_the_write():
+    snapshot = FleetSnapshot(_Source({}))
+    assert not snapshot.has_synced("wells")
+    asyncio.run(snapshot.refresh())
+    snapshot.mark_changed("inventory:P001")
+    assert not snapshot.has_synced("inventory:P001")
+    assert snapshot.has_synced("inventory:P002")
+    asyncio.run(snapshot.refresh())
+    assert snapshot.has_synced("inventory:P001")
+
+
+def test_a_failing_listener_does_not_stop_the_sync():
+    snapshot = FleetSnapshot(_Source({"parts": [{"part_id": "P001", "name": "Pump", "last_updated": "2025-04-21"}]}))
+
+    def broken(table, rows):
+        raise ValueError("boom")
+    snapshot.add_listener(broken)
+    asyncio.run(snapshot.refresh())
+    assert snapshot.parts.get("P001")["name"] == "Pump"
+
+
+def test_required_table_failure_is_raised():
+    snapshot = FleetSnapshot(_Source({}, failing=("wells",)))
+    with pytest.raises(RuntimeError):
+        asyncio.run(snapshot.refresh())
+    assert snapshot.age_seconds is None
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from wellsync_data.pagination import (
+    InvalidCursorError,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    page_result,
+    postgrest_timestamp,
+)
+
+
+def test_cursor_round_trip():
+    values = ["Well, \"North\" (1)", "550e8400-e29b-41d4-a716-446655440000"]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == values
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(["a"]), "eyJhIjoxfQ"])
+def test_bad_cursors_are_rejected(cursor):
+    # Garbage, a cursor with the wrong number of keys, and a JSON object instead of a list
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 2)
+
+
+def test_invalid_cursor_is_a_value_error():
+    assert issubclass(InvalidCursorError, ValueError)
+
+
+@pytest.mark.parametrize("limit, expected", [(None, 100), (0, 100), (-5, 100), (20, 20), (5000, 500)])
+def test_clamp_limit(limit, expected):
+    assert clamp_limit(limit, 100, 500) == expected
+
+
+def test_keyset_filter_ascending():
+    assert keyset_filter(("name", "id"), ("Well-01", "u1")) == 'name.gt."Well-01",and(name.eq."Well-01",id.gt."u1")'
+
+
+def test_keyset_filter_descending_quotes_reserved_characters():
+    assert keyset_filter(("timestamp", "fault_id"), ('2025-04-21T15:31:25.758', 'a"b\\c'), descending=True) == (
+        'timestamp.lt."2025-04-21T15:31:25.758",'
+        'and(timestamp.eq."2025-04-21T15:31:25.758",fault_id.lt."a\\"b\\\\c")'
+    )
+
+
+def test_page_result_last_page_has_no_cursor():
+    rows = [{"name": "a", "id": 1}, {"name": "b", "id": 2}]
+    assert page_result(rows, 2, ("name", "id")) == (rows, None)
+
+
+def test_page_result_trims_and_points_after_the_last_kept_row():
+    rows = [{"name": n, "id": i} for i, n in enumerate("abc")]
+    page, cursor = page_result(rows, 2, ("name", "id"))
+    assert page == rows[:2]
+    assert decode_cursor(cursor, 2) == ["b", 1]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-04-21T15:31:25.758000", "2025-04-21T15:31:25.758"),
+    ("2025-04-21 15:31:25", "2025-04-21T15:31:25"),
+    ("2025-04-21T17:31:25.5+02:00", "2025-04-21T15:31:25.5"),
+    (datetime(2025, 4, 21, 15, 31, 25, 10), "2025-04-21T15:31:25.00001"),
+    (datetime(2025, 4, 21, 13, 0, tzinfo=timezone(timedelta(hours=-2))), "2025-04-21T15:00:00"),
+])
+def test_postgrest_timestamp(value, expected):
+    assert postgrest_timestamp(value) == expected
@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from wellsync_data.postgres_backend import PostgresBackend, _to_json_value
+from wellsync_data.sqlite_replica import TABLES_BY_NAME, _stored_value
+
+
+@pytest.mark.parametrize("value, expected", [
+    # What PostgREST returns for the same TIMESTAMP values
+    (datetime(2025, 4, 21, 15, 31, 25, 758000), "2025-04-21T15:31:25.758"),
+    (datetime(2025, 4, 21, 15, 31, 25, 750000), "2025-04-21T15:31:25.75"),
+    (datetime(2025, 4, 21, 15, 31, 25), "2025-04-21T15:31:25"),
+    (datetime(2025, 4, 20, 8, 0, 0, 1), "2025-04-20T08:00:00.000001"),
+    # TIMESTAMPTZ keeps its UTC offset
+    (datetime(2025, 4, 21, 17, 31, 25, 500000, tzinfo=timezone(timedelta(hours=2))), "2025-04-21T15:31:25.5+00:00"),
+    (date(2025, 4, 21), "2025-04-21"),
+])
+def test_timestamps_are_formatted_like_postgrest(value, expected):
+    assert _to_json_value(value) == expected
+
+
+def test_timestamps_match_the_replica_format():
+    # A cursor issued while one backend answers must compare equal to the rows of another
+    value = datetime(2025, 4, 21, 15, 31, 25, 758000)
+    replica_text = _stored_value(TABLES_BY_NAME["faults"], "timestamp", "2025-04-21T15:31:25.758000")
+    assert _to_json_value(value) == replica_text
+
+
+def test_uuids_become_strings():
+    value = uuid.UUID("550e8400-e29b-41d4-a716-446655440000")
+    assert _to_json_value(value) == "550e8400-e29b-41d4-a716-446655440000"
+
+
+def _capturing_backend() -> tuple[PostgresBackend, list]:
+    """A backend whose queries are recorded instead of sent (no asyncpg or database needed)."""
+    backend = PostgresBackend("postgresql://unused")
+    calls = []
+
+    async def fetch(target, sql, *args):
+        calls.append((target, sql, args))
+        return []
+    backend._fetch = fetch
+    return backend, calls
+
+
+def test_wells_query_shape_is_fixed_per_filter_set():
+    backend, calls = _capturing_backend()
+    asyncio.run(backend.wells({"camp": "North", "status": "active", "ignored": "x"}, ("Well-01", "u1"), 51))
+    target, sql, args = calls[0]
+    assert target == "wells"
+    assert sql.endswith(
+        'FROM wells WHERE "status" = $1 AND "camp" = $2 AND ("name", "id") > ($3, $4::uuid) ORDER BY "name", "id" LIMIT $5'
+    )
+    assert args == ("active", "North", "Well-01", "u1", 51)
+    # Filter order follows WELL_FILTERS, not the caller's dict, so equal filter sets share one prepared statement
+    asyncio.run(backend.wells({"status": "active", "camp": "North"}, ("Well-01", "u1"), 51))
+    assert calls[1][1] == sql
+
+
+def test_wells_query_without_filters():
+    backend, calls = _capturing_backend()
+    asyncio.run(backend.wells({}, None, 10))
+    _, sql, args = calls[0]
+    assert sql.endswith('FROM wells ORDER BY "name", "id" LIMIT $1')
+    assert args == (10,)
+
+
+def test_faults_query_binds_timestamps_and_the_keyset():
+    backend, calls = _capturing_backend()
+    asyncio.run(backend.faults(
+        "550e8400-e29b-41d4-a716-446655440000", "2025-04-01", "2025-04-21T17:00:00+02:00", "Leak", None,
+        ("2025-04-21T15:31:25.758", "f1"), 21,
+    ))
+    target, sql, args = calls[0]
+    assert target == "faults"
+    assert sql.endswith(
+        'FROM faults WHERE "well_id" = $1::uuid AND "timestamp" >= $2 AND "timestamp" < $3 AND "fault_type" = $4 '
+        'AND ("timestamp", "fault_id") < ($5, $6::uuid) ORDER BY "timestamp" DESC, "fault_id" DESC LIMIT $7'
+    )
+    # Bounds and cursor values go to asyncpg as naive UTC datetimes
+    assert args == (
+        "550e8400-e29b-41d4-a716-446655440000",
+        datetime(2025, 4, 1),
+        datetime(2025, 4, 21, 15, 0),
+        "Leak",
+        datetime(2025, 4, 21, 15, 31, 25, 758000),
+        "f1",
+        21,
+    )
+
+
+def test_batch_inventory_is_one_query_over_an_array():
+    backend, calls = _capturing_backend()
+    asyncio.run(backend.inventory_many(("P001", "P002")))
+    assert calls == [(
+        "inventory",
+        'SELECT "part_id", "warehouse_id", "stock_level" FROM inventory WHERE "part_id" = ANY($1::text[])',
+        (["P001", "P002"],),
+    )]
+
+
+def test_faults_for_wells_ranks_every_well_in_one_query():
+    backend, calls = _capturing_backend()
+    asyncio.run(backend.faults_for_wells(["w1", "w2"], "2025-04-01", None, None, "P001", 6))
+    assert len(calls) == 1
+    target, sql, args = calls[0]
+    assert target == "faults"
+    assert 'row_number() OVER (PARTITION BY "well_id" ORDER BY "timestamp" DESC, "fault_id" DESC)' in sql
+    assert 'FROM faults WHERE "well_id" = ANY($1::uuid[]) AND "timestamp" >= $2 AND "part_id" = $3)' in sql
+    assert sql.endswith('WHERE "rank" <= $4 ORDER BY "well_id", "timestamp" DESC, "fault_id" DESC')
+    assert args == (["w1", "w2"], datetime(2025, 4, 1), "P001", 6)
@@ -0,0 +1,81 @@
+import types
+
+import pytest
+
+from custom_mcp_tools import result_cache
+from custom_mcp_tools.result_cache import MISS, CachePolicy, ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResultCache()
+    assert cache.put("k", "v", ttl_seconds=5)
+    clock[0] += 4.9
+    assert cache.get("k") == "v"
+    clock[0] += 0.1
+    assert cache.get("k") is MISS
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_zero_ttl_is_not_stored():
+    cache = ResultCache()
+    assert not cache.put("k", "v", ttl_seconds=0)
+    assert cache.get("k") is MISS
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    cache.get("a")
+    cache.put("c", 3, 60)
+    assert cache.get("b") is MISS
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResultCache()
+    cache.put("p1", 1, 60, ("inventory:P001",))
+    cache.put("p2", 2, 60, ("inventory:P002",))
+    cache.put("both", 3, 60, ("inventory:P001", "inventory:P002"))
+    assert cache.invalidate("inventory:P001") == 2
+    assert cache.get("p1") is MISS and cache.get("both") is MISS
+    assert cache.get("p2") == 2
+    # Dropped entries no longer hold their other tags
+    assert cache.invalidate("inventory:P002") == 1
+    assert cache.invalidations == 2
+
+
+def test_fill_started_before_an_invalidation_is_not_stored():
+    cache = ResultCache()
+    epoch = cache.epoch
+    cache.invalidate("faults")
+    assert not cache.put("k", "stale", 60, ("faults",), epoch=epoch)
+    assert cache.put("k", "fresh", 60, ("faults",), epoch=cache.epoch)
+
+
+def test_replacing_a_key_replaces_its_tags():
+    cache = ResultCache()
+    cache.put("k", 1, 60, ("a",))
+    cache.put("k", 2, 60, ("b",))
+    assert cache.invalidate("a") == 0
+    assert cache.get("k") == 2
+
+
+def test_policy_tags_and_cacheable():
+    fixed = CachePolicy(30, ("wells",))
+    assert fixed.tags_for({}, None) == ("wells",)
+    assert fixed.stores({"snapshot_age_seconds": 1})
+    computed = CachePolicy(30, lambda args, result: [f"inventory:{p}" for p in args["part_ids"]],
+                           cacheable=lambda result: "snapshot_age_seconds" not in result)
+    assert computed.tags_for({"part_ids": ["P1", "P2"]}, {}) == ("inventory:P1", "inventory:P2")
+    assert computed.stores({"status": "success"})
+    assert not computed.stores({"snapshot_age_seconds": 1})
@@ -0,0 +1,260 @@
+import asyncio
+
+import pytest
+
+from wellsync_data.pagination import postgrest_timestamp
+from wellsync_data.sqlite_replica import SqliteReplica
+
+WELL_ID = "550e8400-e29b-41d4-a716-446655440000"
+
+
+def _fault(i: int, timestamp: str) -> dict:
+    return {
+        "fault_id": f"f0000000-0000-0000-0000-{i:012d}",
+        "well_id": WELL_ID,
+        "part_id": "P001",
+        "fault_type": "Leak",
+        "description": f"fault {i}",
+        "timestamp": timestamp,
+    }
+
+
+# PostgREST trims trailing zeros from the fraction, and some rows share a timestamp
+FAULTS = [
+    _fault(1, "2025-04-21T15:31:25.758"),
+    _fault(2, "2025-04-21T15:31:25.758"),
+    _fault(3, "2025-04-21T15:31:25.75"),
+    _fault(4, "2025-04-21T15:31:25"),
+    _fault(5, "2025-04-21T15:31:24.9"),
+    _fault(6, "2025-04-20T08:00:00.000001"),
+]
+
+
+def _fetch(rows_by_table: dict[str, list[dict]], page_size: int = 2):
+    async def fetch(table, since):
+        rows = rows_by_table.get(table.name, [])
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+    return fetch
+
+
+@pytest.fixture
+def replica(tmp_path):
+    replica = SqliteReplica(str(tmp_path / "replica.db"), _fetch({"faults": FAULTS}))
+    asyncio.run(replica.sync())
+    yield replica
+    asyncio.run(replica.stop())
+
+
+def _page_through(replica: SqliteReplica, limit: int, **bounds) -> list[str]:
+    seen, after = [], None
+    for _ in range(len(FAULTS) + 1):
+        rows = asyncio.run(replica.faults(WELL_ID, bounds.get("since"), bounds.get("until"), None, None, after, limit))
+        seen.extend(r["fault_id"] for r in rows)
+        if len(rows) < limit:
+            return seen
+        after = (rows[-1]["timestamp"], rows[-1]["fault_id"])
+    raise AssertionError(f"pagination did not terminate: {seen}")
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_fault_pages_cover_fractional_second_rows_once(replica, limit):
+    expected = [r["fault_id"] for r in sorted(FAULTS, key=lambda r: (postgrest_timestamp(r["timestamp"]), r["fault_id"]), reverse=True)]
+    assert _page_through(replica, limit) == expected
+
+
+def test_since_bound_includes_row_at_the_bound(replica):
+    ids = _page_through(replica, 10, since="2025-04-21T15:31:25.758")
+    assert ids == [FAULTS[1]["fault_id"], FAULTS[0]["fault_id"]]
+
+
+def test_until_bound_excludes_row_at_the_bound(replica):
+    ids = _page_through(replica, 10, until="2025-04-21T15:31:25")
+    assert ids == [FAULTS[4]["fault_id"], FAULTS[5]["fault_id"]]
+
+
+def test_rows_come_back_in_postgrest_format(replica):
+    rows = asyncio.run(replica.faults(WELL_ID, None, None, None, None, None, 10))
+    assert {r["timestamp"] for r in rows} == {r["timestamp"] for r in FAULTS}
+
+
+def _well(i: int) -> dict:
+    return {"id": f"w{i}", "name": f"Well-{i:02d}", "status": "Operational", "last_updated": "2025-04-17T08:00:00"}
+
+
+def test_pages_are_stored_as_they_arrive(tmp_path):
+    stored_before_next_page = []
+
+    async def fetch(table, since):
+        if table.name != "wells":
+            return
+        for start in range(0, 6, 2):
+            if start:
+                stored_before_next_page.append(len(await replica.wells({}, None, 100)))
+            yield [_well(i) for i in range(start, start + 2)]
+
+    replica = SqliteReplica(str(tmp_path / "replica.db"), fetch)
+    asyncio.run(replica.sync())
+    assert stored_before_next_page == [2, 4]
+    asyncio.run(replica.stop())
+
+
+def test_full_refresh_drops_deleted_rows_and_reports_them(tmp_path):
+    rows = {"wells": [_well(i) for i in range(5)]}
+    changes = []
+    replica = SqliteReplica(str(tmp_path / "replica.db"), _fetch(rows), on_change=lambda table, r: changes.append((table, r)))
+    asyncio.run(replica.sync())
+    rows["wells"] = [_well(i) for i in range(5) if i != 2]
+    changes.clear()
+    asyncio.run(replica.sync(full=True))
+    assert [w["id"] for w in asyncio.run(replica.wells({}, None, 100))] == ["w0", "w1", "w3", "w4"]
+    assert ("wells", [_well(2)]) in [(t, [{k: r[k] for k in _well(2)} for r in removed]) for t, removed in changes]
+    asyncio.run(replica.stop())
+
+
+def test_backdated_fault_arrives_with_the_next_delta(tmp_path):
+    faults = [{**f, "last_updated": "2025-04-22T00:00:00"} for f in FAULTS]
+    sinces = []
+
+    async def fetch(table, since):
+        if table.name == "faults":
+            sinces.append(since)
+            yield [f for f in faults if since is None or f["last_updated"] >= since]
+
+    replica = SqliteReplica(str(tmp_path / "replica.db"), fetch, overlap_seconds=0)
+    asyncio.run(replica.sync())
+    # Reported late: older than every fault already copied, but stamped when it was inserted
+    faults.append({**_fault(7, "2025-01-01T00:00:00"), "last_updated": "2025-04-23T00:00:00"})
+    asyncio.run(replica.sync())
+    assert sinces == [None, "2025-04-22T00:00:00"]
+    rows = asyncio.run(replica.faults(WELL_ID, None, None, None, None, None, 100))
+    assert rows[-1]["fault_id"] == _fault(7, "")["fault_id"]
+    assert "last_updated" not in rows[-1]
+    asyncio.run(replica.stop())
+
+
+def test_wells_keyset_pages_with_filters_and_json_columns(tmp_path):
+    wells = [
+        {**_well(i), "name": "Same" if i in (3, 4) else f"Well-{i:02d}", "camp": "North" if i % 2 else "South",
+         "fault_details": {"codes": [i]}}
+        for i in range(6)
+    ]
+    replica = SqliteReplica(str(tmp_path / "replica.db"), _fetch({"wells": wells}))
+    asyncio.run(replica.sync())
+    seen, after = [], None
+    while True:
+        rows = asyncio.run(replica.wells({}, after, 2))
+        seen.extend(r["id"] for r in rows)
+        if len(rows) < 2:
+            break
+        after = (rows[-1]["name"], rows[-1]["id"])
+    assert seen == ["w3", "w4", "w0", "w1", "w2", "w5"]
+    north = asyncio.run(replica.wells({"camp": "North"}, ("Same", "w3"), 10))
+    assert [r["id"] for r in north] == ["w1", "w5"]
+    assert north[0]["fault_details"] == {"codes": [1]}
+    asyncio.run(replica.stop())
+
+
+def _outbox_replica(tmp_path, answers: list) -> tuple[SqliteReplica, list]:
+    forwarded = []
+
+    async def forward(kind, args):
+        forwarded.append((kind, args))
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    return SqliteReplica(str(tmp_path / "replica.db"), _fetch({}), forward=forward), forwarded
+
+
+def test_outbox_keeps_writes_while_the_link_is_down(tmp_path):
+    replica, forwarded = _outbox_replica(tmp_path, [ConnectionError("no route"), {"status": "success"}, {"status": "success"}])
+
+    async def main():
+        await replica.enqueue_write("order_part", {"part_id": "P001", "quantity": 1})
+        await replica.enqueue_write("dispatch_part", {"part_id": "P002", "quantity": 2})
+        assert await replica.forward_pending() == 0
+        assert replica.pending_writes == 2
+        first = (await replica.queued_writes())[-1]
+        assert (first["state"], first["attempts"], first["last_error"]) == ("pending", 1, "no route")
+        assert await replica.forward_pending() == 2
+        return await replica.queued_writes()
+
+    queued = asyncio.run(main())
+    # Replayed oldest first; the retried write is sent once the link is back
+    assert [kind for kind, _ in forwarded] == ["order_part", "order_part", "dispatch_part"]
+    assert [(w["kind"], w["state"]) for w in queued] == [("dispatch_part", "sent"), ("order_part", "sent")]
+    assert replica.pending_writes == 0 and replica.forwarded_writes == 2
+    asyncio.run(replica.stop())
+
+
+def test_outbox_never_replays_rejected_or_unknown_writes(tmp_path):
+    replica, forwarded = _outbox_replica(tmp_path, [
+        {"status": "error", "message": "Part not found"},
+        {"status": "error", "message": "Timed out", "outcome_unknown": True},
+    ])
+
+    async def main():
+        await replica.enqueue_write("order_part", {"part_id": "P404", "quantity": 1})
+        await replica.enqueue_write("order_part", {"part_id": "P001", "quantity": 1})
+        assert await replica.forward_pending() == 2
+        assert await replica.forward_pending() == 0
+        return await replica.queued_writes()
+
+    queued = asyncio.run(main())
+    assert len(forwarded) == 2
+    assert [w["state"] for w in queued] == ["unknown", "rejected"]
+    assert queued[1]["result"] == {"status": "error", "message": "Part not found"}
+    assert replica.rejected_writes == 2
+    asyncio.run(replica.stop())
+
+
+def test_pending_writes_survive_a_restart(tmp_path):
+    path = str(tmp_path / "replica.db")
+    replica = SqliteReplica(path, _fetch({}))
+    asyncio.run(replica.enqueue_write("order_part", {"part_id": "P001", "quantity": 1}))
+    asyncio.run(replica.stop())
+    reopened = SqliteReplica(path, _fetch({}))
+    assert reopened.pending_writes == 1
+    asyncio.run(reopened.stop())
+
+
+def test_parts_and_batch_inventory_are_served_locally(tmp_path):
+    rows = {
+        "parts": [
+            {"part_id": "P002", "name": "Valve", "specifications": {"psi": 500}, "last_updated": "2025-04-17T08:00:00"},
+            {"part_id": "P001", "name": "Pump", "specifications": None, "last_updated": "2025-04-17T08:00:00"},
+        ],
+        "inventory": [
+            {"id": i, "part_id": part_id, "warehouse_id": warehouse_id, "stock_level": stock, "last_updated": "2025-04-17T08:00:00"}
+            for i, (part_id, warehouse_id, stock) in enumerate([("P001", "WH1", 5), ("P001", "WH2", 0), ("P002", "WH1", 3), ("P003", "WH1", 9)])
+        ],
+    }
+    replica = SqliteReplica(str(tmp_path / "replica.db"), _fetch(rows))
+    asyncio.run(replica.sync())
+    parts = asyncio.run(replica.parts())
+    assert [p["part_id"] for p in parts] == ["P001", "P002"]
+    assert parts[1]["specifications"] == {"psi": 500}
+    inventory = asyncio.run(replica.inventory_many(["P001", "P002"]))
+    assert sorted((r["part_id"], r["warehouse_id"], r["stock_level"]) for r in inventory) == [
+        ("P001", "WH1", 5), ("P001", "WH2", 0), ("P002", "WH1", 3)
+    ]
+    assert asyncio.run(replica.inventory_many([])) == []
+    asyncio.run(replica.stop())
+
+
+def test_faults_for_wells_keeps_the_newest_per_well(tmp_path):
+    other = "660e8400-e29b-41d4-a716-446655440000"
+    faults = FAULTS + [{**_fault(10 + i, f"2025-04-1{i}T00:00:00"), "well_id": other} for i in range(3)]
+    replica = SqliteReplica(str(tmp_path / "replica.db"), _fetch({"faults": faults}))
+    asyncio.run(replica.sync())
+    rows = asyncio.run(replica.faults_for_wells([WELL_ID, other, "unknown"], None, None, None, None, 2))
+    assert [(r["well_id"], r["fault_id"][-2:]) for r in rows] == [
+        (WELL_ID, "02"), (WELL_ID, "01"), (other, "12"), (other, "11")
+    ]
+    # Same bounds as the single-well query
+    rows = asyncio.run(replica.faults_for_wells([WELL_ID], "2025-04-21T15:31:25", "2025-04-21T15:31:25.758", None, None, 10))
+    assert [r["fault_id"][-1] for r in rows] == ["3", "4"]
+    assert asyncio.run(replica.faults_for_wells([], None, None, None, None, 2)) == []
+    asyncio.run(replica.stop())
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from wellsync_data.well_resolver import WellResolver, normalize_well_name, parse_uuid
+
+WELLS = [
+    {"id": "550e8400-e29b-41d4-a716-446655440003", "name": "Well-03"},
+    {"id": "550e8400-e29b-41d4-a716-446655440013", "name": "Well-13"},
+    {"id": "550e8400-e29b-41d4-a716-446655440113", "name": "Well-113"},
+    {"id": "550e8400-e29b-41d4-a716-446655440020", "name": "Eagle Ford 7"},
+    # Two wells whose names normalize to the same key
+    {"id": "550e8400-e29b-41d4-a716-446655440031", "name": "Camp-A 1"},
+    {"id": "550e8400-e29b-41d4-a716-446655440032", "name": "camp a-01"},
+]
+
+
+def _resolver(rows=WELLS, **kwargs) -> tuple[WellResolver, list[int]]:
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return list(rows)
+    return WellResolver(loader, **kwargs), loads
+
+
+@pytest.mark.parametrize("name", ["Well-03", "well 3", "WELL_003", " well-3 "])
+def test_normalize_well_name(name):
+    assert normalize_well_name(name) == "well3"
+
+
+def test_parse_uuid():
+    assert parse_uuid("550E8400-E29B-41D4-A716-446655440003") == "550e8400-e29b-41d4-a716-446655440003"
+    assert parse_uuid("Well-03") is None
+    assert parse_uuid(None) is None
+
+
+@pytest.mark.parametrize("identifier, match", [
+    ("550e8400-e29b-41d4-a716-446655440003", "uuid"),
+    ("Well-03", "exact"),
+    ("well 003", "normalized"),
+    ("Wel-03", "fuzzy"),
+])
+def test_resolves_each_match_kind(identifier, match):
+    resolver, _ = _resolver()
+    result = resolver.resolve(identifier)
+    assert (result.match, result.well_id, result.name) == (match, WELLS[0]["id"], "Well-03")
+
+
+def test_fuzzy_matching_never_changes_the_number():
+    resolver, _ = _resolver()
+    assert resolver.resolve("Wel-113").name == "Well-113"
+    result = resolver.resolve("Wel-14")
+    assert not result.found and result.match == "not_found"
+
+
+def test_ambiguous_names_list_the_candidates():
+    resolver, _ = _resolver()
+    result = resolver.resolve("CAMP A 1")
+    assert result.match == "ambiguous"
+    assert not result.found
+    assert result.suggestions == ("Camp-A 1", "camp a-01")
+    # The exact spelling still resolves
+    assert resolver.resolve("Camp-A 1").well_id == WELLS[4]["id"]
+
+
+def test_resolve_many_loads_once_and_keys_by_identifier():
+    resolver, loads = _resolver(miss_refresh_seconds=60)
+    results = resolver.resolve_many(["Well-03", "well 13", "Well-03", "nope"])
+    assert list(results) == ["Well-03", "well 13", "nope"]
+    assert results["well 13"].name == "Well-13"
+    assert results["nope"].match == "not_found"
+    assert len(loads) == 1
+
+
+def test_unknown_name_triggers_an_early_reload():
+    rows = list(WELLS)
+    resolver, loads = _resolver(rows, miss_refresh_seconds=0)
+    resolver.resolve("Well-03")
+    rows.append({"id": "550e8400-e29b-41d4-a716-446655440099", "name": "Well-99"})
+    assert resolver.resolve("Well-99").found
+    assert len(loads) == 2
+
+
+def test_failed_refresh_keeps_the_previous_index():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("down")
+        return WELLS
+    resolver = WellResolver(loader, ttl_seconds=60)
+    assert resolver.resolve("Well-03").found
+    resolver.invalidate()
+    assert resolver.resolve("Well-13").found
+    assert len(calls) == 2
+
+
+def test_first_load_failure_is_raised():
+    def loader():
+        raise RuntimeError("down")
+    with pytest.raises(RuntimeError):
+        WellResolver(loader).resolve("Well-03")
+
+
+def test_aresolve_many_only_hands_reloads_to_run_blocking():
+    resolver, loads = _resolver(miss_refresh_seconds=60)
+    handed = []
+
+    async def run_blocking(fn, *args):
+        handed.append(fn.__name__)
+        return fn(*args)
+
+    async def main():
+        first = await resolver.aresolve_many(["Well-03"], run_blocking)
+        second = await resolver.aresolve("Well-13", run_blocking)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first["Well-03"].found and second.found
+    assert handed == ["_refresh"]
+    assert len(loads) == 1
@@ -1,18 +1,49 @@
+import asyncio
 import os
+import threading
+import time
+from datetime import datetime
 from dotenv import load_dotenv
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Literal
+from pydantic import BaseModel, Field
+from custom_mcp_tools.admission import AdmissionController, parse_limits
 from custom_mcp_tools.auth_utils import AuthorizedMCP
-from supabase import create_client, Client, ClientOptions
+from custom_mcp_tools.http_client import PooledHTTPClient
+from custom_mcp_tools.logging_utils import configure_logging, parse_sample_rates, summarize, tool_logger
+from custom_mcp_tools.result_cache import CachePolicy, ResultCache
+from custom_mcp_tools.serialization import RESULT_FORMATS, dumps, shape_rows
+from wellsync_data.change_feed import RealtimeChangeFeed
+from wellsync_data.fault_search import CohereEmbedder, Embedder, EmbeddingCache, HashingEmbedder, VectorIndex, parse_vector
+from wellsync_data.fleet_snapshot import FleetSnapshot, SnapshotTable
+from wellsync_data.pagination import InvalidCursorError, clamp_limit, decode_cursor, encode_cursor, keyset_filter, page_result
+from wellsync_data.postgres_backend import PostgresBackend
+from wellsync_data.sourcing import DistanceIndex, distances_from, rank_sources
+from wellsync_data.sqlite_replica import ReplicaTable, SqliteReplica
+from wellsync_data.supabase_executor import SupabaseExecutor
+from wellsync_data.well_resolver import WellMatch, WellResolver, parse_uuid
 from loguru import logger
-import uuid # Import uuid library
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 import httpx # Import httpx
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 # --- Load Environment Variables ---
 load_dotenv() # Load variables from .env file in the current directory (mcp/)
 
+# --- Logging ---
+# Non-blocking (enqueued) sink; LOG_SAMPLE_RATES="get_wells=0.1,..." samples info logs per tool
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    json=os.getenv("LOG_JSON", "false").lower() == "true",
+    sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES")),
+    default_sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+)
+
 # --- Configuration ---
 MCP_NAME = "wellsync"
-MCP_PORT = 3003  # Different port than og_demo
+MCP_PORT = int(os.getenv("MCP_PORT", "3003"))  # Different port than og_demo
 AUTH_SECRET = os.getenv("AUTH_SECRET", "wellsync-secret") # Default if not in .env
 NEXTJS_APP_URL = os.getenv("NEXTJS_APP_URL", "http://localhost:3000") # URL of the running Next.js app
 
@@ -23,52 +54,350 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Supabase URL and Key must be set in the .env file")
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    SUPABASE_URL, 
-    SUPABASE_KEY,
-    options=ClientOptions(
-        headers={ "Accept": "application/json" } 
-    )
-)
+# "postgres" serves get_wells, get_faults_by_well, get_part_inventory and the well index straight from
+# Postgres (DATABASE_URL) instead of through PostgREST; "sqlite" serves them from a local replica file
+# (REPLICA_PATH) and queues orders/dispatches while the link is down. Everything else always uses Supabase
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase").lower()
+DATABASE_URL = os.getenv("DATABASE_URL")
+REPLICA_PATH = os.getenv("REPLICA_PATH", "wellsync_replica.db")
+
+# Supabase client is created on first use, so importing this module (and opening the SSE port)
+# never waits on the supabase package import or the network.
+_supabase: "Client | None" = None
+_supabase_lock = threading.Lock()
+
+def get_supabase() -> "Client":
+    """Returns the shared Supabase client, creating it on first call (thread-safe)."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                from supabase import create_client, ClientOptions
+                _supabase = create_client(
+                    SUPABASE_URL, 
+                    SUPABASE_KEY,
+                    options=ClientOptions(
+                        headers={ "Accept": "application/json" } 
+                    )
+                )
+    return _supabase
 
-# --- Basic Validation ---
-try:
-    # Try a simple query to validate connection and credentials
-    supabase.table('wells').select('id', head=True).limit(1).execute()
-    print("Supabase connection successful!")
-except Exception as e:
-    print(f"Error connecting to Supabase: {e}")
-    # Optionally raise the error or exit if connection is critical for startup
-    # raise e 
+# Results of read tools and resources, kept per tool TTL and dropped by tag (e.g. inventory:P001)
+# when an order or dispatch succeeds
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_WELLS = float(os.getenv("CACHE_TTL_WELLS_SECONDS", "30"))
+CACHE_TTL_INVENTORY = float(os.getenv("CACHE_TTL_INVENTORY_SECONDS", "30"))
+CACHE_TTL_FAULTS = float(os.getenv("CACHE_TTL_FAULTS_SECONDS", "15"))
+CACHE_TTL_FAULT_SUMMARY = float(os.getenv("CACHE_TTL_FAULT_SUMMARY_SECONDS", "60"))
+CACHE_TTL_FAULT_SEARCH = float(os.getenv("CACHE_TTL_FAULT_SEARCH_SECONDS", "300"))
+CACHE_TTL_PARTS = float(os.getenv("CACHE_TTL_PARTS_SECONDS", "600"))
+
+# In-memory fleet tables (see Fleet Snapshot below); resource subscriptions are notified from its
+# change detection, so they are only offered when it is enabled
+FLEET_SNAPSHOT_ENABLED = os.getenv("FLEET_SNAPSHOT_ENABLED", "true").lower() == "true"
+RESOURCE_SUBSCRIPTIONS_ENABLED = FLEET_SNAPSHOT_ENABLED and os.getenv("RESOURCE_SUBSCRIPTIONS_ENABLED", "true").lower() == "true"
+
+# Admission control (0 = unlimited): open SSE sessions, calls running in total and per session, and
+# per-tool caps such as TOOL_CONCURRENCY_LIMITS="dispatch_part=4,bulk_fulfill=2". Calls over a limit wait
+# up to ADMISSION_QUEUE_TIMEOUT seconds (while at most ADMISSION_MAX_QUEUED wait) and then get a busy error.
+admission = AdmissionController(
+    max_sessions=int(os.getenv("MAX_SSE_SESSIONS", "256")),
+    max_in_flight=int(os.getenv("MAX_IN_FLIGHT_CALLS", "128")),
+    max_in_flight_per_session=int(os.getenv("MAX_IN_FLIGHT_CALLS_PER_SESSION", "16")),
+    tool_limits=parse_limits(os.getenv("TOOL_CONCURRENCY_LIMITS", "dispatch_part=8,order_part=8,find_best_source=8,bulk_fulfill=2")),
+    max_queued=int(os.getenv("ADMISSION_MAX_QUEUED", "256")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5")),
+)
 
 # Initialize MCP server
 mcp = AuthorizedMCP(
     MCP_NAME,
     debug=True,
     port=MCP_PORT,
-    auth_secret=AUTH_SECRET
+    auth_secret=AUTH_SECRET,
+    # /metrics needs the same Authorization header as every other route (a scraper can send it as a static
+    # header). METRICS_PUBLIC=true serves it without one: only for a scraper on a private network, with the
+    # port not reachable from outside it
+    public_metrics=os.getenv("METRICS_PUBLIC", "false").lower() == "true",
+    # Concurrent identical read-tool calls (coalesce=True below) and resource reads share one backend query;
+    # order_part, dispatch_part and bulk_fulfill never opt in
+    coalesce=os.getenv("COALESCE_READS", "true").lower() == "true",
+    result_cache=ResultCache(max_entries=RESULT_CACHE_MAX_ENTRIES) if RESULT_CACHE_ENABLED else None,
+    subscriptions=RESOURCE_SUBSCRIPTIONS_ENABLED,
+    admission=admission,
 )
 
+# All supabase-py calls go through this bounded pool so blocking PostgREST round-trips never
+# stall the event loop serving SSE sessions.
+db = SupabaseExecutor(
+    max_workers=int(os.getenv("SUPABASE_MAX_WORKERS", "8")),
+    max_pending=int(os.getenv("SUPABASE_MAX_PENDING", "64")),
+    queue_timeout=float(os.getenv("SUPABASE_QUEUE_TIMEOUT", "5")),
+    observe=lambda target, seconds, ok: mcp.observe_backend("supabase", target, seconds, ok),
+)
+mcp.on_shutdown(db.shutdown)
+mcp.metrics.gauge("supabase_calls_queued", "Supabase calls waiting for a worker slot.", callback=lambda: db.pending)
+mcp.metrics.gauge("supabase_calls_in_flight", "Supabase calls running on the pool.", callback=lambda: db.in_flight)
+
+postgres: PostgresBackend | None = None
+if DATA_BACKEND == "postgres":
+    _postgres = PostgresBackend(
+        DATABASE_URL,
+        min_size=int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1")),
+        max_size=int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+        # 0 when DATABASE_URL goes through a transaction-mode pooler, which cannot keep prepared statements
+        statement_cache_size=int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "100")),
+        command_timeout=float(os.getenv("POSTGRES_COMMAND_TIMEOUT", "10")),
+        observe=lambda target, seconds, ok: mcp.observe_backend("postgres", target, seconds, ok),
+    )
+    if not DATABASE_URL:
+        logger.error("DATA_BACKEND=postgres needs DATABASE_URL; using Supabase for every query")
+    elif not _postgres.available:
+        logger.error("DATA_BACKEND=postgres needs the asyncpg package; using Supabase for every query")
+    else:
+        postgres = _postgres
+        mcp.on_startup(postgres.start)
+        mcp.on_shutdown(postgres.stop)
+        mcp.metrics.gauge("postgres_connections_in_use", "Postgres pool connections running a query.", callback=lambda: postgres.in_use)
+elif DATA_BACKEND not in ("supabase", "sqlite"):
+    logger.error("Unknown DATA_BACKEND '{}'; using Supabase", DATA_BACKEND)
+
+# --- Startup Health Check ---
+
+# Result of the background Supabase check, served by the public /ready endpoint
+supabase_health: dict[str, Any] = {"status": "starting", "checked_at": None, "error": None}
+_health_check_task: asyncio.Task | None = None
+
+async def _check_supabase_health() -> None:
+    """Validates the connection and credentials in the background, retrying with backoff until it succeeds."""
+    delay = 1.0
+    while True:
+        try:
+            # Build the client on the executor too: importing supabase-py takes a noticeable moment
+            client = await db.call(get_supabase)
+            await db.execute(client.table('wells').select('id', head=True).limit(1))
+            supabase_health.update(status="ready", checked_at=time.time(), error=None)
+            logger.info("Supabase connection successful!")
+            return
+        except Exception as e:
+            supabase_health.update(status="unavailable", checked_at=time.time(), error=str(e))
+            logger.warning("Error connecting to Supabase, retrying in {:.0f}s: {}", delay, e)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+@mcp.on_startup
+async def _start_health_check() -> None:
+    global _health_check_task
+    _health_check_task = asyncio.create_task(_check_supabase_health())
+
+@mcp.on_shutdown
+async def _stop_health_check() -> None:
+    if _health_check_task is not None:
+        _health_check_task.cancel()
+
+@mcp.custom_route("/ready", methods=["GET"], public=True)
+async def readiness(request: Request) -> JSONResponse:
+    """Readiness probe: 200 once Supabase has answered, 503 until then."""
+    return JSONResponse(supabase_health, status_code=200 if supabase_health["status"] == "ready" else 503)
+
+# --- Well Identifier Resolution ---
+
+def _load_well_index_rows() -> list[dict]:
+    if replica is not None and replica.ready:
+        return replica.well_index_rows()
+    if postgres is not None and postgres.loop is not None:
+        # Runs on an executor thread; the pool belongs to the event loop
+        return asyncio.run_coroutine_threadsafe(postgres.well_index(), postgres.loop).result()
+    # Paged like the snapshot loads: one unpaged select stops at PostgREST's max rows
+    return _select_all_rows('wells', ('id', 'name'), 'id')
+
+# In-memory name <-> UUID index shared by every tool that accepts a well name or UUID
+well_resolver = WellResolver(
+    _load_well_index_rows,
+    ttl_seconds=float(os.getenv("WELL_INDEX_TTL_SECONDS", "300")),
+)
+
+def _well_not_found_error(match: WellMatch, message: str) -> dict[str, Any]:
+    """Builds the error payload for an identifier the resolver could not map to a single well."""
+    if match.match == "ambiguous":
+        message = f"Well name '{match.identifier}' matches more than one well: {', '.join(match.suggestions)}."
+    result = {"status": "error", "message": message, "well_identifier": match.identifier}
+    if match.suggestions:
+        result["suggestions"] = list(match.suggestions)
+    return result
+
+async def resolve_well(identifier: str) -> WellMatch:
+    """Resolves a well UUID or name from memory, reloading the index on the executor when needed."""
+    return await well_resolver.aresolve(identifier, db.call)
+
+# --- Fleet Snapshot ---
+
+SNAPSHOT_FETCH_PAGE_SIZE = 1000 # PostgREST caps rows per request, so snapshot loads page by primary key
+
+def _row_page_query(table: str, columns: tuple[str, ...], key: str, since: str | None, watermark: str, last_key: Any):
+    query = get_supabase().table(table).select(','.join(columns)).order(key).limit(SNAPSHOT_FETCH_PAGE_SIZE)
+    if since:
+        query = query.gte(watermark, since)
+    if last_key is not None:
+        query = query.gt(key, last_key)
+    return query
+
+def _select_all_rows(table: str, columns: tuple[str, ...], key: str) -> list[dict]:
+    """Blocking `_fetch_rows` for code already on an executor thread (which must not wait on another slot)."""
+    rows, last_key = [], None
+    while True:
+        page = _row_page_query(table, columns, key, None, 'last_updated', last_key).execute().data or []
+        rows.extend(page)
+        if len(page) < SNAPSHOT_FETCH_PAGE_SIZE:
+            return rows
+        last_key = page[-1][key]
+
+async def _fetch_row_pages(
+    table: str, columns: tuple[str, ...], key: str, since: str | None = None, watermark: str = 'last_updated'
+) -> AsyncIterator[list[dict]]:
+    """Yields all rows of a table (or those with `watermark` at or after `since`) in primary-key pages."""
+    last_key = None
+    while True:
+        page = (await db.execute(_row_page_query(table, columns, key, since, watermark, last_key))).data or []
+        if page:
+            yield page
+        if len(page) < SNAPSHOT_FETCH_PAGE_SIZE:
+            return
+        last_key = page[-1][key]
+
+async def _fetch_rows(
+    table: str, columns: tuple[str, ...], key: str, since: str | None = None, watermark: str = 'last_updated'
+) -> list[dict]:
+    """Loads all rows of a table (or those with `watermark` at or after `since`)."""
+    return [row async for page in _fetch_row_pages(table, columns, key, since, watermark) for row in page]
+
+async def _fetch_snapshot_rows(table: SnapshotTable, since: str | None) -> list[dict]:
+    return await _fetch_rows(table.name, table.columns, table.key, since)
+
+# In-memory copy of wells/parts/inventory kept fresh by delta polling; read tools fall back to
+# Supabase whenever it is disabled, not loaded yet, or older than FLEET_SNAPSHOT_MAX_STALENESS.
+fleet_snapshot: FleetSnapshot | None = None
+if FLEET_SNAPSHOT_ENABLED:
+    fleet_snapshot = FleetSnapshot(
+        _fetch_snapshot_rows,
+        poll_seconds=float(os.getenv("FLEET_SNAPSHOT_POLL_SECONDS", "15")),
+        full_refresh_seconds=float(os.getenv("FLEET_SNAPSHOT_FULL_REFRESH_SECONDS", "600")),
+        max_staleness_seconds=float(os.getenv("FLEET_SNAPSHOT_MAX_STALENESS", "120")),
+    )
+    mcp.on_startup(fleet_snapshot.start)
+    mcp.on_shutdown(fleet_snapshot.stop)
+
+def _snapshot_usable(*tags: str) -> bool:
+    """Whether a read may be answered from the snapshot: fresh, and caught up with our own writes to `tags`."""
+    return fleet_snapshot is not None and fleet_snapshot.is_fresh and fleet_snapshot.has_synced(*tags)
+
+def _invalidate_after_write(part_id: str, well_id: str) -> None:
+    """Drops cached results and snapshot reads an order or dispatch may have made stale."""
+    tags = (f"inventory:{part_id}", f"well:{well_id}")
+    mcp.invalidate(*tags)
+    if fleet_snapshot is not None:
+        fleet_snapshot.mark_changed(*tags)
+        # Pick the change up now, so subscribers hear about it without waiting for the next poll
+        fleet_snapshot.wake()
+    if replica is not None:
+        replica.wake()
+
+def _snapshot_info() -> dict[str, Any]:
+    """Response fields describing a snapshot-served answer."""
+    return {"source": "snapshot", "snapshot_age_seconds": round(fleet_snapshot.age_seconds, 3)}
+
+def _direct_backend() -> "PostgresBackend | SqliteReplica | None":
+    """Where the hot reads go instead of PostgREST: the field replica once loaded, else the Postgres pool."""
+    if replica is not None and replica.ready:
+        return replica
+    return postgres
+
+def _without_live_age(result: Any) -> bool:
+    """Cache predicate: snapshot/replica answers report their age at the time of the call, so they are not stored."""
+    return not (isinstance(result, dict) and ("snapshot_age_seconds" in result or "replica_age_seconds" in result))
+
+def _backend_info(backend: Any) -> dict[str, Any]:
+    """Response fields describing a replica-served answer (how far behind Supabase it may be)."""
+    if backend is None or backend is not replica:
+        return {}
+    return {"source": "replica", "replica_age_seconds": round(replica.age_seconds(), 3), "replica_online": replica.online}
+
 # --- Query Tools ---
 
+WELL_COLUMNS = ("id", "name", "camp", "formation", "latitude", "longitude", "status", "last_maintenance", "fault_details", "last_updated")
+WELLS_CURSOR_COLUMNS = ("name", "id") # Keyset order for get_wells pagination
+WELLS_DEFAULT_PAGE_SIZE = int(os.getenv("WELLS_DEFAULT_PAGE_SIZE", "100"))
+WELLS_MAX_PAGE_SIZE = int(os.getenv("WELLS_MAX_PAGE_SIZE", "500"))
+
+def _select_columns(fields: list[str] | None, allowed: tuple[str, ...], required: tuple[str, ...]) -> str:
+    """
+    Builds a PostgREST select list from the requested fields, always including the `required`
+    (cursor) columns. Raises ValueError for unknown fields.
+    """
+    if not fields:
+        return '*'
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s) {unknown}. Allowed fields: {list(allowed)}")
+    return ','.join(dict.fromkeys([*required, *fields]))
+
+def _project(rows: list[dict], projection: list[str] | None) -> list[dict]:
+    """Keeps only the selected columns of full rows (the Postgres backend always selects every column)."""
+    if projection is None:
+        return rows
+    return [{c: row[c] for c in projection} for row in rows]
+
+def _check_format(format: str | None) -> None:
+    if format not in (None, *RESULT_FORMATS):
+        raise ValueError(f"Unknown format '{format}'. Allowed formats: {list(RESULT_FORMATS)}")
+
+# Shared by the list tools' descriptions
+FORMAT_DESCRIPTION = (
+    "Set format='columnar' to get data as {columns: [...], rows: [[...]]} instead of one object per row, "
+    "which is much smaller for long listings."
+)
+
 @mcp.tool(
     name="get_wells",
-    description="Retrieves wells from the database, optionally filtering by status, camp, and formation.",
+    description=(
+        "Retrieves wells from the database, optionally filtering by status, camp, and formation. "
+        "Results are paginated by name: pass the returned next_cursor as 'after' to get the next page. "
+        "Use 'fields' to return only some columns (id and name are always included). "
+        f"'limit' defaults to {WELLS_DEFAULT_PAGE_SIZE} and is capped at {WELLS_MAX_PAGE_SIZE}. "
+        + FORMAT_DESCRIPTION
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_WELLS, ("wells",), cacheable=_without_live_age),
 )
-def get_wells(
+async def get_wells(
     status: str = None,
     camp: str = None,
-    formation: str = None
+    formation: str = None,
+    fields: list[str] = None,
+    after: str = None,
+    limit: int = None,
+    format: str = None
 ) -> dict[str, Any]:
     """
-    Retrieves wells from the database that match the specified filter criteria.
+    Retrieves one page of wells that match the specified filter criteria.
     """
 
-    logger.info(f"Getting wells request with status: {status}, camp: {camp}, formation: {formation}")
+    log = tool_logger("get_wells")
+    log.info(
+        "Getting wells request with status: {status}, camp: {camp}, formation: {formation}, after: {after}, limit: {limit}",
+        status=status, camp=camp, formation=formation, after=after, limit=limit
+    )
+
+    page_size = clamp_limit(limit, WELLS_DEFAULT_PAGE_SIZE, WELLS_MAX_PAGE_SIZE)
+    try:
+        columns = _select_columns(fields, WELL_COLUMNS, WELLS_CURSOR_COLUMNS)
+        cursor_values = decode_cursor(after, len(WELLS_CURSOR_COLUMNS)) if after else None
+        _check_format(format)
+    except (ValueError, InvalidCursorError) as e:
+        return {"status": "error", "message": str(e)}
+    projection = None if columns == '*' else columns.split(',')
 
-    query = supabase.table('wells').select('*').order('name') # Default sort by name
-    
     applied_filters = {}
     # Apply filters if provided and not 'all' (case-insensitive)
     if status and status.lower() != 'all':
@@ -79,213 +408,746 @@ def get_wells(
             
         # Capitalize status to match expected DB values (e.g., 'fault' -> 'Fault')
         formatted_status = db_status.capitalize()
-        query = query.eq('status', formatted_status)
         applied_filters['status'] = formatted_status
         
     if camp and camp.lower() != 'all':
         # Assuming camp names are stored capitalized in DB
         formatted_camp = camp.capitalize()
-        query = query.eq('camp', formatted_camp)
         applied_filters['camp'] = formatted_camp
         
     if formation and formation.lower() != 'all':
         # Handle potential multi-word formations (e.g., "bone spring" -> "Bone Spring")
         formatted_formation = ' '.join(word.capitalize() for word in formation.split())
-        query = query.eq('formation', formatted_formation)
         applied_filters['formation'] = formatted_formation
     
-    logger.info(f"Executing query for filters: {applied_filters}")
+    if _snapshot_usable("wells"):
+        # Served from memory via the status/camp/formation indexes
+        rows, has_more = fleet_snapshot.wells.page(cursor_values, page_size, projection, **applied_filters)
+        log.info("Served {count} wells from snapshot for filters: {filters}", count=len(rows), filters=applied_filters)
+        return {
+            "status": "success",
+            "data": shape_rows(rows, format, projection or fleet_snapshot.wells.columns),
+            "count": len(rows),
+            "filters": applied_filters,
+            "next_cursor": encode_cursor([rows[-1][c] for c in WELLS_CURSOR_COLUMNS]) if has_more else None,
+            **_snapshot_info()
+        }
+
+    log.info("Executing query for filters: {filters}", filters=applied_filters)
 
+    backend = _direct_backend()
     try:
-        response = query.execute()
-        logger.info(f"Response: {response}")
-        logger.info(f"Response data count: {len(response.data) if response.data else 0}")
+        if backend is not None:
+            fetched = _project(await backend.wells(applied_filters, cursor_values, page_size + 1), projection)
+        else:
+            # Keyset order on (name, id) so pages stay stable even if names repeat
+            query = get_supabase().table('wells').select(columns).order('name').order('id').limit(page_size + 1)
+            if cursor_values:
+                query = query.or_(keyset_filter(WELLS_CURSOR_COLUMNS, cursor_values))
+            for column, value in applied_filters.items():
+                query = query.eq(column, value)
+            fetched = (await db.execute(query)).data or []
+        rows, next_cursor = page_result(fetched, page_size, WELLS_CURSOR_COLUMNS)
+        log.info("Response data count: {count}, has more: {has_more}", count=len(rows), has_more=next_cursor is not None)
+        # Full rows only when debug logging is on, and only formatted then
+        log.opt(lazy=True).debug("Response rows: {}", lambda: rows)
         return {
             "status": "success",
-            "data": response.data,
-            "count": len(response.data),
-            "filters": applied_filters
+            "data": shape_rows(rows, format, projection),
+            "count": len(rows),
+            "filters": applied_filters,
+            "next_cursor": next_cursor,
+            **_backend_info(backend)
         }
     except Exception as e:
-        logger.error(f"Error executing query: {e}")
+        log.error("Error executing query: {error}", error=str(e))
         return {
             "status": "error",
             "message": str(e),
             "filters": applied_filters
         }
 
+FAULT_COLUMNS = ("fault_id", "well_id", "part_id", "fault_type", "description", "timestamp")
+FAULTS_CURSOR_COLUMNS = ("timestamp", "fault_id") # Keyset order (descending) for fault history pages
+FAULTS_DEFAULT_PAGE_SIZE = int(os.getenv("FAULTS_DEFAULT_PAGE_SIZE", "50"))
+FAULTS_MAX_PAGE_SIZE = int(os.getenv("FAULTS_MAX_PAGE_SIZE", "500"))
+
+def _parse_timestamp_bound(name: str, value: str | None) -> str | None:
+    """Validates an ISO 8601 date/time bound and returns it unchanged for PostgREST."""
+    if not value:
+        return None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or date-time (e.g. 2025-04-01 or 2025-04-01T08:00:00), got '{value}'.") from None
+    return value
+
+async def _query_well_faults(
+    backend: Any,
+    well_id: str,
+    columns: str,
+    since: str | None,
+    until: str | None,
+    fault_type: str | None,
+    part_id: str | None,
+    cursor_values: list | None,
+    limit: int
+) -> list[dict]:
+    """Up to `limit` faults of one well, newest first, from the direct backend or Supabase."""
+    if backend is not None:
+        return await backend.faults(well_id, since, until, fault_type, part_id, cursor_values, limit)
+    # Served by the (well_id, timestamp DESC, fault_id DESC) index, so cost follows the page size
+    query = get_supabase().table('faults') \
+                  .select(columns) \
+                  .eq('well_id', well_id) \
+                  .order('timestamp', desc=True) \
+                  .order('fault_id', desc=True) \
+                  .limit(limit)
+    if since:
+        query = query.gte('timestamp', since)
+    if until:
+        query = query.lt('timestamp', until)
+    if fault_type:
+        query = query.eq('fault_type', fault_type)
+    if part_id:
+        query = query.eq('part_id', part_id)
+    if cursor_values:
+        query = query.or_(keyset_filter(FAULTS_CURSOR_COLUMNS, cursor_values, descending=True))
+    return (await db.execute(query)).data or []
+
+async def _query_faults_for_wells(
+    backend: Any,
+    well_ids: list[str],
+    since: str | None,
+    until: str | None,
+    fault_type: str | None,
+    part_id: str | None,
+    limit_per_well: int
+) -> list[dict]:
+    """Up to `limit_per_well` faults of each well, newest first, from the direct backend or the get_faults_for_wells RPC."""
+    if backend is not None:
+        return await backend.faults_for_wells(well_ids, since, until, fault_type, part_id, limit_per_well)
+    params = {
+        "well_ids": well_ids,
+        "since": since,
+        "until": until,
+        "filter_fault_type": fault_type,
+        "filter_part_id": part_id,
+        "limit_per_well": limit_per_well
+    }
+    return (await db.execute(get_supabase().rpc('get_faults_for_wells', params))).data or []
+
 @mcp.tool(
     name="get_faults_by_well",
-    description="Retrieves the fault history for a specific well, accepting either the well's name or its UUID.", # Updated description
+    description=(
+        "Retrieves the fault history for a specific well, accepting either the well's name or its UUID. "
+        "Newest faults come first. Optionally bound the window with 'since' (inclusive) and 'until' (exclusive) "
+        "ISO 8601 timestamps and filter by 'fault_type' or 'part_id'. Results are paginated: pass the returned "
+        f"next_cursor as 'after' to get older faults. 'limit' defaults to {FAULTS_DEFAULT_PAGE_SIZE} "
+        f"and is capped at {FAULTS_MAX_PAGE_SIZE}. Use 'fields' to return only some columns "
+        "(timestamp and fault_id are always included). " + FORMAT_DESCRIPTION
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_FAULTS, lambda args, result: ("faults", f"well:{result['well_id_used']}") if "well_id_used" in result else ("faults",), cacheable=_without_live_age),
 )
-def get_faults_by_well(well_identifier: str) -> dict[str, Any]: # Renamed parameter for clarity
+async def get_faults_by_well(
+    well_identifier: str,
+    since: str = None,
+    until: str = None,
+    fault_type: str = None,
+    part_id: str = None,
+    after: str = None,
+    limit: int = None,
+    fields: list[str] = None,
+    format: str = None
+) -> dict[str, Any]: # Renamed parameter for clarity
     """
-    Retrieves fault history for a specific well, sorted by timestamp descending.
+    Retrieves one page of fault history for a specific well, sorted by timestamp descending.
     Accepts either well name or well UUID as input.
     """
-    actual_well_id = None
-    
-    # 1. Try to parse as UUID
+    log = tool_logger("get_faults_by_well")
+    page_size = clamp_limit(limit, FAULTS_DEFAULT_PAGE_SIZE, FAULTS_MAX_PAGE_SIZE)
     try:
-        uuid.UUID(well_identifier)
-        actual_well_id = well_identifier # Input is likely a valid UUID
-        logger.info(f"Input '{well_identifier}' identified as UUID.")
-    except ValueError:
-        logger.info(f"Input '{well_identifier}' is not a UUID, assuming it's a name. Looking up ID...")
-        # 2. If not a UUID, assume it's a name and look up the ID
-        try:
-            lookup_query = supabase.table('wells') \
-                                 .select('id') \
-                                 .eq('name', well_identifier) \
-                                 .single()
-            lookup_response = lookup_query.execute()
-            
-            if lookup_response.data and lookup_response.data.get('id'):
-                actual_well_id = lookup_response.data['id']
-                logger.info(f"Found ID '{actual_well_id}' for name '{well_identifier}'.")
-            else:
-                logger.warning(f"Could not find ID for well name '{well_identifier}'.")
-                return {
-                    "status": "error",
-                    "message": f"Could not find a well with the name '{well_identifier}'.",
-                    "well_identifier": well_identifier
-                }
-        except Exception as lookup_e:
-            logger.error(f"Error looking up well ID for name '{well_identifier}': {lookup_e}")
-            return {
-                "status": "error",
-                "message": f"Error looking up ID for well name '{well_identifier}': {lookup_e}",
-                "well_identifier": well_identifier
-            }
+        since = _parse_timestamp_bound("since", since)
+        until = _parse_timestamp_bound("until", until)
+        cursor_values = decode_cursor(after, len(FAULTS_CURSOR_COLUMNS)) if after else None
+        columns = _select_columns(fields, FAULT_COLUMNS, FAULTS_CURSOR_COLUMNS)
+        _check_format(format)
+    except (ValueError, InvalidCursorError) as e:
+        return {"status": "error", "message": str(e), "well_identifier": well_identifier}
 
-    # 3. If we have an ID (either original or looked up), query faults
-    if actual_well_id:
-        try:
-            logger.info(f"Querying faults for well ID: {actual_well_id}")
-            query = supabase.table('faults') \
-                          .select('*') \
-                          .eq('well_id', actual_well_id) \
-                          .order('timestamp', desc=True)
-            
-            response = query.execute()
-            return {
-                "status": "success",
-                "data": response.data,
-                "count": len(response.data),
-                "well_id_used": actual_well_id # Clarify which ID was used
-            }
-        except Exception as e:
-            logger.error(f"Error querying faults for well ID '{actual_well_id}': {e}")
-            return {
-                "status": "error",
-                "message": f"Error fetching faults: {e}",
-                "well_id_used": actual_well_id
-            }
-    else:
-        # This case should technically not be reached if name lookup error handling is correct
-        # but added as a fallback.
-        logger.error(f"Failed to determine a valid well ID from identifier '{well_identifier}'.")
+    # 1. Resolve the identifier (UUID, exact/normalized/fuzzy name) against the in-memory well index
+    try:
+        match = await resolve_well(well_identifier)
+    except Exception as lookup_e:
+        log.error("Error looking up well ID for name '{well}': {error}", well=well_identifier, error=str(lookup_e))
         return {
-            "status": "error", 
-            "message": "Could not determine a valid well ID from the provided identifier.",
+            "status": "error",
+            "message": f"Error looking up ID for well name '{well_identifier}': {lookup_e}",
             "well_identifier": well_identifier
         }
+    if not match.found:
+        log.warning("Could not find ID for well name '{well}'.", well=well_identifier)
+        return _well_not_found_error(match, f"Could not find a well with the name '{well_identifier}'.")
+    actual_well_id = match.well_id
+    log.info("Resolved '{well}' to well ID '{well_id}' ({match} match).", well=well_identifier, well_id=actual_well_id, match=match.match)
+
+    # 2. Query faults for the resolved ID
+    projection = None if columns == '*' else columns.split(',')
+    applied_filters = {
+        name: value for name, value in (("since", since), ("until", until), ("fault_type", fault_type), ("part_id", part_id)) if value
+    }
+    backend = _direct_backend()
+    try:
+        log.info("Querying faults for well ID: {well_id}", well_id=actual_well_id)
+        fetched = _project(
+            await _query_well_faults(backend, actual_well_id, columns, since, until, fault_type, part_id, cursor_values, page_size + 1),
+            projection
+        )
+        rows, next_cursor = page_result(fetched, page_size, FAULTS_CURSOR_COLUMNS)
+        log.info("Fault rows: {count}, has more: {has_more}", count=len(rows), has_more=next_cursor is not None)
+        return {
+            "status": "success",
+            "data": shape_rows(rows, format, projection),
+            "count": len(rows),
+            "well_id_used": actual_well_id, # Clarify which ID was used
+            "filters": applied_filters,
+            "next_cursor": next_cursor,
+            **_backend_info(backend)
+        }
+    except Exception as e:
+        log.error("Error querying faults for well ID '{well_id}': {error}", well_id=actual_well_id, error=str(e))
+        return {
+            "status": "error",
+            "message": f"Error fetching faults: {e}",
+            "well_id_used": actual_well_id
+        }
+
+def _summarize_inventory(part_id: str, rows: list[dict]) -> dict[str, Any]:
+    """Builds the per-warehouse breakdown and total for one part from its `inventory` rows."""
+    inventory_breakdown = []
+    total_quantity = 0
+
+    if rows:
+        # Iterate through results to build breakdown and calculate total
+        for item in rows:
+            warehouse_id = item.get('warehouse_id')
+            quantity = item.get('stock_level', 0)
+            if warehouse_id is not None: # Basic check
+                inventory_breakdown.append({"warehouse_id": warehouse_id, "quantity": quantity})
+                total_quantity += quantity
+
+        logger.debug(
+            "Found total quantity {total} for part {part_id} across {warehouses} warehouses.",
+            total=total_quantity, part_id=part_id, warehouses=len(inventory_breakdown)
+        )
+        return {
+            "status": "success",
+            "part_id": part_id,
+            "total_quantity": total_quantity,
+            "inventory_by_warehouse": inventory_breakdown # Return the detailed breakdown
+        }
+    else:
+        # Handle case where part is not found in the inventory table at all
+        logger.debug("Part {part_id} not found in inventory table, assuming total quantity 0.", part_id=part_id)
+        return {
+            "status": "success",
+            "part_id": part_id,
+            "total_quantity": 0,
+            "inventory_by_warehouse": [], # Empty list for breakdown
+            "message": f"Part ID {part_id} has no inventory record."
+        }
 
 @mcp.tool(
     name="get_part_inventory",
     description="Retrieves the current inventory breakdown by warehouse for a specific part ID (e.g., P001).",
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_INVENTORY, lambda args, result: (f"inventory:{args['part_id']}",), cacheable=_without_live_age),
 )
-def get_part_inventory(part_id: str) -> dict[str, Any]:
+async def get_part_inventory(part_id: str) -> dict[str, Any]:
     """
     Retrieves the current inventory count for a specific part ID, broken down by warehouse.
     """
-    logger.info(f"Getting inventory breakdown for part ID: {part_id}")
+    log = tool_logger("get_part_inventory")
+    log.info("Getting inventory breakdown for part ID: {part_id}", part_id=part_id)
+
+    if _snapshot_usable(f"inventory:{part_id}"):
+        rows = fleet_snapshot.inventory.find(('warehouse_id', 'stock_level'), part_id=part_id)
+        return {**_summarize_inventory(part_id, rows), **_snapshot_info()}
     
+    backend = _direct_backend()
     try:
+        if backend is not None:
+            return {**_summarize_inventory(part_id, await backend.inventory(part_id)), **_backend_info(backend)}
         # Select warehouse_id and stock_level
-        inventory_query = supabase.table('inventory').select('warehouse_id, stock_level').eq('part_id', part_id)
+        inventory_query = get_supabase().table('inventory').select('warehouse_id, stock_level').eq('part_id', part_id)
         
-        inventory_response = inventory_query.execute()
-        
-        inventory_breakdown = []
-        total_quantity = 0
-        
-        if inventory_response.data:
-            # Iterate through results to build breakdown and calculate total
-            for item in inventory_response.data:
-                warehouse_id = item.get('warehouse_id')
-                quantity = item.get('stock_level', 0)
-                if warehouse_id is not None: # Basic check
-                    inventory_breakdown.append({"warehouse_id": warehouse_id, "quantity": quantity})
-                    total_quantity += quantity
-            
-            logger.info(f"Found total quantity {total_quantity} for part {part_id} across {len(inventory_breakdown)} warehouses.")
-            return {
-                "status": "success",
-                "part_id": part_id,
-                "total_quantity": total_quantity,
-                "inventory_by_warehouse": inventory_breakdown # Return the detailed breakdown
-            }
-        else:
-            # Handle case where part is not found in the inventory table at all
-            logger.info(f"Part {part_id} not found in inventory table, assuming total quantity 0.")
-            return {
-                "status": "success",
-                "part_id": part_id,
-                "total_quantity": 0,
-                "inventory_by_warehouse": [], # Empty list for breakdown
-                "message": f"Part ID {part_id} has no inventory record."
-            }
+        inventory_response = await db.execute(inventory_query)
+        return _summarize_inventory(part_id, inventory_response.data)
             
     except Exception as e:
-        logger.error(f"Error querying inventory for part {part_id}: {e}")
+        log.error("Error querying inventory for part {part_id}: {error}", part_id=part_id, error=str(e))
         return {
             "status": "error",
             "message": f"Error retrieving inventory count: {e}",
             "part_id": part_id
         }
 
-# --- Workflow Tools (API Calls) ---
+# --- Batch Query Tools ---
 
-NEXTJS_APP_URL = os.getenv("NEXTJS_APP_URL", "http://localhost:3000") # URL of the running Next.js app
+BATCH_MAX_KEYS = int(os.getenv("BATCH_MAX_KEYS", "200")) # Max wells/parts per batch call (bounds the `in` filter URL)
 
 @mcp.tool(
-    name="order_part",
-    description="Places an order for a specific quantity of a NEW part to be delivered to a well. Use this when acquiring new parts, not for sending existing stock. Accepts well name or UUID."
+    name="get_faults_for_wells",
+    description=(
+        "Retrieves recent fault history for many wells in one call (use instead of calling get_faults_by_well per well). "
+        "Accepts well names or UUIDs. Optionally bound the window with 'since' (inclusive) and 'until' (exclusive) "
+        "ISO 8601 timestamps and filter by 'fault_type' or 'part_id'. Returns up to 'limit_per_well' newest faults "
+        "per well, grouped by the identifier you passed, with per-well errors and a per-well 'next_cursor' for "
+        f"get_faults_by_well. At most {BATCH_MAX_KEYS} wells per call."
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_FAULTS, ("faults",), cacheable=_without_live_age),
 )
-async def order_part(part_id: str, quantity: int, destination_well_id: str) -> dict[str, Any]: # Reverted param name
+async def get_faults_for_wells(
+    well_identifiers: list[str],
+    since: str = None,
+    until: str = None,
+    fault_type: str = None,
+    part_id: str = None,
+    limit_per_well: int = None
+) -> dict[str, Any]:
     """
-    Sends a request to the /api/orders endpoint to simulate ordering a part.
-    Accepts well name or UUID for destination_well_id.
+    Retrieves the newest faults of many wells in one query, grouped per requested identifier.
     """
-    logger.info(f"Initiating order for part {part_id} (Qty: {quantity}) for well identifier {destination_well_id}")
-
-    # --- Resolve Well ID ---
-    actual_well_id = None
+    identifiers = list(dict.fromkeys(well_identifiers or []))
+    log = tool_logger("get_faults_for_wells")
+    log.info("Getting faults for {wells} wells (since: {since}, until: {until})", wells=len(identifiers), since=since, until=until)
+    if not identifiers:
+        return {"status": "error", "message": "Provide at least one well identifier."}
+    if len(identifiers) > BATCH_MAX_KEYS:
+        return {"status": "error", "message": f"At most {BATCH_MAX_KEYS} wells can be requested per call, got {len(identifiers)}."}
+    per_well = clamp_limit(limit_per_well, FAULTS_DEFAULT_PAGE_SIZE, FAULTS_MAX_PAGE_SIZE)
     try:
-        uuid.UUID(destination_well_id)
-        actual_well_id = destination_well_id
-        logger.info(f"Destination identifier '{destination_well_id}' identified as UUID.")
-    except ValueError:
-        logger.info(f"Destination identifier '{destination_well_id}' is not UUID, looking up ID by name...")
+        since = _parse_timestamp_bound("since", since)
+        until = _parse_timestamp_bound("until", until)
+        matches = await well_resolver.aresolve_many(identifiers, db.call)
+    except Exception as e:
+        log.error("Error preparing batch fault query: {error}", error=str(e))
+        return {"status": "error", "message": str(e)}
+
+    results: dict[str, Any] = {}
+    identifiers_by_id: dict[str, list[str]] = {}
+    for identifier, match in matches.items():
+        if match.found:
+            identifiers_by_id.setdefault(match.well_id, []).append(identifier)
+        else:
+            results[identifier] = _well_not_found_error(match, f"Could not find a well with the name '{identifier}'.")
+
+    backend = _direct_backend()
+    well_ids = list(identifiers_by_id)
+    if well_ids:
+        # One query for every well: each well's faults are ranked and cut at limit_per_well + 1 in the database,
+        # so the extra row tells whether that well has older faults
         try:
-            lookup_query = supabase.table('wells').select('id').eq('name', destination_well_id).single()
-            lookup_response = lookup_query.execute()
-            if lookup_response.data and lookup_response.data.get('id'):
-                actual_well_id = lookup_response.data['id']
-                logger.info(f"Found destination ID '{actual_well_id}' for name '{destination_well_id}'.")
-            else:
-                logger.warning(f"Could not find ID for destination well name '{destination_well_id}'.")
-                return {"status": "error", "message": f"Could not find destination well named '{destination_well_id}'."}
-        except Exception as lookup_e:
-            logger.error(f"Error looking up destination well ID for '{destination_well_id}': {lookup_e}")
-            return {"status": "error", "message": f"Error looking up destination well ID: {lookup_e}"}
-
-    if not actual_well_id:
-         # Fallback error - should be caught above
-         return {"status": "error", "message": "Failed to resolve destination well ID."}
-    # --- End Resolve Well ID ---
+            fetched = await _query_faults_for_wells(backend, well_ids, since, until, fault_type, part_id, per_well + 1)
+        except Exception as e:
+            log.error("Error querying faults for {wells} wells: {error}", wells=len(well_ids), error=str(e))
+            for well_id in well_ids:
+                for identifier in identifiers_by_id[well_id]:
+                    results[identifier] = {"status": "error", "message": f"Error fetching faults: {e}", "well_id_used": well_id}
+        else:
+            rows_by_well: dict[str, list[dict]] = {well_id: [] for well_id in well_ids}
+            for row in fetched:
+                rows_by_well.setdefault(row["well_id"], []).append(row)
+            for well_id in well_ids:
+                rows, next_cursor = page_result(rows_by_well[well_id], per_well, FAULTS_CURSOR_COLUMNS)
+                result = {
+                    "status": "success",
+                    "data": rows,
+                    "count": len(rows),
+                    "well_id_used": well_id,
+                    # Pass to get_faults_by_well as 'after' (with the same filters) for this well's older faults
+                    "next_cursor": next_cursor
+                }
+                for identifier in identifiers_by_id[well_id]:
+                    results[identifier] = result
+
+    errors = sum(1 for r in results.values() if r["status"] == "error")
+    return {
+        "status": "success" if errors < len(identifiers) else "error",
+        "results": {identifier: results[identifier] for identifier in identifiers},
+        "wells_requested": len(identifiers),
+        "wells_with_errors": errors,
+        **_backend_info(backend)
+    }
+
+@mcp.tool(
+    name="get_inventory_for_parts",
+    description=(
+        "Retrieves the inventory breakdown by warehouse for many part IDs (e.g., ['P001', 'P002']) in one call "
+        f"(use instead of calling get_part_inventory per part). At most {BATCH_MAX_KEYS} parts per call."
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_INVENTORY, lambda args, result: [f"inventory:{part_id}" for part_id in args["part_ids"]], cacheable=_without_live_age),
+)
+async def get_inventory_for_parts(part_ids: list[str]) -> dict[str, Any]:
+    """
+    Retrieves inventory for many parts with a single `in` query, grouped per part ID.
+    """
+    part_ids = list(dict.fromkeys(part_ids or []))
+    log = tool_logger("get_inventory_for_parts")
+    log.info("Getting inventory breakdown for {parts} parts", parts=len(part_ids))
+    if not part_ids:
+        return {"status": "error", "message": "Provide at least one part ID."}
+    if len(part_ids) > BATCH_MAX_KEYS:
+        return {"status": "error", "message": f"At most {BATCH_MAX_KEYS} parts can be requested per call, got {len(part_ids)}."}
+
+    if _snapshot_usable(*(f"inventory:{part_id}" for part_id in part_ids)):
+        return {
+            "status": "success",
+            "results": {
+                part_id: _summarize_inventory(part_id, fleet_snapshot.inventory.find(('warehouse_id', 'stock_level'), part_id=part_id))
+                for part_id in part_ids
+            },
+            "parts_requested": len(part_ids),
+            **_snapshot_info()
+        }
+
+    backend = _direct_backend()
+    try:
+        if backend is not None:
+            rows = await backend.inventory_many(part_ids)
+        else:
+            inventory_query = get_supabase().table('inventory').select('part_id, warehouse_id, stock_level').in_('part_id', part_ids)
+            rows = (await db.execute(inventory_query)).data or []
+    except Exception as e:
+        log.error("Error querying inventory for {parts} parts: {error}", parts=len(part_ids), error=str(e))
+        return {
+            "status": "error",
+            "message": f"Error retrieving inventory count: {e}",
+            "part_ids": part_ids
+        }
+
+    rows_by_part: dict[str, list[dict]] = {part_id: [] for part_id in part_ids}
+    for row in rows:
+        rows_by_part.setdefault(row.get('part_id'), []).append(row)
+    return {
+        "status": "success",
+        "results": {part_id: _summarize_inventory(part_id, rows_by_part[part_id]) for part_id in part_ids},
+        "parts_requested": len(part_ids),
+        **_backend_info(backend)
+    }
+
+# --- Aggregate Tools ---
+
+FAULT_SUMMARY_DIMENSIONS = ("camp", "formation", "fault_type", "part_id")
+FAULT_SUMMARY_BUCKETS = ("day", "week", "month")
+FAULT_SUMMARY_MAX_ROWS = int(os.getenv("FAULT_SUMMARY_MAX_ROWS", "200"))
+
+@mcp.tool(
+    name="get_fault_summary",
+    description=(
+        "Counts faults across the fleet, grouped by any of camp, formation, fault_type and part_id, and optionally by "
+        "time bucket ('day', 'week' or 'month'). Use this for aggregate questions such as 'which formation had the most "
+        "Mechanical faults this month?' instead of fetching raw faults. Optional filters: since (inclusive) and until "
+        "(exclusive) ISO 8601 dates, camp, formation, fault_type, part_id. Rows are sorted by fault_count descending."
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_FAULT_SUMMARY, ("faults",)),
+)
+async def get_fault_summary(
+    group_by: list[str] = None,
+    time_bucket: str = None,
+    since: str = None,
+    until: str = None,
+    camp: str = None,
+    formation: str = None,
+    fault_type: str = None,
+    part_id: str = None,
+    limit: int = None
+) -> dict[str, Any]:
+    """
+    Aggregates the trigger-maintained `fault_summary_daily` table through the `get_fault_summary` RPC.
+    """
+    group_by = list(dict.fromkeys(group_by or ["fault_type"]))
+    log = tool_logger("get_fault_summary")
+    log.info(
+        "Getting fault summary grouped by {group_by}, bucket: {time_bucket}, since: {since}, until: {until}",
+        group_by=group_by, time_bucket=time_bucket, since=since, until=until
+    )
+
+    unknown = [g for g in group_by if g not in FAULT_SUMMARY_DIMENSIONS]
+    if unknown:
+        return {"status": "error", "message": f"Cannot group by {unknown}. Allowed: {list(FAULT_SUMMARY_DIMENSIONS)}"}
+    if time_bucket and time_bucket.lower() not in FAULT_SUMMARY_BUCKETS:
+        return {"status": "error", "message": f"time_bucket must be one of {list(FAULT_SUMMARY_BUCKETS)}, got '{time_bucket}'."}
+    try:
+        since = _parse_timestamp_bound("since", since)
+        until = _parse_timestamp_bound("until", until)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    params = {
+        "group_by": group_by,
+        "time_bucket": time_bucket.lower() if time_bucket else None,
+        # The summary is kept at day granularity
+        "since": datetime.fromisoformat(since).date().isoformat() if since else None,
+        "until": datetime.fromisoformat(until).date().isoformat() if until else None,
+        "filter_camp": camp.capitalize() if camp else None,
+        "filter_formation": ' '.join(word.capitalize() for word in formation.split()) if formation else None,
+        "filter_fault_type": fault_type,
+        "filter_part_id": part_id,
+        "max_rows": clamp_limit(limit, 50, FAULT_SUMMARY_MAX_ROWS),
+    }
+    try:
+        response = await db.execute(get_supabase().rpc('get_fault_summary', params))
+    except Exception as e:
+        log.error("Error querying fault summary: {error}", error=str(e))
+        return {"status": "error", "message": f"Error fetching fault summary: {e}"}
+
+    # Drop the dimensions that were not grouped on (always NULL) to keep the payload small
+    keep = [*(["bucket_start"] if params["time_bucket"] else []), *group_by, "fault_count"]
+    rows = [{k: row.get(k) for k in keep} for row in response.data or []]
+    return {
+        "status": "success",
+        "data": rows,
+        "count": len(rows),
+        "group_by": group_by,
+        "time_bucket": params["time_bucket"],
+        "filters": {
+            k.removeprefix("filter_"): v for k, v in params.items()
+            if v is not None and (k.startswith("filter_") or k in ("since", "until"))
+        }
+    }
+
+# --- Semantic Fault Search ---
+
+FAULT_SEARCH_DEFAULT_LIMIT = 10
+FAULT_SEARCH_MAX_LIMIT = int(os.getenv("FAULT_SEARCH_MAX_LIMIT", "50"))
+FAULT_SEARCH_THRESHOLD = float(os.getenv("FAULT_SEARCH_THRESHOLD", "0.5")) # Same default as /api/search_faults
+FAULT_SEARCH_RPC_TIMEOUT = float(os.getenv("FAULT_SEARCH_RPC_TIMEOUT", "2")) # Seconds before answering from the local index instead
+FAULT_SEARCH_COLUMNS = ("fault_id", "well_id", "part_id", "timestamp", "fault_type")
+
+# FAULT_EMBEDDER is "cohere" (default; the model the generate-fault-embedding edge function uses for stored
+# faults) or "local", a deterministic hashing stand-in for tests and offline benchmarks whose vectors only
+# match embeddings it produced itself.
+FAULT_EMBEDDER = os.getenv("FAULT_EMBEDDER", "cohere").lower()
+COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+fault_embedder: Embedder | None = None
+if FAULT_EMBEDDER == "local":
+    fault_embedder = HashingEmbedder()
+elif COHERE_API_KEY:
+    cohere_client = PooledHTTPClient(
+        base_url=os.getenv("COHERE_API_URL", "https://api.cohere.ai"),
+        max_connections=int(os.getenv("COHERE_MAX_CONNECTIONS", "10")),
+        timeout=float(os.getenv("COHERE_API_TIMEOUT", "10")),
+        observe=lambda path, seconds, ok: mcp.observe_backend("cohere", path, seconds, ok),
+    )
+    mcp.on_shutdown(cohere_client.aclose)
+    fault_embedder = CohereEmbedder(cohere_client, COHERE_API_KEY, model=os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0"))
+else:
+    logger.warning("COHERE_API_KEY is not set: search_similar_faults only accepts fault_id queries")
+
+# Query text (and looked-up fault) -> vector, so repeated questions skip the embed call
+embedding_cache = EmbeddingCache(max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")))
+mcp.metrics.gauge("fault_search_embedding_cache_hits", "Query vectors served from the embedding cache.", callback=lambda: embedding_cache.hits)
+mcp.metrics.gauge("fault_search_embedding_cache_misses", "Query vectors that had to be embedded or fetched.", callback=lambda: embedding_cache.misses)
+
+async def _load_fault_index() -> tuple[list[str], list]:
+    """
+    Loads every stored fault embedding in primary-key pages, refusing tables over the index limit. Vectors stay
+    pgvector text here: `VectorIndex.refresh` parses them on a worker thread.
+    """
+    count = (await db.execute(get_supabase().table('fault_embeddings').select('id', count='estimated', head=True))).count or 0
+    if count > fault_index.max_rows:
+        raise ValueError(f"fault_embeddings has about {count} rows, more than FAULT_INDEX_MAX_ROWS={fault_index.max_rows}")
+    fault_ids, embeddings = [], []
+    last_id = None
+    while True:
+        query = get_supabase().table('fault_embeddings').select('id,fault_id,embedding').order('id').limit(SNAPSHOT_FETCH_PAGE_SIZE)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        page = (await db.execute(query)).data or []
+        for row in page:
+            fault_ids.append(row['fault_id'])
+            embeddings.append(row['embedding'])
+        if len(page) < SNAPSHOT_FETCH_PAGE_SIZE:
+            return fault_ids, embeddings
+        last_id = page[-1]['id']
+
+# In-process copy of fault_embeddings, used when the search_faults RPC is slower than FAULT_SEARCH_RPC_TIMEOUT
+# or failing. Loaded on first need (or at startup with FAULT_INDEX_PRELOAD) and reloaded after the TTL;
+# FAULT_INDEX_MAX_ROWS=0 disables it.
+fault_index = VectorIndex(
+    _load_fault_index,
+    ttl_seconds=float(os.getenv("FAULT_INDEX_TTL_SECONDS", "900")),
+    max_rows=int(os.getenv("FAULT_INDEX_MAX_ROWS", "50000")),
+)
+_fault_index_task: asyncio.Task | None = None
+
+def _refresh_fault_index_in_background() -> None:
+    global _fault_index_task
+    if fault_index.available and (_fault_index_task is None or _fault_index_task.done()):
+        _fault_index_task = asyncio.create_task(fault_index.refresh())
 
+if os.getenv("FAULT_INDEX_PRELOAD", "false").lower() == "true":
+    @mcp.on_startup
+    async def _preload_fault_index() -> None:
+        _refresh_fault_index_in_background()
+
+async def _fault_vector(fault_id: str) -> Any:
+    """The stored embedding of one fault, from the local index, the cache or fault_embeddings."""
+    vector = fault_index.vector(fault_id) if fault_index.ready else None
+    if vector is not None:
+        return vector
+    key = ("fault", fault_id)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        response = await db.execute(
+            get_supabase().table('fault_embeddings').select('embedding').eq('fault_id', fault_id).limit(1)
+        )
+        if not response.data:
+            return None
+        vector = parse_vector(response.data[0]['embedding'])
+        embedding_cache.put(key, vector)
+    return vector
+
+async def _search_local_index(vector: Any, limit: int, threshold: float, exclude: str | None) -> list[dict]:
+    """Top matches from the in-process index, joined to their fault rows in one `in` query."""
+    matches = await fault_index.asearch(vector, limit, threshold, exclude)
+    if not matches:
+        return []
+    response = await db.execute(
+        get_supabase().table('faults').select(','.join(FAULT_SEARCH_COLUMNS)).in_('fault_id', [m[0] for m in matches])
+    )
+    faults = {row['fault_id']: row for row in response.data or []}
+    return [{**faults[fault_id], "similarity": similarity} for fault_id, similarity in matches if fault_id in faults]
+
+async def _search_faults(vector: Any, limit: int, threshold: float, exclude: str | None) -> tuple[list[dict], str]:
+    """
+    Runs the search_faults RPC; if it has not answered within FAULT_SEARCH_RPC_TIMEOUT (or fails) and the
+    local index is loaded, answers from the index instead. Returns the rows and which path served them.
+    """
+    params = {
+        "query_embedding": vector.tolist() if hasattr(vector, 'tolist') else list(vector),
+        "similarity_threshold": threshold,
+        "match_count": limit + (1 if exclude else 0), # The fault itself is always its own best match
+    }
+    rpc = asyncio.ensure_future(db.execute(get_supabase().rpc('search_faults', params)))
+    done, _ = await asyncio.wait({rpc}, timeout=FAULT_SEARCH_RPC_TIMEOUT)
+    if fault_index.ready and fault_index.is_stale():
+        _refresh_fault_index_in_background()
+    if done and rpc.exception() is None:
+        rows = [row for row in rpc.result().data or [] if row['fault_id'] != exclude]
+        return rows[:limit], "rpc"
+    if fault_index.ready:
+        # Let a slow RPC finish in the background without logging an unretrieved exception
+        rpc.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await _search_local_index(vector, limit, threshold, exclude), "local_index"
+    _refresh_fault_index_in_background()
+    rows = [row for row in (await rpc).data or [] if row['fault_id'] != exclude]
+    return rows[:limit], "rpc"
+
+@mcp.tool(
+    name="search_similar_faults",
+    description=(
+        "Finds past faults semantically similar to a description ('query', e.g. 'pump seized after sand ingress') "
+        "or to an existing fault ('fault_id'). Use it to answer 'have we seen this failure before?'. Returns "
+        "fault_id, well_id, part_id, timestamp, fault_type and a cosine 'similarity' (higher is closer), most similar "
+        f"first. 'similarity_threshold' defaults to {FAULT_SEARCH_THRESHOLD}; 'limit' defaults to "
+        f"{FAULT_SEARCH_DEFAULT_LIMIT} and is capped at {FAULT_SEARCH_MAX_LIMIT}. " + FORMAT_DESCRIPTION
+    ),
+    coalesce=True,
+    cache=CachePolicy(CACHE_TTL_FAULT_SEARCH, ("faults",)),
+)
+async def search_similar_faults(
+    query: str = None,
+    fault_id: str = None,
+    limit: int = None,
+    similarity_threshold: float = None,
+    format: str = None
+) -> dict[str, Any]:
+    """
+    Vector search over fault_embeddings through the search_faults RPC, with cached query embeddings and
+    the in-process index as a fallback.
+    """
+    log = tool_logger("search_similar_faults")
+    if bool(query) == bool(fault_id):
+        return {"status": "error", "message": "Provide exactly one of 'query' (text) or 'fault_id'."}
+    threshold = FAULT_SEARCH_THRESHOLD if similarity_threshold is None else similarity_threshold
+    if not -1 <= threshold <= 1:
+        return {"status": "error", "message": f"similarity_threshold must be between -1 and 1, got {threshold}."}
+    try:
+        _check_format(format)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    page_size = clamp_limit(limit, FAULT_SEARCH_DEFAULT_LIMIT, FAULT_SEARCH_MAX_LIMIT)
+    subject = {"fault_id": fault_id} if fault_id else {"query": query}
+
+    # 1. Query vector: the fault's stored embedding, or the (cached) embedding of the text
+    try:
+        if fault_id:
+            canonical_id = parse_uuid(fault_id)
+            if canonical_id is None:
+                return {"status": "error", "message": f"'{fault_id}' is not a valid fault UUID.", **subject}
+            vector = await _fault_vector(canonical_id)
+            if vector is None:
+                return {"status": "error", "message": f"No embedding is stored for fault '{fault_id}'.", **subject}
+        else:
+            if fault_embedder is None:
+                return {"status": "error", "message": "Text search is not configured (COHERE_API_KEY is not set); search by fault_id instead.", **subject}
+            hits = embedding_cache.hits
+            vector = await embedding_cache.embed_query(fault_embedder, query)
+            log.info("Query embedding {outcome}", outcome="cached" if embedding_cache.hits > hits else "computed")
+    except Exception as e:
+        log.error("Error getting the query embedding: {error}", error=str(e))
+        return {"status": "error", "message": f"Error getting the query embedding: {e}", **subject}
+
+    # 2. Nearest stored fault embeddings
+    try:
+        rows, source = await _search_faults(vector, page_size, threshold, canonical_id if fault_id else None)
+    except Exception as e:
+        log.error("Error searching similar faults: {error}", error=str(e))
+        return {"status": "error", "message": f"Error searching similar faults: {e}", **subject}
+    log.info("Similar faults: {count} from {source}", count=len(rows), source=source)
+    return {
+        "status": "success",
+        "data": shape_rows(rows, format, [*FAULT_SEARCH_COLUMNS, "similarity"]),
+        "count": len(rows),
+        "similarity_threshold": threshold,
+        "source": source,
+        **subject,
+    }
+
+# --- Workflow Tools (API Calls) ---
+
+NEXTJS_APP_URL = os.getenv("NEXTJS_APP_URL", "http://localhost:3000") # URL of the running Next.js app
+NEXTJS_API_TIMEOUT = float(os.getenv("NEXTJS_API_TIMEOUT", "10")) # Per-call timeout (seconds) for /api/orders and /api/dispatches
+
+# Shared, pooled client for the Next.js API, so bursts of order/dispatch calls reuse keep-alive
+# connections instead of reconnecting every time. It opens on first use rather than at startup
+# (building its TLS context would delay the port opening) and is closed on shutdown.
+nextjs_client = PooledHTTPClient(
+    base_url=NEXTJS_APP_URL,
+    max_connections=int(os.getenv("NEXTJS_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("NEXTJS_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    max_in_flight=int(os.getenv("NEXTJS_MAX_IN_FLIGHT", "20")),
+    timeout=NEXTJS_API_TIMEOUT,
+    http2=os.getenv("NEXTJS_HTTP2", "true").lower() == "true",
+    observe=lambda path, seconds, ok: mcp.observe_backend("nextjs", path, seconds, ok),
+)
+mcp.on_shutdown(nextjs_client.aclose)
+
+# Raised before any byte of the request was sent, so the API cannot have acted on it and the write may be
+# queued or replayed. After a read timeout or a dropped connection the API may already have committed it.
+UNSENT_REQUEST_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+async def _submit_order(part_id: str, quantity: int, actual_well_id: str, log=logger, queue_offline: bool = True) -> dict[str, Any]:
+    """
+    POSTs an order to /api/orders for an already-resolved well UUID. With the field replica, the order is
+    queued instead while the API is unreachable (or earlier writes are still queued, to keep their order).
+    """
     api_endpoint = f"{NEXTJS_APP_URL}/api/orders"
     
     payload = {
@@ -293,78 +1155,95 @@ async def order_part(part_id: str, quantity: int, destination_well_id: str) -> d
         "quantity": quantity,
         "destination_well_id": actual_well_id # Use resolved ID
     }
+    queue_args = {"part_id": part_id, "quantity": quantity, "actual_well_id": actual_well_id}
+    if queue_offline and replica is not None and replica.pending_writes:
+        return await _queue_write("order", queue_args, payload, log)
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_endpoint, json=payload)
-            response.raise_for_status() 
-            api_response_data = response.json()
-            logger.info(f"Received response from {api_endpoint}: {api_response_data}")
-            return {
-                "status": "success",
-                "order_confirmation": api_response_data.get("message", "Order processed."),
-                "details": payload # Echo back the request details
-            }
+        response = await nextjs_client.post("/api/orders", json=payload)
+        response.raise_for_status() 
+        api_response_data = response.json()
+        log.opt(lazy=True).info("Received response from {endpoint}: {summary}", endpoint=lambda: api_endpoint, summary=lambda: summarize(api_response_data))
+        log.opt(lazy=True).debug("Response body from {}: {}", lambda: api_endpoint, lambda: api_response_data)
+        _invalidate_after_write(part_id, actual_well_id)
+        return {
+            "status": "success",
+            "order_confirmation": api_response_data.get("message", "Order processed."),
+            "details": payload # Echo back the request details
+        }
     except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error calling {api_endpoint}: {e.response.status_code} - {e.response.text}")
+        log.error("HTTP error calling {endpoint}: {status_code}", endpoint=api_endpoint, status_code=e.response.status_code)
+        log.opt(lazy=True).debug("Error response body from {}: {}", lambda: api_endpoint, lambda: e.response.text)
         error_details = e.response.json() if e.response.headers.get('content-type') == 'application/json' else e.response.text
         return {
             "status": "error",
             "message": f"Order API request failed: {e.response.status_code}",
             "details": error_details
         }
+    except UNSENT_REQUEST_ERRORS as e:
+        log.error("Could not connect to {endpoint}: {error}", endpoint=api_endpoint, error=str(e))
+        if queue_offline and replica is not None:
+            return await _queue_write("order", queue_args, payload, log)
+        return {
+            "status": "error",
+            "message": f"Could not connect to the order API: {e}",
+            "retryable": True
+        }
     except httpx.RequestError as e:
-        logger.error(f"Request error calling {api_endpoint}: {e}")
+        # The order was sent and may have been placed: never queue or replay it
+        log.error("Request error calling {endpoint}: {error}", endpoint=api_endpoint, error=str(e))
         return {
             "status": "error",
-            "message": f"Could not connect to the order API: {e}"
+            "message": f"The order API did not answer ({type(e).__name__}); the order may have been placed, check before retrying.",
+            "outcome_unknown": True
         }
     except Exception as e:
-        logger.error(f"Unexpected error in order_part: {e}")
+        log.opt(exception=e).error("Unexpected error in order_part: {error}", error=str(e))
         return {
             "status": "error",
             "message": f"An unexpected error occurred: {e}"
         }
-        
+
 @mcp.tool(
-    name="dispatch_part",
-    description="Dispatches a quantity of an EXISTING part from a specified warehouse to a well. Requires knowing the source warehouse ID (e.g., W01, W02, W03). Accepts well name or UUID for destination."
+    name="order_part",
+    description="Places an order for a specific quantity of a NEW part to be delivered to a well. Use this when acquiring new parts, not for sending existing stock. Accepts well name or UUID."
 )
-async def dispatch_part(part_id: str, quantity: int, source_warehouse_id: str, destination_well_id: str) -> dict[str, Any]: # Reverted param name
+async def order_part(part_id: str, quantity: int, destination_well_id: str) -> dict[str, Any]: # Reverted param name
     """
-    Sends a request to the /api/dispatches endpoint to simulate dispatching a part.
+    Sends a request to the /api/orders endpoint to simulate ordering a part.
     Accepts well name or UUID for destination_well_id.
     """
-    logger.info(f"Initiating dispatch for part {part_id} (Qty: {quantity}) from {source_warehouse_id} to well identifier {destination_well_id}") # Log uses old name now
-    
+    log = tool_logger("order_part")
+    log.info(
+        "Initiating order for part {part_id} (Qty: {quantity}) for well identifier {well}",
+        part_id=part_id, quantity=quantity, well=destination_well_id
+    )
+
     # --- Resolve Well ID ---
-    actual_well_id = None
     try:
-        uuid.UUID(destination_well_id) # Check the incoming param
-        actual_well_id = destination_well_id
-        logger.info(f"Destination identifier '{destination_well_id}' identified as UUID.")
-    except ValueError:
-        logger.info(f"Destination identifier '{destination_well_id}' is not UUID, looking up ID by name...")
-        try:
-            lookup_query = supabase.table('wells').select('id').eq('name', destination_well_id).single() # Use incoming param for lookup
-            lookup_response = lookup_query.execute()
-            if lookup_response.data and lookup_response.data.get('id'):
-                actual_well_id = lookup_response.data['id']
-                logger.info(f"Found destination ID '{actual_well_id}' for name '{destination_well_id}'.")
-            else:
-                logger.warning(f"Could not find ID for destination well name '{destination_well_id}'.")
-                return {"status": "error", "message": f"Could not find destination well named '{destination_well_id}'."}
-        except Exception as lookup_e:
-            # Enhanced logging for lookup error
-            logger.exception(f"Exception occurred during Supabase lookup for well name '{destination_well_id}'.")
-            return {"status": "error", "message": f"Error looking up destination well ID: {lookup_e}"}
-    
-    if not actual_well_id:
-         # Fallback error - should be caught above
-         logger.error(f"Failed to resolve a valid destination well ID for identifier: {destination_well_id}") # Log failure
-         return {"status": "error", "message": "Failed to resolve destination well ID."}
+        match = await resolve_well(destination_well_id)
+    except Exception as lookup_e:
+        log.error("Error looking up destination well ID for '{well}': {error}", well=destination_well_id, error=str(lookup_e))
+        return {"status": "error", "message": f"Error looking up destination well ID: {lookup_e}"}
+    if not match.found:
+        log.warning("Could not find ID for destination well name '{well}'.", well=destination_well_id)
+        return _well_not_found_error(match, f"Could not find destination well named '{destination_well_id}'.")
+    actual_well_id = match.well_id
+    log.info(
+        "Resolved destination '{well}' to well ID '{well_id}' ({match} match).",
+        well=destination_well_id, well_id=actual_well_id, match=match.match
+    )
     # --- End Resolve Well ID ---
 
+    return await _submit_order(part_id, quantity, actual_well_id, log)
+
+async def _submit_dispatch(
+    part_id: str, quantity: int, source_warehouse_id: str, actual_well_id: str, log=logger, queue_offline: bool = True
+) -> dict[str, Any]:
+    """
+    POSTs a dispatch to /api/dispatches for an already-resolved well UUID. Queued like `_submit_order`
+    when the field replica is on and the API is unreachable.
+    """
     api_endpoint = f"{NEXTJS_APP_URL}/api/dispatches"
     
     payload = {
@@ -373,31 +1252,36 @@ async def dispatch_part(part_id: str, quantity: int, source_warehouse_id: str, d
         "source_warehouse_id": source_warehouse_id,
         "destination_well_id": actual_well_id # Use resolved ID (name matches API endpoint expectation)
     }
+    queue_args = {"part_id": part_id, "quantity": quantity, "source_warehouse_id": source_warehouse_id, "actual_well_id": actual_well_id}
+    if queue_offline and replica is not None and replica.pending_writes:
+        return await _queue_write("dispatch", queue_args, payload, log)
     
-    logger.info(f"Attempting to POST to {api_endpoint} with payload: {payload}") # Log payload before sending
+    log.opt(lazy=True).debug("Attempting to POST to {} with payload: {}", lambda: api_endpoint, lambda: payload)
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_endpoint, json=payload)
-            response.raise_for_status() # Will raise error for 4xx (e.g., insufficient stock) or 5xx
-            api_response_data = response.json()
-            logger.info(f"Received successful response from {api_endpoint}: {api_response_data}")
-            # Assuming success means dispatch happened
-            return {
-                "status": "success",
-                "dispatch_confirmation": api_response_data.get("message", "Dispatch processed successfully."),
-                "details": payload
-            }
+        response = await nextjs_client.post("/api/dispatches", json=payload)
+        response.raise_for_status() # Will raise error for 4xx (e.g., insufficient stock) or 5xx
+        api_response_data = response.json()
+        log.opt(lazy=True).info("Received successful response from {endpoint}: {summary}", endpoint=lambda: api_endpoint, summary=lambda: summarize(api_response_data))
+        log.opt(lazy=True).debug("Response body from {}: {}", lambda: api_endpoint, lambda: api_response_data)
+        _invalidate_after_write(part_id, actual_well_id)
+        # Assuming success means dispatch happened
+        return {
+            "status": "success",
+            "dispatch_confirmation": api_response_data.get("message", "Dispatch processed successfully."),
+            "details": payload
+        }
     except httpx.HTTPStatusError as e:
-        # Enhanced logging for HTTP status errors
-        logger.exception(f"HTTP Status Error calling {api_endpoint}. Status: {e.response.status_code}. Response: {e.response.text}")
+        # Expected failures (e.g. insufficient stock): no traceback, response body only at debug level
+        log.error("HTTP Status Error calling {endpoint}. Status: {status_code}.", endpoint=api_endpoint, status_code=e.response.status_code)
+        log.opt(lazy=True).debug("Error response body from {}: {}", lambda: api_endpoint, lambda: e.response.text)
         # Try to parse error details, provide specific message for common cases like 400
         error_details = { "raw": e.response.text }
         try:
             error_json = e.response.json()
             error_details = error_json # Replace raw text if JSON parsing works
         except Exception as json_e:
-            logger.warning(f"Could not parse error response as JSON: {json_e}") # Log JSON parsing failure
+            log.warning("Could not parse error response as JSON: {error}", error=str(json_e)) # Log JSON parsing failure
             pass # Keep raw text if JSON parsing fails
         
         error_message = f"Dispatch API request failed: {e.response.status_code}"
@@ -409,50 +1293,428 @@ async def dispatch_part(part_id: str, quantity: int, source_warehouse_id: str, d
         return {
             "status": "error",
             "message": error_message,
+            "http_status": e.response.status_code,
             "details": error_details
         }
+    except UNSENT_REQUEST_ERRORS as e:
+        # Connection errors (network down, DNS, etc.): nothing was sent
+        log.error("HTTP Connect Error calling {endpoint}. Error: {error}", endpoint=api_endpoint, error=str(e))
+        if queue_offline and replica is not None:
+            return await _queue_write("dispatch", queue_args, payload, log)
+        return {
+            "status": "error",
+            "message": f"Could not connect to the dispatch API: {e}",
+            "retryable": True
+        }
     except httpx.RequestError as e:
-        # Enhanced logging for request errors (network issues, DNS, etc.)
-        logger.exception(f"HTTP Request Error calling {api_endpoint}. Error: {e}")
+        # Timeouts and dropped connections after sending: stock may already have moved, never queue or replay
+        log.error("HTTP Request Error calling {endpoint}. Error: {error}", endpoint=api_endpoint, error=str(e))
         return {
             "status": "error",
-            "message": f"Could not connect to the dispatch API: {e}"
+            "message": f"The dispatch API did not answer ({type(e).__name__}); the dispatch may have gone through, check stock before retrying.",
+            "outcome_unknown": True
         }
     except Exception as e:
-        # Enhanced logging for any other unexpected errors
-        logger.exception(f"Unexpected error occurred in dispatch_part tool.")
+        # Keep the traceback for anything unexpected
+        log.opt(exception=e).error("Unexpected error occurred in dispatch_part tool.")
         return {
             "status": "error",
             "message": f"An unexpected error occurred: {e}"
         }
 
-# --- Resources ---
+@mcp.tool(
+    name="dispatch_part",
+    description="Dispatches a quantity of an EXISTING part from a specified warehouse to a well. Requires knowing the source warehouse ID (e.g., W01, W02, W03). Accepts well name or UUID for destination."
+)
+async def dispatch_part(part_id: str, quantity: int, source_warehouse_id: str, destination_well_id: str) -> dict[str, Any]: # Reverted param name
+    """
+    Sends a request to the /api/dispatches endpoint to simulate dispatching a part.
+    Accepts well name or UUID for destination_well_id.
+    """
+    log = tool_logger("dispatch_part")
+    log.info(
+        "Initiating dispatch for part {part_id} (Qty: {quantity}) from {warehouse} to well identifier {well}",
+        part_id=part_id, quantity=quantity, warehouse=source_warehouse_id, well=destination_well_id
+    )
+    
+    # --- Resolve Well ID ---
+    try:
+        match = await resolve_well(destination_well_id)
+    except Exception as lookup_e:
+        log.error("Error looking up destination well ID for '{well}': {error}", well=destination_well_id, error=str(lookup_e))
+        return {"status": "error", "message": f"Error looking up destination well ID: {lookup_e}"}
+    if not match.found:
+        log.warning("Could not find ID for destination well name '{well}'.", well=destination_well_id)
+        return _well_not_found_error(match, f"Could not find destination well named '{destination_well_id}'.")
+    actual_well_id = match.well_id
+    log.info(
+        "Resolved destination '{well}' to well ID '{well_id}' ({match} match).",
+        well=destination_well_id, well_id=actual_well_id, match=match.match
+    )
+    # --- End Resolve Well ID ---
 
-# In-memory cache for parts list
-parts_cache = None
+    return await _submit_dispatch(part_id, quantity, source_warehouse_id, actual_well_id, log)
 
-@mcp.resource(
-    uri="wellsync://parts",
-    name="parts_list", # Using snake_case for resource name
-    description="Provides a list of all available parts."
+# --- Field Replica ---
+# DATA_BACKEND=sqlite: reads come from a local SQLite copy of wells/parts/inventory/faults kept current
+# by watermark syncs, and orders/dispatches made while the API is unreachable wait in its outbox.
+
+REPLICA_POLL_SECONDS = float(os.getenv("REPLICA_POLL_SECONDS", "30"))
+REPLICA_FULL_REFRESH_SECONDS = float(os.getenv("REPLICA_FULL_REFRESH_SECONDS", "3600"))
+
+def _fetch_replica_rows(table: ReplicaTable, since: str | None) -> AsyncIterator[list[dict]]:
+    return _fetch_row_pages(table.name, table.columns, table.key, since, watermark=table.watermark)
+
+async def _queue_write(kind: str, queue_args: dict, payload: dict, log=logger) -> dict[str, Any]:
+    queue_id = await replica.enqueue_write(kind, queue_args)
+    log.warning("Queued {kind} #{queue_id} for forwarding ({pending} pending)", kind=kind, queue_id=queue_id, pending=replica.pending_writes)
+    return {
+        "status": "queued",
+        "message": f"The {kind} API is unreachable; the {kind} was queued as #{queue_id} and will be sent when the link is back.",
+        "queue_id": queue_id,
+        "details": payload
+    }
+
+async def _forward_queued_write(kind: str, args: dict) -> dict[str, Any]:
+    """
+    Replays a queued write; raises ConnectionError while the API is still unreachable. Any other failure
+    (including a timeout after sending) is returned, so the outbox records it instead of replaying it.
+    """
+    log = tool_logger(f"{kind}_part")
+    if kind == "order":
+        result = await _submit_order(**args, log=log, queue_offline=False)
+    else:
+        result = await _submit_dispatch(**args, log=log, queue_offline=False)
+    if result.get("retryable"):
+        raise ConnectionError(result["message"])
+    return result
+
+def _invalidate_replica_changes(table: str, rows: list[dict]) -> None:
+    """Drops cached results built from rows a replica sync just replaced."""
+    if table == 'inventory':
+        mcp.invalidate(*{f"inventory:{row['part_id']}" for row in rows})
+    elif table == 'wells':
+        mcp.invalidate("wells", *(f"well:{row['id']}" for row in rows))
+    elif table == 'faults':
+        mcp.invalidate("faults", *{f"well:{row['well_id']}" for row in rows})
+    elif table == 'parts':
+        mcp.invalidate("parts")
+
+replica: SqliteReplica | None = None
+if DATA_BACKEND == "sqlite":
+    replica = SqliteReplica(
+        REPLICA_PATH,
+        _fetch_replica_rows,
+        forward=_forward_queued_write,
+        poll_seconds=REPLICA_POLL_SECONDS,
+        full_refresh_seconds=REPLICA_FULL_REFRESH_SECONDS,
+        on_change=_invalidate_replica_changes,
+    )
+    mcp.on_startup(replica.start)
+    mcp.on_shutdown(replica.stop)
+    mcp.metrics.gauge("replica_age_seconds", "Seconds since the field replica last synced every table.", callback=lambda: replica.age_seconds() or 0.0)
+    mcp.metrics.gauge("replica_pending_writes", "Orders and dispatches queued for forwarding.", callback=lambda: replica.pending_writes)
+
+    @mcp.resource(
+        uri="wellsync://replica/status",
+        name="replica_status",
+        description="Field replica freshness and the orders/dispatches queued while offline, with their forwarding results.",
+        mime_type="application/json"
+    )
+    async def replica_status() -> str:
+        age = replica.age_seconds()
+        return dumps({
+            "status": "success",
+            "online": replica.online,
+            "ready": replica.ready,
+            "age_seconds": None if age is None else round(age, 1),
+            "pending_writes": replica.pending_writes,
+            "recent_writes": await replica.queued_writes(),
+        })
+
+# --- Sourcing Tool ---
+
+SOURCING_MAX_CANDIDATES = int(os.getenv("SOURCING_MAX_CANDIDATES", "10")) # Ranked warehouses returned per call
+SOURCING_RETRY_STATUSES = {404, 409} # Dispatch API answers that mean "try the next warehouse" (400 is a bad request: returned as is)
+WAREHOUSE_COLUMNS = ("warehouse_id", "name", "latitude", "longitude", "cost_per_km", "last_updated")
+
+async def _load_distance_inputs() -> tuple[list[dict], list[dict]]:
+    """Well and warehouse coordinates for the distance index, from the fleet snapshot when fresh."""
+    if _snapshot_usable("wells", "warehouses") and len(fleet_snapshot.warehouses):
+        return fleet_snapshot.wells.find(('id', 'latitude', 'longitude')), fleet_snapshot.warehouses.find()
+    wells = await _fetch_rows('wells', ('id', 'latitude', 'longitude'), 'id')
+    warehouses = await _fetch_rows('warehouses', WAREHOUSE_COLUMNS, 'warehouse_id')
+    return wells, warehouses
+
+# Well x warehouse distances, built on first use and kept current from snapshot changes
+distance_index = DistanceIndex(
+    _load_distance_inputs,
+    ttl_seconds=float(os.getenv("DISTANCE_INDEX_TTL_SECONDS", "3600")),
+)
+
+def _update_distance_index(table: str, rows: list[dict]) -> None:
+    # New or moved wells are patched into the matrix (deleted ones just stop being asked for); a changed or deleted warehouse rebuilds it
+    if table == 'wells':
+        distance_index.update_wells([row for row in rows if not row.get('deleted')])
+    elif table == 'warehouses' and any(distance_index.warehouses.get(row['warehouse_id']) != row for row in rows):
+        distance_index.invalidate()
+
+if fleet_snapshot is not None:
+    fleet_snapshot.add_listener(_update_distance_index)
+
+async def _destination_distances(well_id: str) -> dict[str, float | None]:
+    """km from a well to every warehouse: a matrix row, or computed directly for a well added since the last build."""
+    await distance_index.ensure_fresh()
+    distances = distance_index.distances(well_id)
+    if distances is not None:
+        return distances
+    well = fleet_snapshot.wells.get(well_id) if _snapshot_usable(f"well:{well_id}") else None
+    if well is None:
+        response = await db.execute(get_supabase().table('wells').select('latitude, longitude').eq('id', well_id).limit(1))
+        well = (response.data or [{}])[0]
+    warehouses = list(distance_index.warehouses.values()) or await _fetch_rows('warehouses', WAREHOUSE_COLUMNS, 'warehouse_id')
+    coordinates = None if well.get('latitude') is None or well.get('longitude') is None else (float(well['latitude']), float(well['longitude']))
+    return distances_from(coordinates, warehouses)
+
+@mcp.tool(
+    name="find_best_source",
+    description=(
+        "Finds the warehouses holding at least `quantity` units of a part, ranked nearest-first to the destination "
+        "well (name or UUID), or cheapest-first with rank_by='cost'. Also lists warehouses with too little stock. "
+        "Set dispatch=true to dispatch from the best source right away (falling back to the next one if its stock ran out). "
+        "Use this instead of get_part_inventory + dispatch_part when no source warehouse is given."
+    ),
 )
-def list_parts() -> dict[str, Any]:
+async def find_best_source(
+    part_id: str,
+    destination_well_id: str,
+    quantity: int = 1,
+    rank_by: Literal["distance", "cost"] = "distance",
+    dispatch: bool = False
+) -> dict[str, Any]:
     """
-    Retrieves the list of all parts from the database, using a simple cache.
+    Ranks warehouses with enough stock by their precomputed distance (or travel cost) to the well and,
+    if asked, submits the dispatch to /api/dispatches from the top candidate.
     """
-    global parts_cache
-    if parts_cache is not None:
-        return {"status": "success", "data": parts_cache, "source": "cache"}
-        
+    log = tool_logger("find_best_source")
+    log.info(
+        "Finding source for {quantity} x {part_id} to well identifier {well} (rank_by: {rank_by}, dispatch: {dispatch})",
+        quantity=quantity, part_id=part_id, well=destination_well_id, rank_by=rank_by, dispatch=dispatch
+    )
+    if quantity < 1:
+        return {"status": "error", "message": "quantity must be at least 1."}
+
+    try:
+        match = await resolve_well(destination_well_id)
+    except Exception as lookup_e:
+        log.error("Error looking up destination well ID for '{well}': {error}", well=destination_well_id, error=str(lookup_e))
+        return {"status": "error", "message": f"Error looking up destination well ID: {lookup_e}"}
+    if not match.found:
+        return _well_not_found_error(match, f"Could not find destination well named '{destination_well_id}'.")
+    actual_well_id = match.well_id
+
+    try:
+        stock = {warehouse_id: level for (_, warehouse_id), level in (await _fetch_stock_levels([part_id])).items()}
+    except Exception as e:
+        log.error("Error querying inventory for part {part_id}: {error}", part_id=part_id, error=str(e))
+        return {"status": "error", "message": f"Error retrieving inventory: {e}", "part_id": part_id}
+
+    note = None
+    try:
+        distances = await _destination_distances(actual_well_id)
+    except Exception as e:
+        # e.g. the warehouses table (migration 018) does not exist yet: still useful ranked by stock
+        log.warning("Warehouse distances unavailable: {error}", error=str(e))
+        distances = {}
+    if not any(km is not None for km in distances.values()):
+        note = "Warehouse or well locations are unavailable; candidates are ranked by stock level only."
+    cost_per_km = {
+        warehouse_id: float(row['cost_per_km'])
+        for warehouse_id, row in distance_index.warehouses.items() if row.get('cost_per_km') is not None
+    }
+    candidates, short = rank_sources(stock, distances, quantity, rank_by, cost_per_km or None)
+
+    result: dict[str, Any] = {
+        "status": "success",
+        "part_id": part_id,
+        "quantity": quantity,
+        "destination_well_id": actual_well_id,
+        "rank_by": rank_by,
+        "candidates": candidates[:SOURCING_MAX_CANDIDATES],
+        "insufficient_stock": short,
+    }
+    if not candidates:
+        result["message"] = (
+            f"No warehouse holds {quantity} units of part {part_id} (total in stock: {sum(stock.values())}). "
+            "Consider order_part instead."
+        )
+    if note:
+        result["note"] = note
+    if not dispatch or not candidates:
+        return result
+
+    # Stock may have moved since it was read: when a source turns out to be short (409) or no longer
+    # stocks the part (404), fall through to the next one. A 400 means the request itself is invalid,
+    # which no other warehouse would change, so it is returned right away with the API's message.
+    attempts = []
+    for candidate in candidates:
+        outcome = await _submit_dispatch(part_id, quantity, candidate["warehouse_id"], actual_well_id, log)
+        attempts.append({"warehouse_id": candidate["warehouse_id"], "status": outcome["status"], "message": outcome.get("message")})
+        if outcome["status"] == "success" or outcome.get("http_status") not in SOURCING_RETRY_STATUSES:
+            break
+    result["dispatch"] = {**outcome, "source_warehouse_id": candidate["warehouse_id"], "attempts": attempts}
+    if outcome["status"] not in ("success", "queued"): # Queued by the field replica while offline
+        result["status"] = "error"
+        result["message"] = outcome["message"]
+    return result
+
+# --- Bulk Workflow Tool ---
+
+BULK_FULFILL_MAX_LINES = int(os.getenv("BULK_FULFILL_MAX_LINES", "100"))
+BULK_FULFILL_CONCURRENCY = int(os.getenv("BULK_FULFILL_CONCURRENCY", "8")) # Default concurrent API calls per bulk request
+
+class FulfillmentLine(BaseModel):
+    action: Literal["order", "dispatch"] = Field(description="'order' buys NEW parts, 'dispatch' sends EXISTING stock from a warehouse.")
+    part_id: str = Field(description="Part ID, e.g. P001.")
+    quantity: int = Field(gt=0, description="Number of units.")
+    destination_well_id: str = Field(description="Destination well name or UUID.")
+    source_warehouse_id: str | None = Field(default=None, description="Source warehouse (e.g. W01). Required for dispatch lines.")
+
+async def _fetch_stock_levels(part_ids: list[str]) -> dict[tuple[str, str], int]:
+    """Current stock per (part_id, warehouse_id), from the fleet snapshot when fresh."""
+    if _snapshot_usable(*(f"inventory:{part_id}" for part_id in part_ids)):
+        rows = [row for part_id in part_ids for row in fleet_snapshot.inventory.find(('part_id', 'warehouse_id', 'stock_level'), part_id=part_id)]
+    else:
+        query = get_supabase().table('inventory').select('part_id, warehouse_id, stock_level').in_('part_id', part_ids)
+        rows = (await db.execute(query)).data or []
+    return {(row['part_id'], row['warehouse_id']): row.get('stock_level') or 0 for row in rows}
+
+@mcp.tool(
+    name="bulk_fulfill",
+    description=(
+        "Places many part orders and/or dispatches in one call (e.g. restocking several wells after a storm). "
+        "Each line has action ('order' or 'dispatch'), part_id, quantity, destination_well_id (name or UUID) and, "
+        "for dispatches, source_warehouse_id. Lines run concurrently and the result reports each line's status. "
+        "Set all_or_nothing=true to first check every dispatch against current stock and submit nothing if any line "
+        f"would fail validation. At most {BULK_FULFILL_MAX_LINES} lines per call."
+    ),
+)
+async def bulk_fulfill(
+    lines: list[FulfillmentLine],
+    all_or_nothing: bool = False,
+    max_concurrency: int = None
+) -> dict[str, Any]:
+    """
+    Resolves all destination wells in one pass, optionally validates dispatch lines against inventory,
+    then submits the lines to /api/orders and /api/dispatches under a semaphore.
+    """
+    log = tool_logger("bulk_fulfill")
+    log.info("Bulk fulfill request with {lines} lines (all_or_nothing: {all_or_nothing})", lines=len(lines), all_or_nothing=all_or_nothing)
+    if not lines:
+        return {"status": "error", "message": "Provide at least one line item."}
+    if len(lines) > BULK_FULFILL_MAX_LINES:
+        return {"status": "error", "message": f"At most {BULK_FULFILL_MAX_LINES} lines can be submitted per call, got {len(lines)}."}
+
+    results: list[dict[str, Any] | None] = [None] * len(lines)
+    for i, line in enumerate(lines):
+        if line.action == "dispatch" and not line.source_warehouse_id:
+            results[i] = {"status": "error", "message": "source_warehouse_id is required for dispatch lines."}
+
+    # 1. Resolve every destination in one pass over the well index
+    try:
+        matches = await well_resolver.aresolve_many([line.destination_well_id for line in lines], db.call)
+    except Exception as lookup_e:
+        log.error("Error resolving destination wells for bulk fulfill: {error}", error=str(lookup_e))
+        return {"status": "error", "message": f"Error looking up destination well IDs: {lookup_e}"}
+    for i, line in enumerate(lines):
+        match = matches[line.destination_well_id]
+        if results[i] is None and not match.found:
+            results[i] = _well_not_found_error(match, f"Could not find destination well named '{line.destination_well_id}'.")
+
+    # 2. Optionally check dispatch lines against current stock, summing lines that share a source
+    if all_or_nothing:
+        dispatch_lines = [i for i, line in enumerate(lines) if results[i] is None and line.action == "dispatch"]
+        if dispatch_lines:
+            try:
+                stock = await _fetch_stock_levels(list({lines[i].part_id for i in dispatch_lines}))
+            except Exception as e:
+                log.error("Error checking stock for bulk fulfill: {error}", error=str(e))
+                return {"status": "error", "message": f"Error checking inventory before submitting: {e}"}
+            required: dict[tuple[str, str], int] = {}
+            for i in dispatch_lines:
+                key = (lines[i].part_id, lines[i].source_warehouse_id)
+                required[key] = required.get(key, 0) + lines[i].quantity
+            for i in dispatch_lines:
+                key = (lines[i].part_id, lines[i].source_warehouse_id)
+                if required[key] > stock.get(key, 0):
+                    results[i] = {
+                        "status": "error",
+                        "message": f"Insufficient stock for part {key[0]} in warehouse {key[1]}. "
+                                   f"Required across this request: {required[key]}, Available: {stock.get(key, 0)}."
+                    }
+        failed = [i for i, r in enumerate(results) if r is not None]
+        if failed:
+            for i, r in enumerate(results):
+                if r is None:
+                    results[i] = {"status": "skipped", "message": "Not submitted because other lines failed validation (all_or_nothing)."}
+            return {
+                "status": "error",
+                "message": f"{len(failed)} of {len(lines)} lines failed validation; nothing was submitted.",
+                "results": [{"line": i, **r} for i, r in enumerate(results)],
+                "submitted": 0,
+                "failed": len(failed)
+            }
+
+    # 3. Submit the remaining lines concurrently
+    semaphore = asyncio.Semaphore(clamp_limit(max_concurrency, BULK_FULFILL_CONCURRENCY, BULK_FULFILL_MAX_LINES))
+
+    async def submit(i: int, line: FulfillmentLine) -> None:
+        well_id = matches[line.destination_well_id].well_id
+        async with semaphore:
+            if line.action == "order":
+                results[i] = await _submit_order(line.part_id, line.quantity, well_id, log)
+            else:
+                results[i] = await _submit_dispatch(line.part_id, line.quantity, line.source_warehouse_id, well_id, log)
+
+    pending = [submit(i, line) for i, line in enumerate(lines) if results[i] is None]
+    await asyncio.gather(*pending)
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    queued = sum(1 for r in results if r["status"] == "queued") # Field replica offline: forwarded later
+    if succeeded == len(lines):
+        status = "success"
+    elif queued and succeeded + queued == len(lines):
+        status = "queued" # Nothing failed: every line not sent yet is waiting in the outbox
+    else:
+        status = "partial" if succeeded or queued else "error"
+    return {
+        "status": status,
+        "results": [{"line": i, "action": line.action, **results[i]} for i, line in enumerate(lines)],
+        "submitted": len(pending),
+        "succeeded": succeeded,
+        "queued": queued,
+        "failed": len(lines) - succeeded - queued
+    }
+
+# --- Resources ---
+
+async def _load_parts() -> dict[str, Any]:
+    """
+    Retrieves the list of all parts from the database or the direct backend (the resources below are kept in
+    the result cache; a replica sync that changes parts invalidates them, so no live age is reported).
+    """
+    backend = _direct_backend()
     try:
-        query = supabase.table('parts').select('*').order('name')
-        response = query.execute()
-        parts_cache = response.data # Cache the result
+        if backend is not None:
+            rows = await backend.parts()
+        else:
+            query = get_supabase().table('parts').select('*').order('name')
+            rows = (await db.execute(query)).data or []
         return {
             "status": "success",
-            "data": parts_cache,
-            "count": len(parts_cache),
-            "source": "database"
+            "data": rows,
+            "count": len(rows),
+            "source": "replica" if backend is not None and backend is replica else "database"
         }
     except Exception as e:
         return {
@@ -460,6 +1722,30 @@ def list_parts() -> dict[str, Any]:
             "message": str(e)
         }
 
+# Resources return pre-serialized JSON so they go through the fast encoder too
+@mcp.resource(
+    uri="wellsync://parts",
+    name="parts_list", # Using snake_case for resource name
+    description="Provides a list of all available parts.",
+    mime_type="application/json",
+    cache=CachePolicy(CACHE_TTL_PARTS, ("parts",)),
+)
+async def list_parts() -> str:
+    return dumps(await _load_parts())
+
+@mcp.resource(
+    uri="wellsync://parts/columnar",
+    name="parts_list_columnar",
+    description="The list of all available parts as {columns: [...], rows: [[...]]} (smaller than wellsync://parts).",
+    mime_type="application/json",
+    cache=CachePolicy(CACHE_TTL_PARTS, ("parts",)),
+)
+async def list_parts_columnar() -> str:
+    result = await _load_parts()
+    if result["status"] == "success":
+        result = {**result, "data": shape_rows(result["data"], "columnar")}
+    return dumps(result)
+
 # Predefined fault types (consistent with frontend)
 FAULT_TYPES_LIST = [
   { "name": 'Pressure Loss', "severity": 'high' },
@@ -485,7 +1771,138 @@ def list_fault_types() -> dict[str, Any]:
         "count": len(FAULT_TYPES_LIST)
     }
 
+# --- Resource Subscriptions ---
+# Per-entity resources clients can subscribe to (resources/subscribe over /sse). One change feed, the
+# fleet snapshot's delta polling woken by Supabase Realtime events, drives notifications for every
+# subscriber, so dashboards watching well status do not each poll Supabase.
+
+WELL_STATUS_URI = "wellsync://wells/{well_id}/status"
+PART_INVENTORY_URI = "wellsync://inventory/{part_id}"
+FAULTED_WELLS_URI = "wellsync://wells/faulted"
+PARTS_URIS = ("wellsync://parts", "wellsync://parts/columnar")
+WELL_STATUS_COLUMNS = ("id", "name", "camp", "formation", "status", "fault_details", "last_maintenance", "last_updated")
+NOTIFY_MAX_DELTA_ROWS = int(os.getenv("NOTIFY_MAX_DELTA_ROWS", "100")) # Larger changes notify without rows; clients re-read
+CHANGE_FEED = os.getenv("CHANGE_FEED", "realtime").lower() # "realtime" (Supabase Realtime, with polling fallback) or "poll"
+
+@mcp.resource(
+    uri=WELL_STATUS_URI,
+    name="well_status",
+    description="Status and current fault details of one well (name or UUID). Subscribe to be notified when it changes.",
+    mime_type="application/json"
+)
+async def well_status(well_id: str) -> str:
+    match = await resolve_well(well_id)
+    if not match.found:
+        return dumps(_well_not_found_error(match, f"Could not find well '{well_id}'."))
+    if _snapshot_usable(f"well:{match.well_id}"):
+        row = fleet_snapshot.wells.get(match.well_id)
+        row = None if row is None else {c: row[c] for c in WELL_STATUS_COLUMNS}
+        return dumps({"status": "success", "data": row, **_snapshot_info()})
+    response = await db.execute(get_supabase().table('wells').select(','.join(WELL_STATUS_COLUMNS)).eq('id', match.well_id).limit(1))
+    return dumps({"status": "success", "data": (response.data or [None])[0], "source": "database"})
+
+@mcp.resource(
+    uri=PART_INVENTORY_URI,
+    name="part_inventory",
+    description="Stock of one part (e.g. P001) by warehouse. Subscribe to be notified when stock changes.",
+    mime_type="application/json"
+)
+async def part_inventory(part_id: str) -> str:
+    return dumps(await get_part_inventory(part_id))
+
+@mcp.resource(
+    uri=FAULTED_WELLS_URI,
+    name="faulted_wells",
+    description="All wells currently in Fault status. Subscribe to be notified when a well enters or leaves it.",
+    mime_type="application/json"
+)
+async def faulted_wells() -> str:
+    if _snapshot_usable("wells"):
+        rows = fleet_snapshot.wells.find(WELL_STATUS_COLUMNS, status='Fault')
+        return dumps({"status": "success", "data": rows, "count": len(rows), **_snapshot_info()})
+    query = get_supabase().table('wells').select(','.join(WELL_STATUS_COLUMNS)).eq('status', 'Fault').order('name')
+    rows = (await db.execute(query)).data or []
+    return dumps({"status": "success", "data": rows, "count": len(rows), "source": "database"})
+
+async def _canonical_resource_key(uri: str) -> str:
+    """Subscriptions to a well by name are keyed by its UUID, which is what changes are published under."""
+    prefix, suffix = WELL_STATUS_URI.split("{well_id}")
+    if uri.startswith(prefix) and uri.endswith(suffix):
+        identifier = uri[len(prefix):-len(suffix)]
+        if parse_uuid(identifier) is None:
+            match = await resolve_well(identifier)
+            if match.found:
+                return WELL_STATUS_URI.format(well_id=match.well_id)
+    return uri
+
+_notify_tasks: set[asyncio.Task] = set()
+
+def _notify(uri: str, rows: list[dict]) -> None:
+    """Schedules an update notification for `uri`, with the changed rows as a delta when small enough."""
+    if mcp.subscriptions is None or not mcp.subscriptions.has_subscribers(uri):
+        return
+    delta = {"changes": rows} if len(rows) <= NOTIFY_MAX_DELTA_ROWS else {"changes_truncated": True}
+    task = asyncio.ensure_future(mcp.notify_resource_updated(uri, **delta))
+    _notify_tasks.add(task)
+    task.add_done_callback(_notify_tasks.discard)
+
+_faulted_well_ids: set[str] = set()
+
+def _publish_snapshot_changes(table: str, rows: list[dict]) -> None:
+    """Turns rows the snapshot just picked up into result-cache invalidations and resource notifications."""
+    if table == 'inventory':
+        by_part: dict[str, list[dict]] = {}
+        for row in rows:
+            change = {"warehouse_id": row['warehouse_id'], "stock_level": row['stock_level'], "last_updated": row.get('last_updated')}
+            if row.get('deleted'):
+                change = {**change, "stock_level": None, "deleted": True}
+            by_part.setdefault(row['part_id'], []).append(change)
+        mcp.invalidate(*(f"inventory:{part_id}" for part_id in by_part))
+        for part_id, changes in by_part.items():
+            _notify(PART_INVENTORY_URI.format(part_id=part_id), changes)
+    elif table == 'wells':
+        mcp.invalidate("wells", *(f"well:{row['id']}" for row in rows))
+        faulted_changes = []
+        for row in rows:
+            status_row = {c: row.get(c) for c in WELL_STATUS_COLUMNS}
+            if row.get('deleted'):
+                status_row["deleted"] = True
+            _notify(WELL_STATUS_URI.format(well_id=row['id']), [status_row])
+            # Wells entering, leaving or changing within the faulted set (a deleted well leaves it)
+            if row.get('status') == 'Fault' or row['id'] in _faulted_well_ids:
+                faulted_changes.append(status_row)
+                if row.get('status') == 'Fault' and not row.get('deleted'):
+                    _faulted_well_ids.add(row['id'])
+                else:
+                    _faulted_well_ids.discard(row['id'])
+        if faulted_changes:
+            _notify(FAULTED_WELLS_URI, faulted_changes)
+    elif table == 'parts':
+        mcp.invalidate("parts")
+        for uri in PARTS_URIS:
+            _notify(uri, rows)
+
+if fleet_snapshot is not None:
+    fleet_snapshot.add_listener(_publish_snapshot_changes)
+    if mcp.subscriptions is not None:
+        mcp.subscriptions.canonicalize = _canonical_resource_key
+    if CHANGE_FEED == "realtime":
+        change_feed = RealtimeChangeFeed(
+            SUPABASE_URL, SUPABASE_KEY, [t.name for t in fleet_snapshot.tables], lambda table: fleet_snapshot.wake()
+        )
+        mcp.on_startup(change_feed.start)
+        mcp.on_shutdown(change_feed.stop)
+
 # --- Run Server ---
+# ASGI app for `uvicorn wellsync:app` and multi-worker mode. Clients that may hit any worker or replica
+# should use the stateless POST /mcp endpoint; /sse sessions need sticky routing to their worker.
+app = mcp.starlette_app
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
 if __name__ == "__main__":
     print(f"Starting {MCP_NAME} MCP server on port {MCP_PORT}...")
-    mcp.run(transport="sse") 
\ No newline at end of file
+    if MCP_WORKERS > 1:
+        logger.warning("Running {} workers: /sse sessions only work with sticky routing, prefer POST /mcp.", MCP_WORKERS)
+        mcp.run_workers("wellsync:app", MCP_WORKERS)
+    else:
+        mcp.run(transport="sse") 
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Database change feed for the fleet snapshot.
+
+`RealtimeChangeFeed` listens to Supabase Realtime `postgres_changes` on the snapshot tables and calls
+`on_change(table)` for every event; `wellsync.py` wires that to `FleetSnapshot.wake()`, so a change
+reaches the snapshot (and every resource subscriber notified from it) within about a second instead
+of at the next poll. The snapshot's polling is the fallback: while Realtime is down, changes still
+arrive every poll interval, and the feed keeps trying to reconnect.
+
+Needs the tables in the `supabase_realtime` publication (migration 019) and the `realtime` package,
+which is installed with supabase-py.
+"""
+
+import asyncio
+from typing import Callable, Sequence
+
+from loguru import logger
+
+try:
+    from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+except ImportError:
+    AsyncRealtimeClient = None
+    logger.info("realtime is not installed, the fleet snapshot only polls for changes")
+
+
+class RealtimeChangeFeed:
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        tables: Sequence[str],
+        on_change: Callable[[str | None], None],
+        schema: str = "public",
+        retry_seconds: float = 30.0,
+    ):
+        """
+        `url` is the Supabase project URL; the Realtime endpoint is under `/realtime/v1`, as supabase-py builds it.
+        `on_change(None)` is also called after every (re)connect, since events may have been missed meanwhile.
+        """
+        self.url = url
+        self.key = key
+        self.tables = tuple(tables)
+        self.on_change = on_change
+        self.schema = schema
+        self.retry_seconds = retry_seconds
+        self.connected = False
+        self.events = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def available(self) -> bool:
+        return AsyncRealtimeClient is not None
+
+    @property
+    def realtime_url(self) -> str:
+        return f"{self.url.rstrip('/')}/realtime/v1"
+
+    def _client(self) -> "AsyncRealtimeClient":
+        # The client only appends /websocket (and turns http(s) into ws(s))
+        return AsyncRealtimeClient(self.realtime_url, self.key, max_retries=3)
+
+    def _on_event(self, table: str) -> None:
+        self.events += 1
+        self.on_change(table)
+
+    async def _listen_once(self) -> None:
+        """Connects, subscribes and returns when the connection or the channel is lost."""
+        client = self._client()
+        lost = asyncio.Event()
+
+        def on_state(state, error=None) -> None:
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                self.connected = True
+                logger.info("Realtime change feed subscribed to {}", ", ".join(self.tables))
+                self.on_change(None)
+            elif state in (RealtimeSubscribeStates.CLOSED, RealtimeSubscribeStates.CHANNEL_ERROR, RealtimeSubscribeStates.TIMED_OUT):
+                logger.warning("Realtime change feed channel {}: {}", state.value, error)
+                lost.set()
+
+        try:
+            await client.connect()
+            channel = client.channel("wellsync-fleet-changes")
+            for table in self.tables:
+                channel.on_postgres_changes("*", schema=self.schema, table=table, callback=lambda _payload, t=table: self._on_event(t))
+            await channel.subscribe(on_state)
+            while not lost.is_set() and client.is_connected:
+                try:
+                    await asyncio.wait_for(lost.wait(), timeout=self.retry_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.connected = False
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Realtime change feed unavailable ({}); relying on polling, retrying in {:.0f}s", e, self.retry_seconds)
+            await asyncio.sleep(self.retry_seconds)
+
+    async def start(self) -> None:
+        if self.available and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,276 @@
+"""
+Batched, resumable backfill of `fault_embeddings` for faults that have none.
+
+The `generate-fault-embedding` edge function embeds one fault per INSERT webhook, so historical faults
+are never embedded and a bulk import costs one embed call and one insert per row. `EmbeddingBackfill`
+instead:
+  * pages through faults without an embedding (`faults_without_embeddings`, migration 017) in fault_id
+    (keyset) order,
+  * embeds `batch_size` documents per embed call, with `concurrency` batches in flight,
+  * writes each batch's vectors with one upsert that skips faults the webhook embedded meanwhile, and
+  * checkpoints the fault_id below which every batch is stored, so a restarted run picks up there.
+
+Run from the `mcp/` directory (reads SUPABASE_URL, SUPABASE_KEY and COHERE_API_KEY like `wellsync.py`):
+
+    python -m wellsync_data.embedding_backfill --batch-size 96 --concurrency 8
+    python -m wellsync_data.embedding_backfill --embedder local   # deterministic stand-in, no API key
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from .fault_search import Embedder, HashingEmbedder, fault_document, vector_literal
+
+# (after_fault_id, max_rows) -> faults without an embedding, fault_id ascending
+PageFetcher = Callable[[str | None, int], Awaitable[list[dict]]]
+# Rows shaped like {"fault_id": ..., "embedding": "[...]"}
+RowWriter = Callable[[list[dict]], Awaitable[None]]
+
+
+class Checkpoint:
+    """Progress of a backfill run in a small JSON file, replaced atomically on every save."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: dict) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class EmbeddingBackfill:
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        write_rows: RowWriter,
+        embedder: Embedder,
+        checkpoint: Checkpoint | None = None,
+        page_size: int = 1000,
+        batch_size: int = 96,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+    ):
+        """
+        `batch_size` is the number of documents per embed call (96 is Cohere's maximum). Failed embed or
+        write calls are retried `max_retries` times with exponential backoff before the run stops.
+        """
+        self._fetch_page = fetch_page
+        self._write_rows = write_rows
+        self.embedder = embedder
+        self.checkpoint = checkpoint
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.embedded = 0
+        self.after_fault_id: str | None = None
+        # Batches complete out of order; the checkpoint only moves past a contiguous prefix of them
+        self._batch_ends: dict[int, str] = {}
+        self._finished: set[int] = set()
+        self._next_to_commit = 0
+
+    async def _retry(self, what: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning("{} failed ({}), retrying in {:.1f}s", what, e, delay)
+                await asyncio.sleep(delay)
+
+    def _commit(self, seq: int, count: int) -> None:
+        self.embedded += count
+        self._finished.add(seq)
+        advanced = False
+        while self._next_to_commit in self._finished:
+            self._finished.remove(self._next_to_commit)
+            self.after_fault_id = self._batch_ends.pop(self._next_to_commit)
+            self._next_to_commit += 1
+            advanced = True
+        if advanced and self.checkpoint is not None:
+            self.checkpoint.save({
+                "after_fault_id": self.after_fault_id,
+                "embedded": self.embedded,
+                "model": self.embedder.model,
+                "updated_at": time.time(),
+            })
+
+    async def _process(self, seq: int, faults: list[dict]) -> None:
+        vectors = await self._retry(
+            "Embed call", lambda: self.embedder.embed([fault_document(f) for f in faults], "search_document")
+        )
+        rows = [{"fault_id": f["fault_id"], "embedding": vector_literal(v)} for f, v in zip(faults, vectors)]
+        await self._retry("Embedding write", lambda: self._write_rows(rows))
+        self._commit(seq, len(rows))
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await self._process(*item)
+            finally:
+                queue.task_done()
+
+    async def run(self, limit: int | None = None, resume: bool = True) -> dict[str, Any]:
+        """Embeds up to `limit` faults (all by default), continuing from the checkpoint when `resume`."""
+        state = self.checkpoint.load() if self.checkpoint is not None and resume else None
+        if state:
+            self.after_fault_id = state.get("after_fault_id")
+            logger.info("Resuming after fault {} ({} embedded before)", self.after_fault_id, state.get("embedded", 0))
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        cursor = self.after_fault_id
+        queued = 0
+        seq = 0
+        last_report = started
+        exhausted = False
+        try:
+            while limit is None or queued < limit:
+                page_size = self.page_size if limit is None else min(self.page_size, limit - queued)
+                page = await self._retry("Fault page fetch", lambda: self._fetch_page(cursor, page_size))
+                if not page:
+                    exhausted = True
+                    break
+                for i in range(0, len(page), self.batch_size):
+                    batch = page[i:i + self.batch_size]
+                    self._batch_ends[seq] = batch[-1]["fault_id"]
+                    await self._put(queue, workers, (seq, batch))
+                    seq += 1
+                queued += len(page)
+                cursor = page[-1]["fault_id"]
+                if time.perf_counter() - last_report >= 10:
+                    last_report = time.perf_counter()
+                    logger.info("Embedded {} faults ({:.0f}/s)", self.embedded, self.embedded / (last_report - started))
+                if len(page) < page_size:
+                    exhausted = True
+                    break
+            for _ in workers:
+                await self._put(queue, workers, None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        if exhausted and self.checkpoint is not None:
+            # fault_ids are random UUIDs, so faults added later can sort before the cursor: the next
+            # run must start from the beginning again (the anti-join skips what is already embedded)
+            self.checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        logger.info("Backfill done: {} faults in {:.1f}s", self.embedded, elapsed)
+        return {
+            "embedded": self.embedded,
+            "seconds": round(elapsed, 2),
+            "faults_per_second": round(self.embedded / elapsed, 1) if elapsed else 0.0,
+            "after_fault_id": self.after_fault_id,
+            "complete": exhausted,
+        }
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, workers: list[asyncio.Task], item: Any) -> None:
+        """Queue `item`, surfacing a worker's error instead of waiting forever on a full queue."""
+        put = asyncio.ensure_future(queue.put(item))
+        while not put.done():
+            await asyncio.wait([put, *(w for w in workers if not w.done())], return_when=asyncio.FIRST_COMPLETED)
+            for worker in workers:
+                if worker.done() and not worker.cancelled() and worker.exception() is not None:
+                    put.cancel()
+                    raise worker.exception()
+
+
+def supabase_io(client: Any, db: Any) -> tuple[PageFetcher, RowWriter]:
+    """Page fetcher and row writer over a supabase-py `client`, run on a `SupabaseExecutor`."""
+    from postgrest.types import ReturnMethod
+
+    async def fetch_page(after: str | None, max_rows: int) -> list[dict]:
+        response = await db.execute(client.rpc("faults_without_embeddings", {"after_fault_id": after, "max_rows": max_rows}))
+        return response.data or []
+
+    async def write_rows(rows: list[dict]) -> None:
+        await db.execute(
+            client.table("fault_embeddings").upsert(
+                rows, on_conflict="fault_id", ignore_duplicates=True, returning=ReturnMethod.minimal
+            )
+        )
+
+    return fetch_page, write_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedder", choices=["cohere", "local"], default=os.getenv("FAULT_EMBEDDER", "cohere"))
+    parser.add_argument("--batch-size", type=int, default=96, help="Documents per embed call")
+    parser.add_argument("--page-size", type=int, default=1000, help="Faults fetched per page")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embed/write batches in flight")
+    parser.add_argument("--limit", type=int, help="Stop after this many faults")
+    parser.add_argument("--checkpoint", default=".embedding_backfill.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first fault")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from supabase import ClientOptions, create_client
+
+    from custom_mcp_tools.http_client import PooledHTTPClient
+    from .fault_search import CohereEmbedder
+    from .supabase_executor import SupabaseExecutor
+
+    load_dotenv()
+    client = create_client(
+        os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"], options=ClientOptions(headers={"Accept": "application/json"})
+    )
+    db = SupabaseExecutor(max_workers=args.concurrency + 1, max_pending=args.concurrency * 4)
+    fetch_page, write_rows = supabase_io(client, db)
+
+    async def run() -> dict:
+        http = None
+        if args.embedder == "local":
+            embedder: Embedder = HashingEmbedder()
+        else:
+            http = PooledHTTPClient(
+                base_url=os.getenv("COHERE_API_URL", "https://api.cohere.ai"),
+                max_connections=args.concurrency,
+                timeout=float(os.getenv("COHERE_API_TIMEOUT", "60")),
+            )
+            embedder = CohereEmbedder(http, os.environ["COHERE_API_KEY"], model=os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0"))
+        backfill = EmbeddingBackfill(
+            fetch_page, write_rows, embedder, Checkpoint(args.checkpoint),
+            page_size=args.page_size, batch_size=args.batch_size, concurrency=args.concurrency,
+        )
+        try:
+            return await backfill.run(limit=args.limit, resume=not args.restart)
+        finally:
+            if http is not None:
+                await http.aclose()
+            await db.shutdown()
+
+    print(json.dumps(asyncio.run(run())))
+
+
+if __name__ == "__main__":
+    main()
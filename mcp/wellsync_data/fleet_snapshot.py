@@ -0,0 +1,359 @@
+"""
+In-memory snapshot of the small, read-heavy fleet tables (`wells`, `parts`, `inventory`, `warehouses`).
+
+Each table is held as a `SnapshotTable`: rows are compact tuples in a list, with a primary-key map
+and hash indexes (value -> row positions) on the columns the read tools filter by. `FleetSnapshot`
+keeps the tables fresh by polling Supabase for rows whose `last_updated` is at or after the last
+watermark (see migration 016), with a periodic full reload to pick up deletes. Read tools answer
+from the snapshot and report `snapshot_age_seconds` so callers know how fresh the data is.
+"""
+
+import asyncio
+import bisect
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Iterable, Sequence
+
+from loguru import logger
+
+
+class SnapshotTable:
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[str],
+        key: str,
+        indexed: Sequence[str] = (),
+        sort_by: Sequence[str] | None = None,
+        optional: bool = False,
+    ):
+        """An `optional` table may not exist yet (its migration not applied); failing to load it is not an error."""
+        self.name = name
+        self.columns = tuple(columns)
+        self.key = key
+        self.indexed = tuple(indexed)
+        self.sort_by = tuple(sort_by) if sort_by else None
+        self.optional = optional
+        self._col = {c: i for i, c in enumerate(self.columns)}
+        self._key_col = self._col[key]
+        self._clear()
+
+    def _clear(self) -> None:
+        self._rows: list[tuple] = []
+        self._pos_by_key: dict[Any, int] = {}
+        self._indexes: dict[str, dict[Any, set[int]]] = {c: {} for c in self.indexed}
+        self._sorted: list[tuple] | None = None  # (*sort values, position), rebuilt lazily
+
+    def __len__(self) -> int:
+        return len(self._pos_by_key)
+
+    # --- Writes ---
+
+    def replace_all(self, rows: Iterable[dict]) -> list[dict]:
+        """
+        Replace the contents; returns the rows that are new or differ from what was held before, followed by
+        the last held version of every row that is gone, marked `"deleted": True`.
+        """
+        previous = {key: self._rows[pos] for key, pos in self._pos_by_key.items()}
+        self._clear()
+        changed = []
+        for row in rows:
+            values = tuple(row.get(c) for c in self.columns)
+            self._upsert(values)
+            if previous.get(values[self._key_col]) != values:
+                changed.append(row)
+        changed.extend(
+            {**dict(zip(self.columns, values)), "deleted": True}
+            for key, values in previous.items() if key not in self._pos_by_key
+        )
+        return changed
+
+    def upsert_many(self, rows: Iterable[dict]) -> list[dict]:
+        """Insert or update rows by key; returns the rows that are new or differ from the held version."""
+        changed = [row for row in rows if self._upsert(tuple(row.get(c) for c in self.columns))]
+        if changed:
+            self._sorted = None
+        return changed
+
+    def _upsert(self, values: tuple) -> bool:
+        key = values[self._key_col]
+        pos = self._pos_by_key.get(key)
+        if pos is not None and self._rows[pos] == values:
+            return False
+        if pos is None:
+            pos = len(self._rows)
+            self._rows.append(values)
+            self._pos_by_key[key] = pos
+        else:
+            old = self._rows[pos]
+            for column in self.indexed:
+                old_value = old[self._col[column]]
+                if old_value != values[self._col[column]]:
+                    bucket = self._indexes[column].get(old_value)
+                    if bucket is not None:
+                        bucket.discard(pos)
+                        if not bucket:
+                            del self._indexes[column][old_value]
+            self._rows[pos] = values
+        for column in self.indexed:
+            self._indexes[column].setdefault(values[self._col[column]], set()).add(pos)
+        return True
+
+    # --- Reads ---
+
+    def _as_dict(self, pos: int, fields: Sequence[str] | None = None) -> dict:
+        values = self._rows[pos]
+        if fields is None:
+            return dict(zip(self.columns, values))
+        return {f: values[self._col[f]] for f in fields}
+
+    def _matching_positions(self, filters: dict[str, Any]) -> set[int] | None:
+        """Intersect the hash-index buckets for `filters`; None means "no filter, all rows"."""
+        result: set[int] | None = None
+        for column, value in sorted(filters.items(), key=lambda kv: len(self._indexes[kv[0]].get(kv[1], ()))):
+            bucket = self._indexes[column].get(value, set())
+            result = set(bucket) if result is None else result & bucket
+            if not result:
+                return set()
+        return result
+
+    def get(self, key: Any) -> dict | None:
+        pos = self._pos_by_key.get(key)
+        return None if pos is None else self._as_dict(pos)
+
+    def find(self, fields: Sequence[str] | None = None, **filters: Any) -> list[dict]:
+        """Rows whose indexed columns equal the given values, in insertion order."""
+        positions = self._matching_positions(filters)
+        if positions is None:
+            positions = self._pos_by_key.values()
+        return [self._as_dict(pos, fields) for pos in sorted(positions)]
+
+    def page(
+        self,
+        after: Sequence[Any] | None,
+        limit: int,
+        fields: Sequence[str] | None = None,
+        **filters: Any,
+    ) -> tuple[list[dict], bool]:
+        """
+        Rows in `sort_by` order strictly after the `after` sort key, up to `limit`.
+        Returns (rows, has_more). Only rows from the cursor onwards are visited.
+        """
+        if self._sorted is None:
+            sort_cols = [self._col[c] for c in self.sort_by]
+            self._sorted = sorted(
+                (*(self._rows[pos][i] for i in sort_cols), pos) for pos in self._pos_by_key.values()
+            )
+        matching = self._matching_positions(filters)
+        start = 0
+        if after is not None:
+            # Any position sorts after the cursor row's own entry when keys are equal
+            start = bisect.bisect_right(self._sorted, (*after, float("inf")))
+        rows: list[dict] = []
+        for entry in self._sorted[start:]:
+            pos = entry[-1]
+            if matching is not None and pos not in matching:
+                continue
+            if len(rows) == limit:
+                return rows, True
+            rows.append(self._as_dict(pos, fields))
+        return rows, False
+
+
+# Tag prefix (as in `mcp.invalidate` / `mark_changed` tags) -> the snapshot table it reads
+TAG_TABLES = {
+    "wells": "wells", "well": "wells", "parts": "parts", "part": "parts",
+    "inventory": "inventory", "warehouses": "warehouses", "warehouse": "warehouses",
+}
+
+
+class FleetSnapshot:
+    """
+    Keeps `SnapshotTable`s in sync with Supabase.
+
+    `fetch(table, since)` is an async callable returning all rows of the `SnapshotTable`'s database table
+    (its `columns`), limited to rows with `last_updated >= since` when `since` is given. It is where the
+    caller plugs in its data access (e.g. the supabase executor).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[SnapshotTable, str | None], Awaitable[list[dict]]],
+        poll_seconds: float = 15.0,
+        full_refresh_seconds: float = 600.0,
+        max_staleness_seconds: float = 120.0,
+        overlap_seconds: float = 30.0,
+        wake_debounce_seconds: float = 0.25,
+    ):
+        self._fetch = fetch
+        self.poll_seconds = poll_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        # Re-read a small window before the watermark so rows committed late by a long transaction are not missed
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.wells = SnapshotTable(
+            "wells",
+            ("id", "name", "camp", "formation", "latitude", "longitude", "status",
+             "last_maintenance", "fault_details", "last_updated"),
+            key="id",
+            indexed=("status", "camp", "formation"),
+            sort_by=("name", "id"),
+        )
+        self.parts = SnapshotTable(
+            "parts",
+            ("part_id", "name", "description", "specifications", "manufacturer", "last_updated"),
+            key="part_id",
+            sort_by=("name", "part_id"),
+        )
+        self.inventory = SnapshotTable(
+            "inventory",
+            ("id", "part_id", "warehouse_id", "stock_level", "last_updated"),
+            key="id",
+            indexed=("part_id", "warehouse_id"),
+        )
+        self.warehouses = SnapshotTable(
+            "warehouses",
+            ("warehouse_id", "name", "latitude", "longitude", "cost_per_km", "last_updated"),
+            key="warehouse_id",
+            optional=True,
+        )
+        self.tables = (self.wells, self.parts, self.inventory, self.warehouses)
+        self._watermarks: dict[str, datetime | None] = {t.name: None for t in self.tables}
+        self._refreshed_at: float | None = None
+        self._full_refreshed_at: float | None = None
+        self._listeners: list[Callable[[str, list[dict]], None]] = []
+        self._unavailable: set[str] = set()
+        # Tables loaded at least once; a tag on a table not in here is never reported as synced
+        self._loaded: set[str] = set()
+        # Writes made through the server that the next sync has not picked up yet: tag -> monotonic time
+        self._pending_writes: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self.wake_debounce_seconds = wake_debounce_seconds
+
+    # --- Freshness ---
+
+    @property
+    def age_seconds(self) -> float | None:
+        """Seconds since the last successful sync, or None if never loaded."""
+        return None if self._refreshed_at is None else time.monotonic() - self._refreshed_at
+
+    @property
+    def is_fresh(self) -> bool:
+        age = self.age_seconds
+        return age is not None and age <= self.max_staleness_seconds
+
+    def mark_changed(self, *tags: str) -> None:
+        """
+        Record a write (e.g. tag `inventory:P001` after a dispatch) so `has_synced` reports the snapshot
+        as behind for it until a sync that started after the write has completed.
+        """
+        now = time.monotonic()
+        for tag in tags:
+            self._pending_writes[tag] = now
+
+    def has_synced(self, *tags: str) -> bool:
+        """
+        Whether the snapshot can answer reads of `tags` (`wells`, `well:<id>`, `inventory:<part_id>`, ...): their
+        table has loaded, and no write to them is newer than the last completed sync.
+        """
+        for tag in tags:
+            table = TAG_TABLES.get(tag.partition(":")[0])
+            if table is not None and table not in self._loaded:
+                return False
+            written_at = self._pending_writes.get(tag)
+            if written_at is None:
+                continue
+            if self._refreshed_at is not None and self._refreshed_at > written_at:
+                del self._pending_writes[tag]
+            else:
+                return False
+        return True
+
+    def add_listener(self, listener: Callable[[str, list[dict]], None]) -> None:
+        """
+        Called with (table name, new or changed rows) after every sync that found any; rows a full reload
+        no longer found come last, marked `"deleted": True`.
+        """
+        self._listeners.append(listener)
+
+    # --- Sync ---
+
+    @staticmethod
+    def _parse_ts(value: Any) -> datetime | None:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+
+    async def refresh(self, full: bool = False) -> None:
+        """Fetch changes for every table (or reload them completely)."""
+        now = time.monotonic()
+        full = full or self._full_refreshed_at is None or now - self._full_refreshed_at >= self.full_refresh_seconds
+        for table in self.tables:
+            watermark = None if full else self._watermarks[table.name]
+            since = (watermark - self.overlap).isoformat() if watermark else None
+            try:
+                rows = await self._fetch(table, since)
+            except Exception as e:
+                if not table.optional:
+                    raise
+                if table.name not in self._unavailable:
+                    self._unavailable.add(table.name)
+                    logger.warning("Snapshot table {} could not be loaded, continuing without it: {}", table.name, e)
+                continue
+            self._unavailable.discard(table.name)
+            self._loaded.add(table.name)
+            changed = table.replace_all(rows) if since is None else table.upsert_many(rows)
+            stamps = [ts for ts in (self._parse_ts(r.get("last_updated")) for r in rows) if ts]
+            if stamps:
+                self._watermarks[table.name] = max([*stamps, *filter(None, [self._watermarks[table.name]])])
+            if changed:
+                for listener in self._listeners:
+                    try:
+                        listener(table.name, changed)
+                    except Exception as e:
+                        logger.warning("Snapshot listener failed for {}: {}", table.name, e)
+        self._refreshed_at = now
+        if full:
+            self._full_refreshed_at = now
+            logger.info(
+                "Fleet snapshot loaded: {} wells, {} parts, {} inventory rows, {} warehouses.",
+                len(self.wells), len(self.parts), len(self.inventory), len(self.warehouses)
+            )
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Fleet snapshot refresh failed (age {}s): {}", self.age_seconds, e)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                # Let a burst of change events collapse into one delta poll
+                await asyncio.sleep(self.wake_debounce_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self) -> None:
+        """Poll for changes now instead of at the next interval (e.g. on a database change event)."""
+        self._wake.set()
+
+    async def start(self) -> None:
+        """Start background polling. The first load happens in the background too."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
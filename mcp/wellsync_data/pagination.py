@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST queries.
+
+Cursors are opaque to callers: a URL-safe base64 encoding of the sort-key values of the last row
+on a page. The next page is fetched with a PostgREST `or` filter that continues strictly after that
+row, so each page costs the same no matter how deep into the table it is (unlike OFFSET).
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Sequence
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the expected sort keys."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'.") from e
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'.")
+    return values
+
+
+def postgrest_timestamp(value: Any) -> str:
+    """
+    An ISO 8601 timestamp (string or datetime) as PostgREST writes a TIMESTAMP column: naive UTC, 'T'
+    separator, and no trailing zeros in the fraction (`2025-04-21T15:31:25.758`). Backends that answer
+    instead of PostgREST format their rows with this so cursors and output do not depend on the backend;
+    for naive UTC values the text also sorts in time order.
+    """
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if not parsed.microsecond:
+        return parsed.isoformat(timespec="seconds")
+    return parsed.isoformat(timespec="microseconds").rstrip("0")
+
+
+def clamp_limit(limit: int | None, default: int, maximum: int) -> int:
+    """Apply the default page size and the server-enforced maximum."""
+    if limit is None or limit <= 0:
+        return default
+    return min(limit, maximum)
+
+
+def _quote(value: Any) -> str:
+    # PostgREST reserved characters (commas, dots, parentheses) are allowed inside double quotes
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(columns: Sequence[str], values: Sequence[Any], descending: bool = False) -> str:
+    """
+    Build the PostgREST `or` filter for rows strictly after `values` in (`columns`) order, e.g.
+    `name.gt."Well-01",and(name.eq."Well-01",id.gt."<uuid>")` for ascending (name, id).
+    """
+    op = "lt" if descending else "gt"
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [f"{c}.eq.{_quote(v)}" for c, v in zip(columns[:i], values[:i])]
+        strict = f"{column}.{op}.{_quote(values[i])}"
+        if equal_prefix:
+            clauses.append(f"and({','.join(equal_prefix + [strict])})")
+        else:
+            clauses.append(strict)
+    return ",".join(clauses)
+
+
+def page_result(rows: list[dict], limit: int, cursor_columns: Sequence[str]) -> tuple[list[dict], str | None]:
+    """
+    Trim a `limit + 1` row fetch to `limit` rows and return the cursor for the next page
+    (None when this is the last page).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1].get(c) for c in cursor_columns])
@@ -0,0 +1,193 @@
+"""
+Warehouse sourcing: which warehouses can supply a part to a well, nearest first.
+
+`DistanceIndex` precomputes the great-circle distance (km) from every well to every warehouse
+(`wells.latitude/longitude` and `warehouses.latitude/longitude`, migration 018) as one
+wells x warehouses float32 matrix, so ranking the sources for a dispatch is a row lookup. Wells are
+added or moved in place as the fleet snapshot reports them; a warehouse change or `ttl_seconds`
+triggers a full rebuild from the loader. `rank_sources` combines one row with current stock levels.
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Iterable
+
+from loguru import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logger.info("numpy is not installed, sourcing distances are computed per request")
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Loader returns (wells, warehouses): rows with id/latitude/longitude and warehouse_id/latitude/longitude
+DistanceLoader = Callable[[], Awaitable[tuple[list[dict], list[dict]]]]
+
+
+def _coordinates(row: dict) -> tuple[float, float] | None:
+    lat, lon = row.get("latitude"), row.get("longitude")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _haversine_matrix(wells: "np.ndarray", warehouses: "np.ndarray") -> "np.ndarray":
+    """(n, 2) x (m, 2) degree coordinates -> (n, m) km; NaN where either side has no coordinates."""
+    w = np.radians(wells)[:, None, :]
+    h = np.radians(warehouses)[None, :, :]
+    a = np.sin((h[..., 0] - w[..., 0]) / 2) ** 2 + np.cos(w[..., 0]) * np.cos(h[..., 0]) * np.sin((h[..., 1] - w[..., 1]) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(np.float32)
+
+
+class DistanceIndex:
+    def __init__(self, loader: DistanceLoader, ttl_seconds: float = 3600.0):
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.warehouses: dict[str, dict] = {}
+        self._warehouse_ids: list[str] = []
+        self._warehouse_coords = None
+        self._matrix = None
+        self._row: dict[str, int] = {}
+        self._well_coords: dict[str, tuple[float, float] | None] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    @property
+    def ready(self) -> bool:
+        return self._matrix is not None
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def age_seconds(self) -> float | None:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def invalidate(self) -> None:
+        """Rebuild on the next `ensure_fresh` (e.g. a warehouse moved or was added)."""
+        self._loaded_at = None
+
+    def load(self, wells: Iterable[dict], warehouses: Iterable[dict]) -> None:
+        self.warehouses = {w["warehouse_id"]: w for w in warehouses}
+        self._warehouse_ids = sorted(self.warehouses)
+        self._warehouse_coords = np.array(
+            [_coordinates(self.warehouses[w]) or (np.nan, np.nan) for w in self._warehouse_ids], dtype=np.float64
+        ).reshape(-1, 2)
+        self._well_coords = {row["id"]: _coordinates(row) for row in wells}
+        self._row = {well_id: i for i, well_id in enumerate(self._well_coords)}
+        coords = np.array(
+            [c or (np.nan, np.nan) for c in self._well_coords.values()], dtype=np.float64
+        ).reshape(-1, 2)
+        self._matrix = _haversine_matrix(coords, self._warehouse_coords)
+        self._loaded_at = time.monotonic()
+
+    def update_wells(self, rows: Iterable[dict]) -> int:
+        """Adds new wells and recomputes moved ones; rows whose coordinates did not change are skipped."""
+        if self._matrix is None:
+            return 0
+        changed = [(row["id"], _coordinates(row)) for row in rows
+                   if row["id"] not in self._well_coords or self._well_coords[row["id"]] != _coordinates(row)]
+        if not changed:
+            return 0
+        coords = np.array([c or (np.nan, np.nan) for _, c in changed], dtype=np.float64).reshape(-1, 2)
+        distances = _haversine_matrix(coords, self._warehouse_coords)
+        new_rows = []
+        for (well_id, coordinates), row in zip(changed, distances):
+            self._well_coords[well_id] = coordinates
+            position = self._row.get(well_id)
+            if position is None:
+                self._row[well_id] = len(self._row)
+                new_rows.append(row)
+            else:
+                self._matrix[position] = row
+        if new_rows:
+            self._matrix = np.vstack([self._matrix, np.asarray(new_rows)])
+        return len(changed)
+
+    async def ensure_fresh(self) -> None:
+        """(Re)builds the matrix from the loader when stale; keeps the previous one if loading fails."""
+        if not self.available or not self.is_stale():
+            return
+        async with self._lock:
+            if not self.is_stale():
+                return
+            started = time.perf_counter()
+            try:
+                wells, warehouses = await self._loader()
+            except Exception as e:
+                logger.warning("Could not load the sourcing distance index: {}", e)
+                return
+            self.load(wells, warehouses)
+            logger.info(
+                "Built the sourcing distance index ({} wells x {} warehouses) in {:.2f}s",
+                len(self._row), len(self._warehouse_ids), time.perf_counter() - started
+            )
+
+    def distances(self, well_id: str) -> dict[str, float | None] | None:
+        """km from the well to each warehouse (None without coordinates); None if the well is not indexed."""
+        position = self._row.get(well_id)
+        if self._matrix is None or position is None:
+            return None
+        return {
+            warehouse_id: None if math.isnan(km) else float(km)
+            for warehouse_id, km in zip(self._warehouse_ids, self._matrix[position].tolist())
+        }
+
+
+def distances_from(coordinates: tuple[float, float] | None, warehouses: Iterable[dict]) -> dict[str, float | None]:
+    """km from one point to each warehouse, for wells the index does not hold (or when numpy is missing)."""
+    result = {}
+    for warehouse in warehouses:
+        target = _coordinates(warehouse)
+        result[warehouse["warehouse_id"]] = (
+            None if coordinates is None or target is None else haversine_km(*coordinates, *target)
+        )
+    return result
+
+
+def rank_sources(
+    stock: dict[str, int],
+    distances: dict[str, float | None],
+    quantity: int,
+    rank_by: str = "distance",
+    cost_per_km: dict[str, float] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    (candidates, short): warehouses holding at least `quantity` ranked by `rank_by` ("distance" or
+    "cost", i.e. distance x the warehouse's cost per km), then by stock; and warehouses with some but
+    too little stock. Warehouses without a known distance rank after every located one.
+    """
+    candidates, short = [], []
+    for warehouse_id, stock_level in stock.items():
+        km = distances.get(warehouse_id)
+        entry: dict[str, Any] = {
+            "warehouse_id": warehouse_id,
+            "stock_level": stock_level,
+            "distance_km": None if km is None else round(km, 1),
+        }
+        if cost_per_km is not None:
+            rate = cost_per_km.get(warehouse_id)
+            entry["travel_cost"] = None if km is None or rate is None else round(km * rate, 2)
+        if stock_level >= quantity:
+            candidates.append(entry)
+        elif stock_level > 0:
+            short.append(entry)
+    metric = "travel_cost" if rank_by == "cost" and cost_per_km is not None else "distance_km"
+    candidates.sort(key=lambda e: (e[metric] is None, e[metric] or 0.0, -e["stock_level"], e["warehouse_id"]))
+    short.sort(key=lambda e: -e["stock_level"])
+    return candidates, short
@@ -0,0 +1,546 @@
+"""
+Local SQLite read replica of the fleet tables, for servers on a slow or intermittent link.
+
+`SqliteReplica` keeps `wells`, `parts`, `inventory` and `faults` (the schema of `supabase/mock_data.sql`)
+in an indexed SQLite file and answers the hot read queries from it, so they take a local disk read and
+keep working while Supabase is unreachable. A background task pulls rows changed since each table's
+watermark (`last_updated`, stamped by the database on insert and update) through `fetch(table, since)`;
+the watermarks live in the file too, so a restart resumes with a delta instead of a full download.
+The small tables are also reloaded completely every `full_refresh_seconds` to pick up deletions.
+
+Writes cannot be answered locally. `enqueue_write` stores an order or dispatch in an outbox table and
+the same task replays the outbox in order, through `forward(kind, args)`, whenever the link is up.
+
+Reads run on a small pool of reader threads, each with its own connection (WAL mode lets them proceed
+while a sync writes), so a long scan never blocks the event loop; syncs and outbox updates run on a
+single writer thread.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, NamedTuple, Sequence
+
+from loguru import logger
+
+from wellsync_data.pagination import postgrest_timestamp
+
+
+class ReplicaTable(NamedTuple):
+    name: str
+    columns: tuple[str, ...]
+    key: str
+    watermark: str = "last_updated"
+    # CREATE INDEX column lists
+    indexes: tuple[str, ...] = ()
+    # Columns holding JSON documents (stored as text)
+    json_columns: tuple[str, ...] = ()
+    # TIMESTAMP columns, stored in PostgREST's text format so SQL comparisons order them correctly
+    timestamp_columns: tuple[str, ...] = ("last_updated",)
+    # Reloaded completely on full refreshes (to drop deleted rows); too large or append-only otherwise
+    full_refresh: bool = True
+    # Columns fetched and stored for syncing only, never returned by queries
+    sync_columns: tuple[str, ...] = ()
+
+    @property
+    def read_columns(self) -> tuple[str, ...]:
+        return tuple(c for c in self.columns if c not in self.sync_columns)
+
+
+TABLES = (
+    ReplicaTable(
+        "wells",
+        ("id", "name", "camp", "formation", "latitude", "longitude", "status", "last_maintenance", "fault_details", "last_updated"),
+        key="id",
+        indexes=("name, id", "status, name, id", "camp, name, id", "formation, name, id"),
+        json_columns=("fault_details",),
+    ),
+    ReplicaTable(
+        "parts",
+        ("part_id", "name", "description", "specifications", "manufacturer", "last_updated"),
+        key="part_id",
+        json_columns=("specifications",),
+    ),
+    ReplicaTable(
+        "inventory",
+        ("id", "part_id", "warehouse_id", "stock_level", "last_updated"),
+        key="id",
+        indexes=("part_id",),
+    ),
+    ReplicaTable(
+        "faults",
+        ("fault_id", "well_id", "part_id", "fault_type", "description", "timestamp", "last_updated"),
+        key="fault_id",
+        # Not "timestamp": a fault reported late, or backdated, would sort below the watermark and never arrive
+        watermark="last_updated",
+        indexes=('well_id, "timestamp" DESC, fault_id DESC',),
+        timestamp_columns=("timestamp", "last_updated"),
+        full_refresh=False,
+        sync_columns=("last_updated",),
+    ),
+)
+TABLES_BY_NAME = {t.name: t for t in TABLES}
+WELL_FILTERS = ("status", "camp", "formation")
+
+# fetch(table, since) -> pages of rows with the table's columns, changed at or after `since` (all rows when None)
+ReplicaFetch = Callable[[ReplicaTable, str | None], AsyncIterator[list[dict]]]
+# forward(kind, args) -> the write's result; raises ConnectionError only when the write was not sent (link down)
+WriteForwarder = Callable[[str, dict], Awaitable[dict]]
+
+
+def _quoted(columns: Sequence[str]) -> str:
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _parse_ts(value: Any) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _stored_value(table: ReplicaTable, column: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if column in table.json_columns:
+        return json.dumps(value)
+    if column in table.timestamp_columns:
+        # Bounds and cursors go through the same function, so stored and compared text always agree
+        return postgrest_timestamp(value)
+    return value
+
+
+def _add_fault_filters(
+    clauses: list[str], args: list[Any], since: str | None, until: str | None, fault_type: str | None, part_id: str | None
+) -> None:
+    """Appends the optional window and equality filters of a faults query."""
+    for column, op, value in (
+        ("timestamp", ">=", postgrest_timestamp(since) if since else None),
+        ("timestamp", "<", postgrest_timestamp(until) if until else None),
+        ("fault_type", "=", fault_type),
+        ("part_id", "=", part_id),
+    ):
+        if value is not None:
+            clauses.append(f'"{column}" {op} ?')
+            args.append(value)
+
+
+class SqliteReplica:
+    def __init__(
+        self,
+        path: str,
+        fetch: ReplicaFetch,
+        forward: WriteForwarder | None = None,
+        poll_seconds: float = 30.0,
+        full_refresh_seconds: float = 3600.0,
+        overlap_seconds: float = 30.0,
+        on_change: Callable[[str, list[dict]], None] | None = None,
+        read_workers: int = 4,
+    ):
+        """`on_change(table, rows)` is called with the rows each sync brought in (e.g. to drop cached results)."""
+        self.path = path
+        self._fetch = fetch
+        self._forward = forward
+        self.poll_seconds = poll_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.on_change = on_change
+        self.online = False
+        self.forwarded_writes = 0
+        self.rejected_writes = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-replica")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sqlite-replica-read")
+        # One read connection per thread (sqlite3 connections must not be shared between concurrent readers)
+        self._local = threading.local()
+        self._read_conns: list[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._full_refreshed_at: float | None = None
+        self._write_conn = self._connect()
+        self._create_schema()
+        self._pending_writes = self._count_pending()
+        # table -> wall time of its last successful sync, kept in memory so reads need not query sync_state
+        self._synced_at = {r["table_name"]: r["synced_at"] for r in self._state().values()}
+
+    # --- Storage ---
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._write_conn
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_state (table_name TEXT PRIMARY KEY, watermark TEXT, synced_at REAL)")
+        for table in TABLES:
+            columns = ", ".join(f'"{c}"' + (" PRIMARY KEY" if c == table.key else "") for c in table.columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table.name} ({columns})")
+            existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table.name})")}
+            missing = [c for c in table.columns if c not in existing]
+            if missing:
+                # A file from an older version: add the columns and reload the table to fill them in
+                for column in missing:
+                    conn.execute(f'ALTER TABLE {table.name} ADD COLUMN "{column}"')
+                conn.execute("DELETE FROM sync_state WHERE table_name = ?", (table.name,))
+                logger.info("Replica table {} gained {}, reloading it", table.name, ", ".join(missing))
+            for i, index in enumerate(table.indexes):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table.name}_idx_{i} ON {table.name} ({index})")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, args TEXT NOT NULL, "
+            "created_at REAL NOT NULL, state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, result TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_state_idx ON outbox (state, id)")
+
+    def _count_pending(self) -> int:
+        return self._write_conn.execute("SELECT count(*) FROM outbox WHERE state = 'pending'").fetchone()[0]
+
+    def _read_conn(self) -> sqlite3.Connection:
+        """This thread's read connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
+    def _read(self, sql: str, args: Sequence[Any] = ()) -> list[sqlite3.Row]:
+        return self._read_conn().execute(sql, args).fetchall()
+
+    async def _on_reader(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._readers, fn, *args)
+
+    def _state(self) -> dict[str, sqlite3.Row]:
+        return {r["table_name"]: r for r in self._read("SELECT * FROM sync_state")}
+
+    def _apply_page(self, table: ReplicaTable, rows: list[dict]) -> None:
+        """Writer thread: upserts one fetched page in its own transaction."""
+        values = [tuple(_stored_value(table, c, r.get(c)) for c in table.columns) for r in rows]
+        with self._transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table.name} ({_quoted(table.columns)}) VALUES ({', '.join('?' * len(table.columns))})",
+                values,
+            )
+
+    def _finish_sync(self, table: ReplicaTable, seen_keys: set | None, watermark: str | None) -> list[dict]:
+        """
+        Writer thread: after a complete reload (`seen_keys` holds every key it brought in) deletes the rows
+        that are gone upstream, and stores the new watermark; returns the deleted rows.
+        """
+        removed: list[dict] = []
+        with self._transaction() as conn:
+            if seen_keys is not None:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_keys (key PRIMARY KEY)")
+                conn.execute("DELETE FROM seen_keys")
+                conn.executemany("INSERT OR IGNORE INTO seen_keys (key) VALUES (?)", ((k,) for k in seen_keys))
+                stale = f'FROM {table.name} WHERE "{table.key}" NOT IN (SELECT key FROM seen_keys)'
+                removed = [dict(r) for r in conn.execute(f"SELECT {_quoted(table.columns)} {stale}")]
+                conn.execute(f"DELETE {stale}")
+                conn.execute("DELETE FROM seen_keys")
+            conn.execute(
+                "INSERT INTO sync_state (table_name, watermark, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET watermark = excluded.watermark, synced_at = excluded.synced_at",
+                (table.name, watermark, time.time()),
+            )
+        return removed
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._write_conn
+        conn.execute("BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def _on_writer(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    # --- Freshness ---
+
+    @property
+    def ready(self) -> bool:
+        """Whether every table has been loaded at least once (possibly in an earlier run)."""
+        return len(self._synced_at) == len(TABLES)
+
+    def age_seconds(self) -> float | None:
+        """Seconds since the oldest table's last successful sync, or None before the first."""
+        if not self.ready:
+            return None
+        return time.time() - min(self._synced_at.values())
+
+    @property
+    def pending_writes(self) -> int:
+        return self._pending_writes
+
+    # --- Sync ---
+
+    async def sync(self, full: bool = False) -> None:
+        """Pulls changes for every table (reloading the small ones completely when `full`)."""
+        state = await self._on_reader(self._state)
+        for table in TABLES:
+            stored = _parse_ts(state[table.name]["watermark"]) if table.name in state else None
+            replace = stored is None or (full and table.full_refresh)
+            since = None if replace else (stored - self.overlap).isoformat()
+            watermark = stored
+            # Keys seen by a full reload of a small table, to drop the rows deleted upstream afterwards
+            seen_keys: set | None = set() if replace and table.full_refresh else None
+            # Each page is stored as it arrives, so a first sync of a large table never sits in memory whole;
+            # the watermark only moves once every page is in, so an interrupted sync starts over
+            async for rows in self._fetch(table, since):
+                await self._on_writer(self._apply_page, table, rows)
+                for row in rows:
+                    ts = _parse_ts(row.get(table.watermark))
+                    if ts is not None and (watermark is None or ts > watermark):
+                        watermark = ts
+                    if seen_keys is not None:
+                        seen_keys.add(row[table.key])
+                self._changed(table, rows)
+            # A full reload that finds no rows at all is more likely a failed read than an emptied table
+            removed = await self._on_writer(
+                self._finish_sync, table, seen_keys or None, watermark.isoformat() if watermark else None
+            )
+            self._synced_at[table.name] = time.time()
+            self._changed(table, removed)
+
+    def _changed(self, table: ReplicaTable, rows: list[dict]) -> None:
+        if rows and self.on_change is not None:
+            try:
+                self.on_change(table.name, rows)
+            except Exception as e:
+                logger.warning("Replica change callback failed for {}: {}", table.name, e)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            full = self._full_refreshed_at is None or now - self._full_refreshed_at >= self.full_refresh_seconds
+            try:
+                await self.sync(full=full)
+                if full:
+                    self._full_refreshed_at = now
+                if not self.online:
+                    logger.info("Replica synced ({}); {} queued writes to forward", self.path, self._pending_writes)
+                self.online = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.online or self._full_refreshed_at is None:
+                    logger.warning("Replica sync failed, serving local data (age {}s): {}", self.age_seconds(), e)
+                self.online = False
+            if self.online and self._pending_writes:
+                await self.forward_pending()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self) -> None:
+        """Sync (and forward queued writes) now instead of at the next interval."""
+        self._wake.set()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+        self._write_conn.close()
+
+    # --- Write queue ---
+
+    def _insert_write(self, kind: str, args: dict) -> int:
+        cursor = self._write_conn.execute(
+            "INSERT INTO outbox (kind, args, created_at) VALUES (?, ?, ?)", (kind, json.dumps(args), time.time())
+        )
+        return cursor.lastrowid
+
+    async def enqueue_write(self, kind: str, args: dict) -> int:
+        """Stores a write for forwarding; returns its queue id. Queued writes are replayed in order."""
+        queue_id = await self._on_writer(self._insert_write, kind, args)
+        self._pending_writes += 1
+        return queue_id
+
+    def _finish_write(self, queue_id: int, state: str, result: dict) -> None:
+        self._write_conn.execute(
+            "UPDATE outbox SET state = ?, attempts = attempts + 1, result = ? WHERE id = ?",
+            (state, json.dumps(result, default=str), queue_id),
+        )
+
+    def _record_attempt(self, queue_id: int, error: str) -> None:
+        self._write_conn.execute("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?", (error, queue_id))
+
+    async def forward_pending(self) -> int:
+        """Replays queued writes oldest first until the outbox is empty or the link drops; returns how many were sent."""
+        if self._forward is None:
+            return 0
+        sent = 0
+        while True:
+            rows = await self._on_reader(
+                self._read, "SELECT id, kind, args FROM outbox WHERE state = 'pending' ORDER BY id LIMIT 1"
+            )
+            if not rows:
+                return sent
+            row = rows[0]
+            try:
+                result = await self._forward(row["kind"], json.loads(row["args"]))
+            except ConnectionError as e:
+                await self._on_writer(self._record_attempt, row["id"], str(e))
+                logger.info("Link still down, {} queued writes kept: {}", self._pending_writes, e)
+                return sent
+            ok = result.get("status") == "success"
+            # A write sent without an answer is never replayed: it may have been applied
+            state = "sent" if ok else ("unknown" if result.get("outcome_unknown") else "rejected")
+            await self._on_writer(self._finish_write, row["id"], state, result)
+            self._pending_writes -= 1
+            sent += 1
+            if ok:
+                self.forwarded_writes += 1
+            else:
+                self.rejected_writes += 1
+                logger.warning("Queued {} #{} was {} when forwarded: {}", row["kind"], row["id"], state, result.get("message"))
+
+    async def queued_writes(self, limit: int = 50) -> list[dict[str, Any]]:
+        """The most recent outbox entries, newest first, with their state and forwarding result."""
+        rows = await self._on_reader(
+            self._read,
+            "SELECT id, kind, args, created_at, state, attempts, last_error, result FROM outbox ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        return [
+            {
+                "queue_id": r["id"],
+                "kind": r["kind"],
+                "args": json.loads(r["args"]),
+                "queued_at": datetime.fromtimestamp(r["created_at"], timezone.utc).isoformat(),
+                "state": r["state"],
+                "attempts": r["attempts"],
+                "last_error": r["last_error"],
+                "result": json.loads(r["result"]) if r["result"] else None,
+            }
+            for r in rows
+        ]
+
+    # --- Queries (same interface as PostgresBackend) ---
+
+    def _query_rows(self, table: ReplicaTable, sql: str, args: Sequence[Any]) -> list[dict[str, Any]]:
+        rows = [dict(r) for r in self._read(sql, args)]
+        for column in table.json_columns:
+            for row in rows:
+                if row.get(column) is not None:
+                    row[column] = json.loads(row[column])
+        return rows
+
+    def well_index_rows(self) -> list[dict[str, Any]]:
+        """id and name of every well (blocking: for worker threads, like the well resolver's loader)."""
+        return self._query_rows(TABLES_BY_NAME["wells"], 'SELECT "id", "name" FROM wells', ())
+
+    async def _query(self, table: ReplicaTable, sql: str, args: Sequence[Any]) -> list[dict[str, Any]]:
+        return await self._on_reader(self._query_rows, table, sql, args)
+
+    async def well_index(self) -> list[dict[str, Any]]:
+        return await self._on_reader(self.well_index_rows)
+
+    async def wells(self, filters: dict[str, str], after: Sequence[Any] | None, limit: int) -> list[dict[str, Any]]:
+        table = TABLES_BY_NAME["wells"]
+        clauses, args = [], []
+        for column in WELL_FILTERS:
+            if column in filters:
+                clauses.append(f'"{column}" = ?')
+                args.append(filters[column])
+        if after:
+            clauses.append('("name", "id") > (?, ?)')
+            args.extend(after[:2])
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        sql = f'SELECT {_quoted(table.columns)} FROM wells {where}ORDER BY "name", "id" LIMIT ?'
+        return await self._query(table, sql, [*args, limit])
+
+    async def faults(
+        self,
+        well_id: str,
+        since: str | None,
+        until: str | None,
+        fault_type: str | None,
+        part_id: str | None,
+        after: Sequence[Any] | None,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        table = TABLES_BY_NAME["faults"]
+        clauses, args = ['"well_id" = ?'], [well_id]
+        _add_fault_filters(clauses, args, since, until, fault_type, part_id)
+        if after:
+            clauses.append('("timestamp", "fault_id") < (?, ?)')
+            args.extend([postgrest_timestamp(after[0]), after[1]])
+        sql = (
+            f'SELECT {_quoted(table.read_columns)} FROM faults WHERE {" AND ".join(clauses)} '
+            'ORDER BY "timestamp" DESC, "fault_id" DESC LIMIT ?'
+        )
+        return await self._query(table, sql, [*args, limit])
+
+    async def faults_for_wells(
+        self,
+        well_ids: Sequence[str],
+        since: str | None,
+        until: str | None,
+        fault_type: str | None,
+        part_id: str | None,
+        limit_per_well: int,
+    ) -> list[dict[str, Any]]:
+        """The newest `limit_per_well` faults of each of `well_ids` in one query, grouped by well, newest first."""
+        if not well_ids:
+            return []
+        table = TABLES_BY_NAME["faults"]
+        clauses, args = [f'"well_id" IN ({", ".join("?" * len(well_ids))})'], list(well_ids)
+        _add_fault_filters(clauses, args, since, until, fault_type, part_id)
+        sql = (
+            f'SELECT {_quoted(table.read_columns)} FROM ('
+            f'SELECT {_quoted(table.read_columns)}, ROW_NUMBER() OVER '
+            '(PARTITION BY "well_id" ORDER BY "timestamp" DESC, "fault_id" DESC) AS "rank" '
+            f'FROM faults WHERE {" AND ".join(clauses)}'
+            ') WHERE "rank" <= ? ORDER BY "well_id", "timestamp" DESC, "fault_id" DESC'
+        )
+        return await self._query(table, sql, [*args, limit_per_well])
+
+    async def inventory(self, part_id: str) -> list[dict[str, Any]]:
+        return await self._query(
+            TABLES_BY_NAME["inventory"], 'SELECT "warehouse_id", "stock_level" FROM inventory WHERE "part_id" = ?', (part_id,)
+        )
+
+    async def inventory_many(self, part_ids: Sequence[str]) -> list[dict[str, Any]]:
+        """part_id, warehouse_id and stock_level of every inventory row for any of `part_ids`."""
+        if not part_ids:
+            return []
+        return await self._query(
+            TABLES_BY_NAME["inventory"],
+            f'SELECT "part_id", "warehouse_id", "stock_level" FROM inventory WHERE "part_id" IN ({", ".join("?" * len(part_ids))})',
+            list(part_ids),
+        )
+
+    async def parts(self) -> list[dict[str, Any]]:
+        """Every part, by name."""
+        table = TABLES_BY_NAME["parts"]
+        return await self._query(table, f'SELECT {_quoted(table.read_columns)} FROM parts ORDER BY "name", "part_id"', ())
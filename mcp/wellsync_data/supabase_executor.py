@@ -0,0 +1,106 @@
+"""
+Bounded executor that keeps synchronous supabase-py calls off the event loop.
+
+supabase-py's `Client` is synchronous: `query.execute()` blocks for a full PostgREST round-trip.
+Called directly from a tool, that stalls the uvicorn loop and every other SSE session with it.
+`SupabaseExecutor` runs those calls on a small thread pool instead. At most `max_workers` queries
+run at once; up to `max_pending` more may wait for a slot (for at most `queue_timeout` seconds).
+Anything beyond that fails fast with `BackendBusyError` rather than piling up unbounded work.
+
+An optional `observe(target, seconds, ok)` callback receives the run time of every `execute()`,
+labelled by table or RPC name, for latency metrics.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class BackendBusyError(RuntimeError):
+    """Raised when the executor's wait queue is full or a caller waited too long for a slot."""
+
+
+def _query_target(query: Any) -> str:
+    """Table or RPC name of a postgrest builder, e.g. `wells` or `rpc/get_fault_summary`."""
+    try:
+        path = str(query.request.path)
+    except AttributeError:
+        return "unknown"
+    _, _, target = path.partition("/rest/v1/")
+    return target or path.rsplit("/", 1)[-1]
+
+
+class SupabaseExecutor:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        max_pending: int = 64,
+        queue_timeout: float = 5.0,
+        observe: Callable[[str, float, bool], None] | None = None,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase")
+        self._slots = asyncio.Semaphore(max_workers)
+        self._pending = 0
+        self._in_flight = 0
+        self.observe = observe
+
+    @property
+    def pending(self) -> int:
+        """Number of callers waiting for a worker slot."""
+        return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running on the pool."""
+        return self._in_flight
+
+    async def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on the pool and await its result."""
+        if self._pending >= self.max_pending:
+            raise BackendBusyError(
+                f"Database queue is full ({self._pending} calls waiting), try again shortly."
+            )
+        self._pending += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise BackendBusyError(
+                f"Timed out after {self.queue_timeout}s waiting for a database slot."
+            ) from None
+        finally:
+            self._pending -= 1
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def execute(self, query: Any) -> Any:
+        """Run a supabase-py/postgrest query builder's `execute()` on the pool."""
+        if self.observe is None:
+            return await self.call(query.execute)
+        target = _query_target(query)
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await self.call(query.execute)
+            ok = True
+            return result
+        finally:
+            self.observe(target, time.perf_counter() - started, ok)
+
+    async def shutdown(self) -> None:
+        """Stop accepting work and wait for running calls to finish."""
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._pool.shutdown, wait=True)
+        )
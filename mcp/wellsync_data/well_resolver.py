@@ -0,0 +1,226 @@
+"""
+In-process resolver for well identifiers.
+
+Tools accept either a well UUID or a well name ("Well-13", "well 13", "WELL13"...). Instead of a
+`wells` lookup per call, `WellResolver` keeps a bidirectional name <-> UUID index in memory. The index
+is loaded on first use and refreshed when it is older than `ttl_seconds` or after `invalidate()`
+(call it from a change notification when wells are added or renamed).
+"""
+
+import difflib
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable
+
+from loguru import logger
+
+# Loader returns rows shaped like `{"id": "<uuid>", "name": "Well-01"}`
+WellRowsLoader = Callable[[], list[dict]]
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_well_name(name: str) -> str:
+    """
+    Case- and punctuation-insensitive key for a well name.
+    Leading zeros in numbers are dropped so "Well-03", "well 3" and "WELL_003" share a key.
+    """
+    key = _NON_ALNUM.sub("", name.strip().lower())
+    return _DIGITS.sub(lambda m: str(int(m.group())), key)
+
+
+def parse_uuid(value: str) -> str | None:
+    """Return the canonical UUID string if `value` is a UUID, otherwise None."""
+    try:
+        return str(uuid.UUID(value))
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+@dataclass(frozen=True)
+class WellMatch:
+    identifier: str
+    well_id: str | None
+    name: str | None
+    # One of "uuid", "exact", "normalized", "fuzzy", "not_found" or "ambiguous"
+    match: str
+    suggestions: tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def found(self) -> bool:
+        return self.well_id is not None
+
+
+class WellResolver:
+    def __init__(
+        self,
+        loader: WellRowsLoader,
+        ttl_seconds: float = 300.0,
+        fuzzy_cutoff: float = 0.85,
+        miss_refresh_seconds: float = 10.0,
+    ):
+        """
+        `loader` fetches every well's id and name. `miss_refresh_seconds` lets an unknown name trigger
+        an early reload (e.g. a well created a moment ago) at most that often.
+        """
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._has_index = False # invalidate() clears _loaded_at, not the index a failed reload falls back to
+        self._id_by_name: dict[str, str] = {}
+        self._id_by_key: dict[str, str] = {}
+        self._ambiguous_keys: set[str] = set()
+        self._name_by_id: dict[str, str] = {}
+
+    # --- Index maintenance ---
+
+    def invalidate(self) -> None:
+        """Mark the index stale so the next lookup reloads it."""
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[dict]) -> None:
+        """Replace the index with the given `{"id", "name"}` rows."""
+        id_by_name: dict[str, str] = {}
+        id_by_key: dict[str, str] = {}
+        ambiguous: set[str] = set()
+        name_by_id: dict[str, str] = {}
+        for row in rows:
+            well_id, name = row.get("id"), row.get("name")
+            if not well_id or not name:
+                continue
+            well_id = str(well_id)
+            id_by_name[name] = well_id
+            name_by_id[well_id] = name
+            key = normalize_well_name(name)
+            if key in id_by_key and id_by_key[key] != well_id:
+                ambiguous.add(key)
+            id_by_key[key] = well_id
+        for key in ambiguous:
+            id_by_key.pop(key, None)
+
+        self._id_by_name = id_by_name
+        self._id_by_key = id_by_key
+        self._ambiguous_keys = ambiguous
+        self._name_by_id = name_by_id
+        self._loaded_at = time.monotonic()
+        self._has_index = True
+        logger.info("Well resolver index loaded with {} wells.", len(name_by_id))
+
+    def _age(self) -> float | None:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def _refresh(self, force: bool = False) -> None:
+        if not force and not self.is_stale:
+            return
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            age = self._age()
+            if age is not None and age < (self.miss_refresh_seconds if force else self.ttl_seconds):
+                return
+            try:
+                rows = self._loader()
+            except Exception as e:
+                if not self._has_index:
+                    raise
+                logger.warning("Well resolver refresh failed, serving previous index: {}", e)
+                return
+            self.load(rows or [])
+
+    # --- Lookups ---
+
+    def name_for(self, well_id: str) -> str | None:
+        self._refresh()
+        return self._name_by_id.get(str(well_id))
+
+    def resolve(self, identifier: str) -> WellMatch:
+        """Resolve a single UUID or well name."""
+        return self.resolve_many([identifier])[identifier]
+
+    def resolve_many(self, identifiers: Iterable[str]) -> dict[str, WellMatch]:
+        """
+        Resolve many identifiers against one snapshot of the index. Returns a dict keyed by the
+        original identifier. Raises only if the index has never been loaded and the loader fails.
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        self._refresh()
+        results = {identifier: self._lookup(identifier) for identifier in identifiers}
+        misses = self._misses_to_retry(results)
+        if misses:
+            self._refresh(force=True)
+            results.update({identifier: self._lookup(identifier) for identifier in misses})
+        return results
+
+    async def aresolve_many(
+        self, identifiers: Iterable[str], run_blocking: Callable[..., Awaitable]
+    ) -> dict[str, WellMatch]:
+        """
+        Async variant of `resolve_many`. Lookups are served from memory; only an index reload is
+        handed to `run_blocking(fn, *args)` (e.g. `SupabaseExecutor.call`) so the event loop never
+        waits on the loader.
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        if self.is_stale:
+            await run_blocking(self._refresh)
+        results = {identifier: self._lookup(identifier) for identifier in identifiers}
+        misses = self._misses_to_retry(results)
+        if misses:
+            await run_blocking(self._refresh, True)
+            results.update({identifier: self._lookup(identifier) for identifier in misses})
+        return results
+
+    async def aresolve(self, identifier: str, run_blocking: Callable[..., Awaitable]) -> WellMatch:
+        return (await self.aresolve_many([identifier], run_blocking))[identifier]
+
+    @property
+    def is_stale(self) -> bool:
+        age = self._age()
+        return age is None or age >= self.ttl_seconds
+
+    def _misses_to_retry(self, results: dict[str, WellMatch]) -> list[str]:
+        """Identifiers worth an early reload: unknown names, when the index is old enough to retry."""
+        age = self._age()
+        if age is not None and age < self.miss_refresh_seconds:
+            return []
+        return [i for i, m in results.items() if m.match == "not_found"]
+
+    def _lookup(self, identifier: str) -> WellMatch:
+        raw = (identifier or "").strip()
+        as_uuid = parse_uuid(raw)
+        if as_uuid:
+            return WellMatch(identifier, as_uuid, self._name_by_id.get(as_uuid), "uuid")
+
+        well_id = self._id_by_name.get(raw)
+        if well_id:
+            return WellMatch(identifier, well_id, self._name_by_id[well_id], "exact")
+
+        key = normalize_well_name(raw)
+        if key in self._ambiguous_keys:
+            names = tuple(sorted(n for n in self._id_by_name if normalize_well_name(n) == key))
+            return WellMatch(identifier, None, None, "ambiguous", names)
+        well_id = self._id_by_key.get(key)
+        if well_id:
+            return WellMatch(identifier, well_id, self._name_by_id[well_id], "normalized")
+
+        if not key:
+            return WellMatch(identifier, None, None, "not_found")
+        # Fuzzy matching only tolerates typos in the text part; numbers must match exactly so that
+        # "Well-113" never resolves to "Well-13".
+        digits = tuple(_DIGITS.findall(key))
+        candidates = [k for k in self._id_by_key if tuple(_DIGITS.findall(k)) == digits]
+        close = difflib.get_close_matches(key, candidates, n=3, cutoff=self.fuzzy_cutoff)
+        suggestions = tuple(self._name_by_id[self._id_by_key[k]] for k in close)
+        if len(close) == 1 or (
+            len(close) > 1
+            and difflib.SequenceMatcher(None, key, close[0]).ratio()
+            > difflib.SequenceMatcher(None, key, close[1]).ratio()
+        ):
+            well_id = self._id_by_key[close[0]]
+            return WellMatch(identifier, well_id, self._name_by_id[well_id], "fuzzy", suggestions)
+        return WellMatch(identifier, None, None, "not_found", suggestions)
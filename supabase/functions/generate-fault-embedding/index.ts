@@ -54,7 +54,8 @@ serve(async (req) => {
     console.log(`Processing fault ID: ${newFault.fault_id}, Type: ${newFault.fault_type}`);
 
     // --- Text Preparation for Embedding ---
-    const textToEmbed = `Fault Type: ${newFault.fault_type || 'Unknown'}. Status: ${newFault.status || 'Unknown'}`;
+    // Same document as fault_document() in mcp/wellsync_data/fault_search.py (used by the batch backfill)
+    const textToEmbed = `Fault Type: ${newFault.fault_type || 'Unknown'}. ${newFault.description || ''}`.trim();
     console.log(`Text to embed: "${textToEmbed}"`);
 
     // --- Call Cohere Embed API using fetch ---
@@ -93,12 +94,13 @@ serve(async (req) => {
 
     // --- Store Embedding in Supabase ---
     console.log('Storing embedding in fault_embeddings table...');
+    // fault_id is unique (migration 017): a fault the backfill already embedded is left as is
     const { error: insertError } = await supabaseAdmin
       .from('fault_embeddings')
-      .insert({
+      .upsert({
         fault_id: newFault.fault_id,
         embedding: embedding,
-      });
+      }, { onConflict: 'fault_id', ignoreDuplicates: true });
 
     if (insertError) {
       console.error('Error inserting embedding:', insertError);
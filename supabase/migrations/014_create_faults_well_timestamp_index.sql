@@ -0,0 +1,8 @@
+-- Migration to add a composite index for paginated fault history lookups
+
+-- get_faults_by_well (MCP server) filters on well_id, optionally bounds "timestamp",
+-- and pages in ("timestamp" DESC, fault_id DESC) keyset order. This index serves the
+-- filter, the window bounds and the sort, so a page costs the same regardless of how
+-- much history a well has.
+CREATE INDEX IF NOT EXISTS faults_well_id_timestamp_fault_id_idx
+ON faults (well_id, "timestamp" DESC, fault_id DESC);
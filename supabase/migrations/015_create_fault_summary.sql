@@ -0,0 +1,103 @@
+-- Migration to add an incrementally maintained fault summary and the get_fault_summary RPC
+
+-- Daily fault counts per (camp, formation, fault_type, part_id). Maintained by a trigger on
+-- faults, so aggregate questions read a few small rows instead of scanning the faults table.
+-- camp/formation are captured from the well at the time the fault is recorded.
+CREATE TABLE IF NOT EXISTS fault_summary_daily (
+    bucket_date DATE NOT NULL,
+    camp character varying(50) NOT NULL,
+    formation character varying(50) NOT NULL,
+    fault_type character varying(50) NOT NULL,
+    part_id character varying(10) NOT NULL,
+    fault_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_date, camp, formation, fault_type, part_id)
+);
+
+-- Apply a +1/-1 delta for one fault row
+CREATE OR REPLACE FUNCTION fault_summary_apply(f faults, delta integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO fault_summary_daily (bucket_date, camp, formation, fault_type, part_id, fault_count)
+  SELECT f."timestamp"::date, w.camp, w.formation, f.fault_type, f.part_id, delta
+  FROM wells w
+  WHERE w.id = f.well_id
+  ON CONFLICT (bucket_date, camp, formation, fault_type, part_id)
+  DO UPDATE SET fault_count = fault_summary_daily.fault_count + EXCLUDED.fault_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION fault_summary_on_fault_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM fault_summary_apply(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM fault_summary_apply(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS faults_update_summary ON faults;
+CREATE TRIGGER faults_update_summary
+AFTER INSERT OR UPDATE OF well_id, part_id, fault_type, "timestamp" OR DELETE ON faults
+FOR EACH ROW EXECUTE FUNCTION fault_summary_on_fault_change();
+
+-- One-time backfill from existing faults
+TRUNCATE fault_summary_daily;
+INSERT INTO fault_summary_daily (bucket_date, camp, formation, fault_type, part_id, fault_count)
+SELECT f."timestamp"::date, w.camp, w.formation, f.fault_type, f.part_id, count(*)
+FROM faults f
+JOIN wells w ON w.id = f.well_id
+GROUP BY 1, 2, 3, 4, 5;
+
+-- Aggregate the summary by any subset of camp/formation/fault_type/part_id and an optional
+-- time bucket ('day', 'week', 'month' or NULL for the whole window). Columns not in group_by
+-- come back as NULL.
+DROP FUNCTION IF EXISTS get_fault_summary(text[], text, date, date, text, text, text, text, integer);
+CREATE OR REPLACE FUNCTION get_fault_summary (
+  group_by text[],
+  time_bucket text DEFAULT NULL,
+  since date DEFAULT NULL,
+  until date DEFAULT NULL,
+  filter_camp text DEFAULT NULL,
+  filter_formation text DEFAULT NULL,
+  filter_fault_type text DEFAULT NULL,
+  filter_part_id text DEFAULT NULL,
+  max_rows integer DEFAULT 50
+)
+RETURNS TABLE (
+  bucket_start date,
+  camp character varying(50),
+  formation character varying(50),
+  fault_type character varying(50),
+  part_id character varying(10),
+  fault_count bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    CASE WHEN time_bucket IS NULL THEN NULL ELSE date_trunc(time_bucket, s.bucket_date::timestamp)::date END,
+    CASE WHEN 'camp' = ANY(group_by) THEN s.camp END,
+    CASE WHEN 'formation' = ANY(group_by) THEN s.formation END,
+    CASE WHEN 'fault_type' = ANY(group_by) THEN s.fault_type END,
+    CASE WHEN 'part_id' = ANY(group_by) THEN s.part_id END,
+    sum(s.fault_count)::bigint AS fault_count
+  FROM fault_summary_daily s
+  WHERE (since IS NULL OR s.bucket_date >= since)
+    AND (until IS NULL OR s.bucket_date < until)
+    AND (filter_camp IS NULL OR s.camp = filter_camp)
+    AND (filter_formation IS NULL OR s.formation = filter_formation)
+    AND (filter_fault_type IS NULL OR s.fault_type = filter_fault_type)
+    AND (filter_part_id IS NULL OR s.part_id = filter_part_id)
+  GROUP BY 1, 2, 3, 4, 5
+  HAVING sum(s.fault_count) > 0
+  ORDER BY fault_count DESC, 1, 2, 3, 4, 5
+  LIMIT max_rows;
+$$;
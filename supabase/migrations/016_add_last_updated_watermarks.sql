@@ -0,0 +1,41 @@
+-- Migration to track last_updated on wells, parts and inventory for incremental sync
+
+-- The MCP server keeps an in-memory snapshot of these small, read-heavy tables and polls
+-- for rows changed since its last watermark. inventory already has last_updated; wells and
+-- parts get one, and a trigger stamps every update with the database clock so watermarks
+-- do not depend on client clocks.
+ALTER TABLE wells ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE parts ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+UPDATE wells SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL;
+UPDATE parts SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL;
+
+CREATE OR REPLACE FUNCTION set_last_updated()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.last_updated = CURRENT_TIMESTAMP;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS wells_set_last_updated ON wells;
+CREATE TRIGGER wells_set_last_updated
+BEFORE UPDATE ON wells
+FOR EACH ROW EXECUTE FUNCTION set_last_updated();
+
+DROP TRIGGER IF EXISTS parts_set_last_updated ON parts;
+CREATE TRIGGER parts_set_last_updated
+BEFORE UPDATE ON parts
+FOR EACH ROW EXECUTE FUNCTION set_last_updated();
+
+DROP TRIGGER IF EXISTS inventory_set_last_updated ON inventory;
+CREATE TRIGGER inventory_set_last_updated
+BEFORE UPDATE ON inventory
+FOR EACH ROW EXECUTE FUNCTION set_last_updated();
+
+-- Delta polls filter on last_updated
+CREATE INDEX IF NOT EXISTS wells_last_updated_idx ON wells (last_updated);
+CREATE INDEX IF NOT EXISTS parts_last_updated_idx ON parts (last_updated);
+CREATE INDEX IF NOT EXISTS inventory_last_updated_idx ON inventory (last_updated);
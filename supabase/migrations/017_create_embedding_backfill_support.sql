@@ -0,0 +1,31 @@
+-- Migration for the batched embedding backfill (mcp/wellsync_data/embedding_backfill.py)
+
+-- One embedding per fault, so a backfill re-run after a crash (or racing the insert webhook) cannot
+-- create duplicates; writers upsert with ON CONFLICT (fault_id) DO NOTHING.
+DELETE FROM fault_embeddings a
+USING fault_embeddings b
+WHERE a.fault_id = b.fault_id AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS fault_embeddings_fault_id_key ON fault_embeddings (fault_id);
+
+-- Faults that have no embedding yet, in fault_id order after after_fault_id (keyset paging over the
+-- faults primary key; the anti-join uses the unique index above).
+CREATE OR REPLACE FUNCTION faults_without_embeddings (
+  after_fault_id UUID DEFAULT NULL,
+  max_rows INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+  fault_id UUID,
+  fault_type TEXT,
+  description TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT f.fault_id, f.fault_type::text, f.description::text
+  FROM faults f
+  WHERE (after_fault_id IS NULL OR f.fault_id > after_fault_id)
+    AND NOT EXISTS (SELECT 1 FROM fault_embeddings fe WHERE fe.fault_id = f.fault_id)
+  ORDER BY f.fault_id
+  LIMIT max_rows;
+$$;
@@ -0,0 +1,28 @@
+-- Migration to add warehouse locations for nearest-stock sourcing
+
+-- inventory.warehouse_id has been a bare code (W01, W02, W03). The MCP server's find_best_source
+-- tool ranks warehouses by distance to the destination well, so each warehouse needs coordinates.
+-- cost_per_km is optional; when set, sources can also be ranked by estimated travel cost.
+CREATE TABLE IF NOT EXISTS warehouses (
+    warehouse_id VARCHAR(10) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    latitude DECIMAL(9,6),
+    longitude DECIMAL(9,6),
+    cost_per_km DECIMAL(10,2),
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Demo yards in the Permian Basin; replace with the real yard coordinates
+INSERT INTO warehouses (warehouse_id, name, latitude, longitude, cost_per_km) VALUES
+  ('W01', 'Midland Yard', 31.9973, -102.0779, 2.50),
+  ('W02', 'Pecos Yard', 31.4229, -103.4932, 2.50),
+  ('W03', 'Odessa Yard', 31.8457, -102.3676, 2.75)
+ON CONFLICT DO NOTHING;
+
+-- Stamped like wells/parts/inventory (migration 016) so the fleet snapshot picks up changes
+DROP TRIGGER IF EXISTS warehouses_set_last_updated ON warehouses;
+CREATE TRIGGER warehouses_set_last_updated
+BEFORE UPDATE ON warehouses
+FOR EACH ROW EXECUTE FUNCTION set_last_updated();
+
+CREATE INDEX IF NOT EXISTS warehouses_last_updated_idx ON warehouses (last_updated);
@@ -0,0 +1,23 @@
+-- Migration to publish fleet table changes over Supabase Realtime
+
+-- The MCP server subscribes to postgres_changes on these tables and uses each event to run its
+-- fleet snapshot delta poll right away, which in turn notifies clients subscribed to resources
+-- such as wellsync://wells/{id}/status and wellsync://inventory/{part_id}. Without this the server
+-- still works, picking changes up at its regular poll interval.
+DO $$
+DECLARE
+  t text;
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+    CREATE PUBLICATION supabase_realtime;
+  END IF;
+  FOREACH t IN ARRAY ARRAY['wells', 'parts', 'inventory', 'warehouses'] LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = t
+    ) THEN
+      EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', t);
+    END IF;
+  END LOOP;
+END;
+$$;
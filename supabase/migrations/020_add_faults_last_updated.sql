@@ -0,0 +1,17 @@
+-- Migration to track last_updated on faults for incremental sync
+
+-- The MCP server's field replica (DATA_BACKEND=sqlite) pulls faults changed since its last
+-- watermark. Watermarking on "timestamp" misses faults reported late or backdated to before
+-- the newest one already copied, so faults get the same database-clock last_updated column
+-- as wells, parts and inventory (migration 016): set on insert, and by trigger on update.
+ALTER TABLE faults ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+UPDATE faults SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL;
+
+DROP TRIGGER IF EXISTS faults_set_last_updated ON faults;
+CREATE TRIGGER faults_set_last_updated
+BEFORE UPDATE ON faults
+FOR EACH ROW EXECUTE FUNCTION set_last_updated();
+
+-- Delta polls filter on last_updated
+CREATE INDEX IF NOT EXISTS faults_last_updated_idx ON faults (last_updated);
@@ -0,0 +1,46 @@
+-- Migration to add the get_faults_for_wells RPC
+
+-- The newest `limit_per_well` faults of each of `well_ids`, in one query. get_faults_for_wells
+-- (MCP server) asks for limit_per_well + 1 rows to tell whether a well has older faults. Each
+-- well's rows are ranked in the ("timestamp" DESC, fault_id DESC) keyset order of
+-- get_faults_by_well, which the faults_well_id_timestamp_fault_id_idx index serves.
+DROP FUNCTION IF EXISTS get_faults_for_wells(uuid[], timestamp, timestamp, text, text, integer);
+CREATE OR REPLACE FUNCTION get_faults_for_wells (
+  well_ids uuid[],
+  since timestamp DEFAULT NULL,
+  until timestamp DEFAULT NULL,
+  filter_fault_type text DEFAULT NULL,
+  filter_part_id text DEFAULT NULL,
+  limit_per_well integer DEFAULT 50
+)
+RETURNS TABLE (
+  fault_id uuid,
+  well_id uuid,
+  part_id text,
+  fault_type text,
+  description text,
+  "timestamp" timestamp
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT r.fault_id, r.well_id, r.part_id, r.fault_type, r.description, r."timestamp"
+  FROM (
+    SELECT
+      f.fault_id,
+      f.well_id,
+      f.part_id::text AS part_id,
+      f.fault_type::text AS fault_type,
+      f.description::text AS description,
+      f."timestamp",
+      row_number() OVER (PARTITION BY f.well_id ORDER BY f."timestamp" DESC, f.fault_id DESC) AS rank
+    FROM faults f
+    WHERE f.well_id = ANY(well_ids)
+      AND (since IS NULL OR f."timestamp" >= since)
+      AND (until IS NULL OR f."timestamp" < until)
+      AND (filter_fault_type IS NULL OR f.fault_type = filter_fault_type)
+      AND (filter_part_id IS NULL OR f.part_id = filter_part_id)
+  ) r
+  WHERE r.rank <= limit_per_well
+  ORDER BY r.well_id, r."timestamp" DESC, r.fault_id DESC;
+$$;